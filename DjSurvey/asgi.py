@@ -5,6 +5,12 @@ It exposes the ASGI callable as a module-level variable named ``application``.
 
 For more information on this file, see
 https://docs.djangoproject.com/en/5.2/howto/deployment/asgi/
+
+Serve the project with an ASGI server (e.g. ``uvicorn DjSurvey.asgi:application``) for the live
+results stream (Server-Sent Events): an open stream waits on the event loop for new answers.
+The stream does not work under WSGI (runserver, gunicorn sync workers), which buffers a streamed
+async response whole before sending it. There the results page gets the current counts and asks
+again every few seconds instead (see survey_live_results_view).
 """
 
 import os
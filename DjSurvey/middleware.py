@@ -0,0 +1,191 @@
+import mimetypes
+import os
+import re
+import time
+
+from django.conf import settings
+from django.core.exceptions import SuspiciousFileOperation
+from django.http import FileResponse, HttpResponseNotModified
+from django.utils._os import safe_join
+from django.utils.http import http_date
+
+from . import profiling, routers
+
+
+#? ------------------------------------------------------------------------
+#? Serves collected static files (STATIC_ROOT) straight from the app, WhiteNoise-style.
+#? - Picks the precompressed variant written by CompressedManifestStaticFilesStorage
+#?   (.br, then .gz) when the client accepts it.
+#? - Hashed file names (collectstatic output) never change content, so they are sent with a
+#?   one year "immutable" Cache-Control: repeat visits don't even revalidate them.
+#? - Anything that isn't a file in STATIC_ROOT falls through to the normal Django stack.
+#? Goes right after SecurityMiddleware, so static requests skip sessions, auth, csrf...
+#? ------------------------------------------------------------------------
+
+#* ManifestStaticFilesStorage inserts a 12 hex char hash before the extension: htmx.min.1a2b3c4d5e6f.js
+HASHED_NAME_RE = re.compile(r'\.[0-9a-f]{12}\.[^/.]+$')
+IMMUTABLE_CACHE_CONTROL = 'public, max-age=31536000, immutable'
+DEFAULT_CACHE_CONTROL = 'public, max-age=60'
+ENCODINGS = (('br', '.br'), ('gzip', '.gz'))
+
+
+def accepted_encodings(header):
+    #? {coding: q} of an Accept-Encoding header, for the codings the client accepts: "br;q=0" refuses br.
+    #? "*" stands for every coding not named in the header
+    qualities = {}
+    for item in header.split(','):
+        coding, *params = [part.strip() for part in item.split(';')]
+        q = 1.0
+        for param in params:
+            key, _, value = param.partition('=')
+            if key.strip().lower() == 'q':
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        if coding:
+            qualities[coding.lower()] = q
+    wildcard = qualities.pop('*', 0.0)
+    accepted = {coding: q for coding, q in qualities.items() if q > 0}
+    if wildcard > 0:
+        for coding, _suffix in ENCODINGS:
+            if coding not in qualities:
+                accepted[coding] = wildcard
+    return accepted
+
+
+class StaticFilesMiddleware:
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.prefix = '/' + settings.STATIC_URL.lstrip('/')
+        self.root = str(settings.STATIC_ROOT) if settings.STATIC_ROOT else None
+        #* STATIC_ROOT doesn't change while the process runs, so the files found are cached per path.
+        #* misses are not: anyone can ask for random names, the cache stays bounded by STATIC_ROOT
+        self.files = {}
+
+    def __call__(self, request):
+        if self.root and request.method in ('GET', 'HEAD') and request.path.startswith(self.prefix):
+            response = self.serve(request, request.path[len(self.prefix):])
+            if response is not None:
+                return response
+        return self.get_response(request)
+
+    def find(self, name):
+        variants = self.files.get(name)
+        if variants is None:
+            variants = self.stat_variants(name)
+            if variants is not None:
+                self.files[name] = variants
+        return variants
+
+    def stat_variants(self, name):
+        #? -> None, or {'': (path, stat), 'br': (path, stat), 'gzip': (path, stat)} for the variants on disk
+        try:
+            path = safe_join(self.root, name)
+        except SuspiciousFileOperation:  #! path traversal attempt ("../")
+            return None
+        if not os.path.isfile(path):
+            return None
+        variants = {'': (path, os.stat(path))}
+        for encoding, suffix in ENCODINGS:
+            if os.path.isfile(path + suffix):
+                variants[encoding] = (path + suffix, os.stat(path + suffix))
+        return variants
+
+    def serve(self, request, name):
+        variants = self.find(name)
+        if variants is None:
+            return None
+
+        accepted = accepted_encodings(request.headers.get('Accept-Encoding', ''))
+        #* the highest q among the variants on disk, br first on a tie (ENCODINGS order, max keeps the first)
+        candidates = [enc for enc, _suffix in ENCODINGS if enc in variants and enc in accepted]
+        encoding = max(candidates, key=accepted.get, default='')
+        path, stat = variants[encoding]
+        etag = f'"{int(variants[""][1].st_mtime):x}-{variants[""][1].st_size:x}{"-" + encoding if encoding else ""}"'
+
+        headers = {
+            'Cache-Control': IMMUTABLE_CACHE_CONTROL if HASHED_NAME_RE.search(name) else DEFAULT_CACHE_CONTROL,
+            'ETag': etag,
+            'Last-Modified': http_date(variants[''][1].st_mtime),
+        }
+        if len(variants) > 1:
+            headers['Vary'] = 'Accept-Encoding'
+
+        if request.headers.get('If-None-Match') == etag:
+            response = HttpResponseNotModified()
+        else:
+            content_type, _ = mimetypes.guess_type(name)
+            response = FileResponse(
+                open(path, 'rb'),
+                content_type=content_type or 'application/octet-stream',
+                filename=os.path.basename(name),
+            )
+            response['Content-Length'] = stat.st_size
+            if encoding:
+                response['Content-Encoding'] = encoding
+        for key, value in headers.items():
+            response[key] = value
+        return response
+
+
+#? ------------------------------------------------------------------------
+#? Read-your-writes for the replica router (routers.py): a request that wrote to the primary sets a
+#? short-lived cookie, and while the browser sends it back, its reads stay on the primary too.
+#? Goes before SessionMiddleware, so session saves at the end of the request count as writes.
+#? ------------------------------------------------------------------------
+
+PIN_COOKIE = 'db_pin'
+
+
+class ReplicaPinningMiddleware:
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        pinned_token = routers._pinned.set(request.COOKIES.get(PIN_COOKIE) == '1')
+        wrote_token = routers._wrote.set(False)
+        try:
+            response = self.get_response(request)
+            wrote = routers._wrote.get()
+        finally:
+            routers._pinned.reset(pinned_token)
+            routers._wrote.reset(wrote_token)
+        if wrote and settings.DATABASE_REPLICAS:
+            response.set_cookie(
+                PIN_COOKIE, '1', max_age=settings.DATABASE_REPLICA_PIN_SECONDS, httponly=True, samesite='Lax',
+            )
+        return response
+
+
+#? ------------------------------------------------------------------------
+#? Profiles the requests picked by profiling.should_profile (signed staff token or sampling rate)
+#? with cProfile and stores the result in PROFILING_DIR, see profiling.py.
+#? The response gets an X-Profile header with the name of the stored profile.
+#? Goes right after StaticFilesMiddleware: everything but static files is inside the profile.
+#? ------------------------------------------------------------------------
+
+class ProfilingMiddleware:
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if not profiling.should_profile(request):
+            return self.get_response(request)
+        import cProfile  #* loaded by the first profiled request, not at boot
+        profiler = cProfile.Profile()
+        try:
+            profiler.enable()
+        except ValueError:  #! another profiler is already active in this process, serve unprofiled
+            return self.get_response(request)
+        started = time.perf_counter()
+        try:
+            response = self.get_response(request)
+        finally:
+            profiler.disable()
+        elapsed = time.perf_counter() - started
+        response['X-Profile'] = profiling.save_profile(profiler, request, response.status_code, elapsed)
+        return response
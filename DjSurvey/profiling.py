@@ -0,0 +1,109 @@
+import io
+import os
+import random
+import re
+from datetime import datetime
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core import signing
+from django.utils import timezone
+from django.utils._os import safe_join
+
+
+#? ------------------------------------------------------------------------
+#? On-demand request profiling (ProfilingMiddleware in middleware.py), to see where a slow page or
+#? HTMX endpoint spends its time in production, without redeploying.
+#? A request is profiled when:
+#? - it carries a valid profiling token, in the X-Profile-Token header or the ?_profile= query parameter.
+#?   Tokens are signed with SECRET_KEY, handed out to staff on the profiles page (profile_list_view)
+#?   and expire after PROFILING_TOKEN_MAX_AGE seconds, or as soon as their owner is no longer active staff;
+#? - or it is picked by PROFILING_SAMPLE_RATE (0 = never, the default; 0.01 = one request in 100).
+#? The whole request under the middleware is profiled with cProfile: sessions, auth, the view (formset
+#? construction, clean(), queries...) and the template rendering. Streaming responses are only
+#? profiled up to the point where they start streaming.
+#? Profiles are pstats files in PROFILING_DIR (open them with snakeviz, or read them on the profiles
+#? page), only the newest PROFILING_KEEP are kept.
+#? ------------------------------------------------------------------------
+
+TOKEN_SALT = 'DjSurvey.profiling'
+TOKEN_PARAM = '_profile'
+TOKEN_HEADER = 'X-Profile-Token'
+#* 20261019-163301-123456-GET-survey-abc-update-200-734ms.prof
+PROFILE_NAME_RE = re.compile(r'^(?P<at>\d{8}-\d{6}-\d{6})-(?P<method>[A-Z]+)-(?P<path>[\w-]*)-(?P<status>\d{3})-(?P<ms>\d+)ms\.prof$')
+SORT_KEYS = ('cumulative', 'tottime', 'ncalls')
+
+
+def make_token(user):
+    return signing.dumps(user.pk, salt=TOKEN_SALT)
+
+
+def token_is_valid(token):
+    try:
+        pk = signing.loads(token, salt=TOKEN_SALT, max_age=settings.PROFILING_TOKEN_MAX_AGE)
+    except signing.BadSignature:  #* expired tokens too (SignatureExpired)
+        return False
+    #* the token is only as good as its owner: deactivated or demoted staff lose it at once
+    return get_user_model().objects.filter(pk=pk, is_active=True, is_staff=True).exists()
+
+
+def should_profile(request):
+    #* the header first: query strings end up in access logs and Referer headers
+    token = request.headers.get(TOKEN_HEADER) or request.GET.get(TOKEN_PARAM)
+    if token:
+        return token_is_valid(token)
+    rate = settings.PROFILING_SAMPLE_RATE
+    return rate > 0 and random.random() < rate
+
+
+def save_profile(profiler, request, status, elapsed):
+    #? writes the stats of `profiler` to PROFILING_DIR, returns the file name
+    directory = str(settings.PROFILING_DIR)
+    os.makedirs(directory, exist_ok=True)
+    path = re.sub(r'[^\w]+', '-', request.path).strip('-')[:80] or 'root'
+    name = f'{timezone.now():%Y%m%d-%H%M%S-%f}-{request.method}-{path}-{status}-{int(elapsed * 1000)}ms.prof'
+    #* dumped next to its final name then renamed: the profiles page never reads a half written file
+    target = os.path.join(directory, name)
+    profiler.dump_stats(target + '.tmp')
+    os.replace(target + '.tmp', target)
+    for old in sorted(_profile_names(directory), reverse=True)[settings.PROFILING_KEEP:]:
+        try:
+            os.remove(os.path.join(directory, old))
+        except FileNotFoundError:  #* another process pruned it first
+            pass
+    return name
+
+
+def _profile_names(directory):
+    try:
+        return [name for name in os.listdir(directory) if PROFILE_NAME_RE.match(name)]
+    except FileNotFoundError:
+        return []
+
+
+def list_profiles():
+    #? the stored profiles, newest first: [{'name', 'at', 'method', 'path', 'status', 'ms'}]
+    profiles = []
+    for name in sorted(_profile_names(str(settings.PROFILING_DIR)), reverse=True):
+        fields = PROFILE_NAME_RE.match(name).groupdict()
+        fields['at'] = datetime.strptime(fields['at'], '%Y%m%d-%H%M%S-%f')
+        fields['ms'] = int(fields['ms'])
+        profiles.append({'name': name, **fields})
+    return profiles
+
+
+def profile_path(name):
+    #? the file of a stored profile, or None (unknown names, anything that isn't a profile file)
+    if not PROFILE_NAME_RE.match(name):
+        return None
+    path = safe_join(str(settings.PROFILING_DIR), name)
+    return path if os.path.isfile(path) else None
+
+
+def profile_report(path, sort='cumulative', limit=80):
+    #* the pstats text report, `limit` most expensive functions by `sort`
+    import pstats  #* only the staff profiles page needs it, workers don't load it
+    stream = io.StringIO()
+    stats = pstats.Stats(path, stream=stream)
+    stats.sort_stats(sort).print_stats(limit)
+    return stream.getvalue()
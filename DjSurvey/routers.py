@@ -0,0 +1,62 @@
+import random
+from contextvars import ContextVar
+from functools import wraps
+
+from django.conf import settings
+
+
+#? ------------------------------------------------------------------------
+#? Primary / read-replica routing.
+#? - Writes always go to the primary ("default").
+#? - Reads go to a replica only inside views decorated with @replica_reads (read-only pages: detail,
+#?   results, exports, API...), everything else reads from the primary. One replica is picked per
+#?   request, so a page never mixes two replicas.
+#? - No stale reads after an edit: once a request has written, the rest of it reads from the primary,
+#?   and ReplicaPinningMiddleware (middleware.py) keeps that browser on the primary for
+#?   DATABASE_REPLICA_PIN_SECONDS, longer than the replicas take to catch up.
+#? - Without DATABASE_REPLICAS (settings.py) every read goes to the primary and nothing changes.
+#? ------------------------------------------------------------------------
+
+#* the replica the current request reads from (None = primary)
+_replica = ContextVar('db_replica', default=None)
+#* the client wrote recently (pin cookie, see ReplicaPinningMiddleware)
+_pinned = ContextVar('db_pinned', default=False)
+#* the current request wrote
+_wrote = ContextVar('db_wrote', default=False)
+
+#* sessions are read on every request and must match the cookie the client just got
+PRIMARY_ONLY_APPS = {'sessions'}
+
+
+def replica_reads(view):
+    #? lets the reads of a read-only view go to a replica
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        replicas = settings.DATABASE_REPLICAS
+        token = _replica.set(random.choice(replicas) if replicas else None)
+        try:
+            return view(request, *args, **kwargs)
+        finally:
+            _replica.reset(token)
+    return wrapper
+
+
+class PrimaryReplicaRouter:
+
+    def db_for_read(self, model, **hints):
+        if _wrote.get() or _pinned.get() or model._meta.app_label in PRIMARY_ONLY_APPS:
+            return 'default'
+        return _replica.get() or 'default'
+
+    def db_for_write(self, model, **hints):
+        #* from now on this request must see its own write
+        _wrote.set(True)
+        return 'default'
+
+    def allow_relation(self, obj1, obj2, **hints):
+        #* replicas hold the same rows as the primary
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        #* replicas are copies of the primary, they are never migrated on their own
+        return db == 'default'
@@ -48,6 +48,12 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
+    # serves collected static files before sessions/auth run, see DjSurvey/middleware.py
+    'DjSurvey.middleware.StaticFilesMiddleware',
+    # profiles requests on demand (signed staff token or sampling), see DjSurvey/profiling.py
+    'DjSurvey.middleware.ProfilingMiddleware',
+    # keeps clients that just wrote on the primary database, see DjSurvey/routers.py
+    'DjSurvey.middleware.ReplicaPinningMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
@@ -64,8 +70,15 @@ TEMPLATES = [
     {
         'BACKEND': 'django.template.backends.django.DjangoTemplates',
         'DIRS': [os.path.join(BASE_DIR, 'templates')],
-        'APP_DIRS': True,
         'OPTIONS': {
+            # templates are parsed once per process and reused (the dev autoreloader still resets
+            # this cache when a template file changes)
+            'loaders': [
+                ('django.template.loaders.cached.Loader', [
+                    'django.template.loaders.filesystem.Loader',
+                    'django.template.loaders.app_directories.Loader',
+                ]),
+            ],
             'context_processors': [
                 'django.template.context_processors.request',
                 'django.contrib.auth.context_processors.auth',
@@ -88,6 +101,93 @@ DATABASES = {
     }
 }
 
+# Read replicas (DjSurvey/routers.py): read-only views read from one of DATABASE_REPLICAS, writes and
+# clients that wrote in the last DATABASE_REPLICA_PIN_SECONDS stay on "default".
+# Locally, SQLite copies of the primary stand in for replicas:
+#   DJSURVEY_DB_REPLICAS=db-replica1.sqlite3,db-replica2.sqlite3 and `manage.py sync_replicas` to refresh them
+# Tests mirror the replicas to "default".
+
+DATABASE_REPLICAS = []
+for number, name in enumerate(filter(None, os.environ.get('DJSURVEY_DB_REPLICAS', '').split(',')), start=1):
+    DATABASES[f'replica{number}'] = {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': BASE_DIR / name.strip(),
+        'TEST': {'MIRROR': 'default'},
+    }
+    DATABASE_REPLICAS.append(f'replica{number}')
+
+DATABASE_ROUTERS = ['DjSurvey.routers.PrimaryReplicaRouter']
+DATABASE_REPLICA_PIN_SECONDS = 15
+
+
+# Authentication
+# the backend loads request.user together with its profile (one query instead of two)
+
+# ModelBackend stays listed: sessions from before keep its path and stay valid (without the join)
+# until their next login, which stores the new backend
+
+AUTHENTICATION_BACKENDS = [
+    'accounts.backends.ProfileModelBackend',
+    'django.contrib.auth.backends.ModelBackend',
+]
+
+
+# Cache
+# used for template fragments ({% cache %}), keyed by Survey/Question.updated so they never go stale.
+# local memory is per process; point this at a shared cache (redis/memcached) when running several workers.
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    }
+}
+
+
+# Live results (Server-Sent Events, survey.views.survey_live_results_view)
+# in-process pub/sub; swap for a shared backend when running several ASGI workers (see survey/live.py)
+
+SURVEY_LIVE_BROKER = 'survey.live.InProcessBroker'
+
+
+# Largest survey file accepted by the import page (survey/transfer.py), in bytes. The file is read
+# into memory whole, a survey with thousands of questions and choices is well under this
+
+SURVEY_IMPORT_MAX_SIZE = 5 * 1024 * 1024
+
+
+# Rate limits (token buckets in the cache, see survey/ratelimit.py), "<count>/<s|m|h>"
+# the bucket holds <count> tokens and refills at <count> per period
+
+SURVEY_RATE_LIMITS = {
+    'answer-submit': '10/m',
+    'answer-sync': '30/m',  # bulk uploads of offline responses, up to 500 per request
+}
+
+
+# Result report files written by `manage.py generate_reports` (see survey/reports.py)
+
+SURVEY_REPORTS_DIR = BASE_DIR / 'reports'
+
+
+# Approximate results (survey/sketches.py): past SURVEY_APPROX_THRESHOLD answers the results page shows
+# estimates from the survey's sketch instead of exact counts (?exact=1 still gets them).
+# SURVEY_APPROX_SAMPLE_SIZE answers are sampled per question, shares are within about +-2% at 2000
+# Sketches are started by `manage.py rebuild_sketches` (run it from cron) once a survey has
+# SURVEY_APPROX_SKETCH_FROM answers, smaller surveys have none
+
+SURVEY_APPROX_THRESHOLD = 1_000_000
+SURVEY_APPROX_SAMPLE_SIZE = 2000
+SURVEY_APPROX_SKETCH_FROM = SURVEY_APPROX_THRESHOLD // 10
+
+
+# Request profiling (DjSurvey/profiling.py): requests carrying a staff profiling token are always
+# profiled, others with probability PROFILING_SAMPLE_RATE. Profiles are browsed at /profiles/
+
+PROFILING_SAMPLE_RATE = float(os.environ.get('DJSURVEY_PROFILING_SAMPLE_RATE', 0))
+PROFILING_DIR = BASE_DIR / 'profiles'
+PROFILING_KEEP = 200
+PROFILING_TOKEN_MAX_AGE = 60 * 60 * 8
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
@@ -125,6 +225,22 @@ USE_TZ = True
 
 STATIC_URL = 'static/'
 
+# our own assets + vendored htmx/bootstrap (no CDN requests)
+STATICFILES_DIRS = [BASE_DIR / 'static']
+
+# collectstatic output: hashed file names + precompressed .gz/.br variants,
+# served with immutable cache headers by DjSurvey.middleware.StaticFilesMiddleware
+STATIC_ROOT = BASE_DIR / 'staticfiles'
+
+STORAGES = {
+    'default': {
+        'BACKEND': 'django.core.files.storage.FileSystemStorage',
+    },
+    'staticfiles': {
+        'BACKEND': 'DjSurvey.storage.CompressedManifestStaticFilesStorage',
+    },
+}
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.2/ref/settings/#default-auto-field
 
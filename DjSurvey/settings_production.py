@@ -0,0 +1,31 @@
+"""
+Lean settings for production processes: web workers and management commands run from cron.
+
+    DJANGO_SETTINGS_MODULE=DjSurvey.settings_production
+
+Everything comes from settings.py, minus what only development and the admin need, so that
+django.setup() and the first request of a fresh worker have less to import:
+- the admin and nested_admin are left out (no admin autodiscovery, no admin URLs) unless
+  DJSURVEY_ADMIN=1, for the deployment that serves /admin/;
+- DEBUG is off: no debug error pages, and no log of every query kept in memory per connection;
+- database connections are kept between requests instead of reopened each time.
+`manage.py bench_startup --settings DjSurvey.settings_production` compares it with settings.py.
+"""
+
+import os
+
+from .settings import *  # noqa: F401,F403
+from .settings import INSTALLED_APPS, DATABASES, SECRET_KEY
+
+DEBUG = False
+
+SECRET_KEY = os.environ.get('DJSURVEY_SECRET_KEY', SECRET_KEY)
+ALLOWED_HOSTS = [host.strip() for host in os.environ.get('DJSURVEY_ALLOWED_HOSTS', 'localhost').split(',') if host.strip()]
+
+ADMIN_APPS = ['django.contrib.admin', 'nested_admin']
+if os.environ.get('DJSURVEY_ADMIN') != '1':
+    INSTALLED_APPS = [app for app in INSTALLED_APPS if app not in ADMIN_APPS]
+
+for database in DATABASES.values():
+    database.setdefault('CONN_MAX_AGE', 60)
+    database.setdefault('CONN_HEALTH_CHECKS', True)
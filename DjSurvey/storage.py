@@ -0,0 +1,57 @@
+import gzip
+
+from django.contrib.staticfiles.storage import ManifestStaticFilesStorage
+from django.core.files.base import ContentFile
+
+try:
+    import brotli
+except ImportError:  #* optional, without it only .gz variants are written
+    brotli = None
+
+
+#? ------------------------------------------------------------------------
+#? Static files storage used by collectstatic:
+#? - ManifestStaticFilesStorage renames every file to include a hash of its content
+#?   (htmx.min.js -> htmx.min.<hash>.js), so a file URL never changes meaning and can be cached forever.
+#? - On top of that, each text asset gets precompressed siblings (.gz always, .br if `brotli` is installed),
+#?   written once at deploy time. StaticFilesMiddleware picks the best one per request, no
+#?   compression work at request time.
+#? ------------------------------------------------------------------------
+
+COMPRESSIBLE_EXTENSIONS = ('.css', '.js', '.svg', '.json', '.txt', '.html', '.xml', '.map')
+#* compressing tiny files isn't worth the extra files/headers
+MIN_COMPRESS_SIZE = 512
+
+
+class CompressedManifestStaticFilesStorage(ManifestStaticFilesStorage):
+
+    def post_process(self, paths, dry_run=False, **options):
+        yield from super().post_process(paths, dry_run=dry_run, **options)
+        if dry_run:
+            return
+        for name in {*paths, *self.hashed_files.values()}:
+            if name.endswith(COMPRESSIBLE_EXTENSIONS):
+                self.compress(name)
+
+    def compress(self, name):
+        with self.open(name) as f:
+            content = f.read()
+        if len(content) < MIN_COMPRESS_SIZE:
+            return
+        #* mtime=0 keeps the .gz output identical between deploys for identical input
+        variants = {'.gz': gzip.compress(content, compresslevel=9, mtime=0)}
+        if brotli is not None:
+            variants['.br'] = brotli.compress(content, quality=11)
+        for suffix, compressed in variants.items():
+            if len(compressed) >= len(content):
+                continue
+            if self.exists(name + suffix):
+                self.delete(name + suffix)
+            self._save(name + suffix, ContentFile(compressed))
+
+    def stored_name(self, name):
+        #? Before collectstatic has run (local development, the test runner) there is no manifest at all.
+        #? Fall back to the plain file name instead of failing every {% static %} tag.
+        if not self.hashed_files and not self.exists(self.manifest_name):
+            return name
+        return super().stored_name(name)
@@ -0,0 +1,222 @@
+import contextvars
+import os
+import shutil
+import tempfile
+
+from django.contrib.auth import get_user_model
+from django.contrib.sessions.models import Session
+from django.http import HttpResponse
+from django.test import RequestFactory, SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+
+from . import profiling, routers
+from .middleware import IMMUTABLE_CACHE_CONTROL, PIN_COOKIE, ReplicaPinningMiddleware
+from survey.models import Survey, Question
+
+
+class ProfilingTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        User = get_user_model()
+        cls.staff = User.objects.create_user('staff', password='password', is_staff=True)
+        cls.user = User.objects.create_user('user', password='password')
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory)
+        settings = override_settings(PROFILING_DIR=self.directory, PROFILING_SAMPLE_RATE=0)
+        settings.enable()
+        self.addCleanup(settings.disable)
+
+    def get(self, token=None, param=None):
+        headers = {profiling.TOKEN_HEADER: token} if token else {}
+        data = {profiling.TOKEN_PARAM: param} if param else {}
+        return self.client.get(reverse('home'), data, headers=headers)
+
+    def assertProfiled(self, response, profiled=True):
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual('X-Profile' in response, profiled)
+        self.assertEqual(len(os.listdir(self.directory)), 1 if profiled else 0)
+
+    def test_valid_token(self):
+        response = self.get(profiling.make_token(self.staff))
+        self.assertProfiled(response)
+        self.assertEqual(os.listdir(self.directory), [response['X-Profile']])
+
+    def test_invalid_token(self):
+        self.assertProfiled(self.get('not-a-token'), profiled=False)
+        self.assertProfiled(self.get(profiling.make_token(self.staff) + 'x'), profiled=False)
+
+    def test_token_of_non_staff_or_inactive_user(self):
+        self.assertProfiled(self.get(profiling.make_token(self.user)), profiled=False)
+        token = profiling.make_token(self.staff)
+        self.staff.is_active = False
+        self.staff.save()
+        self.assertProfiled(self.get(token), profiled=False)
+
+    def test_header_before_query_string(self):
+        token = profiling.make_token(self.staff)
+        self.assertProfiled(self.get('not-a-token', param=token), profiled=False)
+        self.assertProfiled(self.get(token, param='not-a-token'))
+
+    def test_query_string_token(self):
+        self.assertProfiled(self.get(param=profiling.make_token(self.staff)))
+
+    def test_sample_rate(self):
+        with override_settings(PROFILING_SAMPLE_RATE=1):
+            self.assertProfiled(self.get())
+
+    def test_profile_pages_are_staff_only(self):
+        name = self.get(profiling.make_token(self.staff))['X-Profile']
+        list_url = reverse('profiles')
+        detail_url = reverse('profile-detail', kwargs={'name': name})
+
+        response = self.client.get(list_url)
+        self.assertRedirects(response, f'{reverse("accounts:login")}?next={list_url}', fetch_redirect_response=False)
+        self.client.force_login(self.user)
+        self.assertEqual(self.client.get(list_url).status_code, 404)
+        self.assertEqual(self.client.get(detail_url).status_code, 404)
+
+        self.client.force_login(self.staff)
+        self.assertContains(self.client.get(list_url), name)
+        self.assertEqual(self.client.get(detail_url).status_code, 200)
+        self.assertEqual(self.client.get(reverse('profile-detail', kwargs={'name': 'settings.py'})).status_code, 404)
+
+
+class StaticFilesTests(TestCase):
+    #? a STATIC_ROOT like collectstatic's output: app.js with its .br and .gz siblings, plus a hashed copy
+
+    def setUp(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        root = os.path.join(directory, 'static')
+        os.mkdir(root)
+        for name, content in [
+            ('app.js', b'plain'), ('app.js.br', b'brotli'), ('app.js.gz', b'gzip'),
+            ('app.0123456789ab.js', b'plain'), ('../secret.txt', b'secret'),
+        ]:
+            with open(os.path.join(root, name), 'wb') as f:
+                f.write(content)
+        settings = override_settings(STATIC_ROOT=root, STATIC_URL='static/')
+        settings.enable()
+        self.addCleanup(settings.disable)
+
+    def get(self, name, accept_encoding=None):
+        headers = {'Accept-Encoding': accept_encoding} if accept_encoding is not None else {}
+        return self.client.get(f'/static/{name}', headers=headers)
+
+    def assertServed(self, response, content, encoding=None):
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(b''.join(response.streaming_content), content)
+        self.assertEqual(response.get('Content-Encoding'), encoding)
+        self.assertEqual(response['Vary'], 'Accept-Encoding')
+
+    def test_encoding_follows_q_values(self):
+        self.assertServed(self.get('app.js', 'gzip, br'), b'brotli', 'br')
+        self.assertServed(self.get('app.js', 'br;q=0.5, gzip'), b'gzip', 'gzip')
+        self.assertServed(self.get('app.js', 'gzip;q=0.8, br;q=0.9'), b'brotli', 'br')
+        self.assertServed(self.get('app.js', '*'), b'brotli', 'br')
+        self.assertServed(self.get('app.js', 'br;q=0.1, *;q=0.5'), b'gzip', 'gzip')
+        self.assertServed(self.get('app.js'), b'plain')
+
+    def test_q_zero_refuses_an_encoding(self):
+        self.assertServed(self.get('app.js', 'br;q=0, gzip'), b'gzip', 'gzip')
+        self.assertServed(self.get('app.js', 'br;q=0, gzip;q=0'), b'plain')
+        self.assertServed(self.get('app.js', 'gzip, *;q=0'), b'gzip', 'gzip')
+
+    def test_etag_per_encoding(self):
+        etag = self.get('app.js', 'br')['ETag']
+        self.assertNotEqual(etag, self.get('app.js', 'gzip')['ETag'])
+        self.assertEqual(self.client.get('/static/app.js', headers={'Accept-Encoding': 'br', 'If-None-Match': etag}).status_code, 304)
+
+    def test_path_traversal_is_404(self):
+        for name in ['../secret.txt', '%2e%2e/secret.txt', '..%2fsecret.txt']:
+            response = self.get(name)
+            self.assertEqual(response.status_code, 404)
+            self.assertNotIn(b'secret', response.content)
+
+    def test_immutable_only_for_hashed_names(self):
+        self.assertEqual(self.get('app.0123456789ab.js')['Cache-Control'], IMMUTABLE_CACHE_CONTROL)
+        self.assertNotIn('immutable', self.get('app.js')['Cache-Control'])
+
+
+@override_settings(DATABASE_REPLICAS=['replica1'])
+class ReplicaRouterTests(SimpleTestCase):
+    #? the router only names databases, nothing is queried. Every case runs in a new, empty context:
+    #? the test thread's own context already saw writes (the test data)
+
+    def setUp(self):
+        self.router = routers.PrimaryReplicaRouter()
+
+    def run_in_context(self, function, *args):
+        return contextvars.Context().run(function, *args)
+
+    def read(self, model=Survey):
+        #* a read inside a @replica_reads view
+        return routers.replica_reads(lambda request: self.router.db_for_read(model))(None)
+
+    def test_reads_go_to_a_replica(self):
+        self.assertEqual(self.run_in_context(self.read), 'replica1')
+        #* outside @replica_reads views, and for sessions, the primary
+        self.assertEqual(self.run_in_context(self.router.db_for_read, Survey), 'default')
+        self.assertEqual(self.run_in_context(self.read, Session), 'default')
+
+    def test_primary_after_a_write(self):
+        def write_then_read():
+            self.assertEqual(self.router.db_for_write(Survey), 'default')
+            return self.read()
+        self.assertEqual(self.run_in_context(write_then_read), 'default')
+
+    def test_relations_across_databases(self):
+        survey, question = Survey(), Question()
+        survey._state.db, question._state.db = 'default', 'replica1'
+        self.assertTrue(self.router.allow_relation(survey, question))
+
+    def test_only_the_primary_is_migrated(self):
+        self.assertTrue(self.router.allow_migrate('default', 'survey'))
+        self.assertFalse(self.router.allow_migrate('replica1', 'survey'))
+
+    def request(self, view, **cookies):
+        request = RequestFactory().get('/')
+        request.COOKIES.update(cookies)
+        return self.run_in_context(ReplicaPinningMiddleware(view), request)
+
+    def test_pin_cookie(self):
+        reads = []
+
+        def write_view(request):
+            self.router.db_for_write(Survey)
+            return HttpResponse()
+
+        def read_view(request):
+            reads.append(self.read())
+            return HttpResponse()
+
+        response = self.request(write_view)
+        self.assertEqual(response.cookies[PIN_COOKIE].value, '1')
+        #* the browser sends the cookie back: still on the primary, without writing again
+        response = self.request(read_view, **{PIN_COOKIE: response.cookies[PIN_COOKIE].value})
+        self.assertNotIn(PIN_COOKIE, response.cookies)
+        #* it expired
+        self.request(read_view)
+        self.assertEqual(reads, ['default', 'replica1'])
+
+    def test_request_state_is_reset(self):
+        def write_view(request):
+            self.router.db_for_write(Survey)
+            return HttpResponse()
+
+        def run():
+            ReplicaPinningMiddleware(write_view)(RequestFactory().get('/'))
+            ReplicaPinningMiddleware(lambda request: HttpResponse())(RequestFactory().get('/', HTTP_COOKIE=f'{PIN_COOKIE}=1'))
+            return routers._wrote.get(), routers._pinned.get(), self.read()
+        #* the same context serves both requests, like a worker thread: nothing is left over after them
+        self.assertEqual(self.run_in_context(run), (False, False, 'replica1'))
+
+    @override_settings(DATABASE_REPLICAS=[])
+    def test_no_pin_cookie_without_replicas(self):
+        def write_view(request):
+            self.router.db_for_write(Survey)
+            return HttpResponse()
+        self.assertNotIn(PIN_COOKIE, self.request(write_view).cookies)
@@ -14,13 +14,20 @@ Including another URLconf
     1. Import the include() function: from django.urls import include, path
     2. Add a URL to urlpatterns:  path('blog/', include('blog.urls'))
 """
-from django.contrib import admin
+from django.apps import apps
 from django.urls import path, include
-from .views import home_view
+from .views import home_view, profile_list_view, profile_detail_view
 
 urlpatterns = [
     path('accounts/', include('accounts.urls')),
     path('survey/', include('survey.urls')),
+    path('api/', include('survey.api_urls')),
     path('', home_view, name='home'),
-    path('admin/', admin.site.urls),
+    path('profiles/', profile_list_view, name='profiles'),
+    path('profiles/<str:name>/', profile_detail_view, name='profile-detail'),
 ]
+
+#* the admin is optional: settings_production.py leaves it out unless DJSURVEY_ADMIN=1
+if apps.is_installed('django.contrib.admin'):
+    from django.contrib import admin
+    urlpatterns.append(path('admin/', admin.site.urls))
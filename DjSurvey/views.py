@@ -1,6 +1,59 @@
+from functools import wraps
+
 from django.shortcuts import render
-from django.http import HttpResponse
+from django.http import HttpResponse, FileResponse, Http404
+from django.conf import settings
+from django.contrib.auth.decorators import login_required
+
+from . import profiling
+
+
+def staff_member_required(view):
+    #? like admin's staff_member_required, without loading the admin (it may not be installed, see
+    #? settings_production.py). Signed in users who aren't staff get a 404, the pages don't exist for them.
+    @wraps(view)
+    @login_required
+    def wrapper(request, *args, **kwargs):
+        if not (request.user.is_active and request.user.is_staff):
+            raise Http404
+        return view(request, *args, **kwargs)
+    return wrapper
+
 
 def home_view(request):
     context = {}
-    return render(request, 'home-view.html', context=context)
\ No newline at end of file
+    return render(request, 'home-view.html', context=context)
+
+
+@staff_member_required
+def profile_list_view(request):
+    #? the stored request profiles + a profiling token for this staff member (see profiling.py)
+    context = {
+        'profiles': profiling.list_profiles(),
+        'token': profiling.make_token(request.user),
+        'token_param': profiling.TOKEN_PARAM,
+        'token_header': profiling.TOKEN_HEADER,
+        'token_hours': settings.PROFILING_TOKEN_MAX_AGE // 3600,
+        'sample_rate': settings.PROFILING_SAMPLE_RATE,
+    }
+    return render(request, 'profiling/list.html', context)
+
+
+@staff_member_required
+def profile_detail_view(request, name=None):
+    #* ?download=1 sends the raw pstats file (for snakeviz & co), otherwise its text report
+    path = profiling.profile_path(name)
+    if path is None:
+        raise Http404
+    if request.GET.get('download'):
+        return FileResponse(open(path, 'rb'), as_attachment=True, filename=name, content_type='application/octet-stream')
+    sort = request.GET.get('sort')
+    if sort not in profiling.SORT_KEYS:
+        sort = profiling.SORT_KEYS[0]
+    context = {
+        'name': name,
+        'report': profiling.profile_report(path, sort),
+        'sort': sort,
+        'sort_keys': profiling.SORT_KEYS,
+    }
+    return render(request, 'profiling/detail.html', context)
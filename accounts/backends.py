@@ -0,0 +1,17 @@
+from django.contrib.auth import get_user_model
+from django.contrib.auth.backends import ModelBackend
+
+
+class ProfileModelBackend(ModelBackend):
+    #? ------------------------------------------------------------------------
+    #? Same as Django's ModelBackend, but the user that AuthenticationMiddleware loads on every request
+    #? comes with its profile joined in (select_related), so request.user.profile costs no extra query.
+    #? Sessions created with ModelBackend's path keep working: it is still listed after this one (settings.py).
+    #? ------------------------------------------------------------------------
+    def get_user(self, user_id):
+        UserModel = get_user_model()
+        try:
+            user = UserModel._default_manager.select_related('profile').get(pk=user_id)
+        except UserModel.DoesNotExist:
+            return None
+        return user if self.user_can_authenticate(user) else None
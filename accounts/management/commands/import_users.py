@@ -0,0 +1,93 @@
+import csv
+from itertools import islice
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from accounts.models import UserProfile
+
+
+#? ------------------------------------------------------------------------
+#? Bulk user import.
+#? - CSV columns: username (required), email, first_name, last_name, bio, password (all optional)
+#? - Users and profiles are inserted with bulk_create, one batch at a time. bulk_create does not send
+#?   post_save, so accounts.signals.create_user_profile doesn't fire per user; profiles are created
+#?   here in a second bulk insert instead.
+#? - Usernames that already exist are skipped, so the same file can be re-run safely.
+#? ------------------------------------------------------------------------
+class Command(BaseCommand):
+    help = 'Bulk import users and their profiles from a CSV file.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('csv_path')
+        parser.add_argument('--batch-size', type=int, default=1000)
+        parser.add_argument(
+            '--password',
+            default=None,
+            help='Password for rows without a password column value. Without it those users get an unusable password.',
+        )
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        if batch_size < 1:
+            raise CommandError('--batch-size must be at least 1')
+
+        #* hashing is the slow part (PBKDF2), so the shared default password is hashed only once
+        default_hash = make_password(options['password'])
+
+        created = skipped = 0
+        try:
+            with open(options['csv_path'], newline='', encoding='utf-8') as f:
+                reader = csv.DictReader(f)
+                if not reader.fieldnames or 'username' not in reader.fieldnames:
+                    raise CommandError('The CSV file must have a "username" column')
+                while True:
+                    rows = list(islice(reader, batch_size))
+                    if not rows:
+                        break
+                    batch_created, batch_skipped = self.import_batch(rows, default_hash)
+                    created += batch_created
+                    skipped += batch_skipped
+                    self.stdout.write(f'{created} users imported...')
+        except OSError as exc:
+            raise CommandError(f'Could not read {options["csv_path"]}: {exc}')
+
+        self.stdout.write(self.style.SUCCESS(f'Imported {created} users ({skipped} skipped).'))
+
+    def import_batch(self, rows, default_hash):
+        User = get_user_model()
+        rows = {row['username'].strip(): row for row in rows if (row.get('username') or '').strip()}
+        existing = set(User.objects.filter(username__in=rows).values_list('username', flat=True))
+
+        users = []
+        for username, row in rows.items():
+            if username in existing:
+                continue
+            password = row.get('password')
+            users.append(User(
+                username=username,
+                email=row.get('email') or '',
+                first_name=row.get('first_name') or '',
+                last_name=row.get('last_name') or '',
+                password=make_password(password) if password else default_hash,
+            ))
+        if not users:
+            return 0, len(rows)
+
+        with transaction.atomic():
+            User.objects.bulk_create(users)
+            #* not every backend returns pks from bulk_create, so read them back in one query
+            ids = dict(User.objects.filter(username__in=[u.username for u in users]).values_list('username', 'id'))
+            UserProfile.objects.bulk_create([
+                UserProfile(
+                    user_id=ids[u.username],
+                    first_name=rows[u.username].get('first_name') or None,
+                    last_name=rows[u.username].get('last_name') or None,
+                    email=rows[u.username].get('email') or None,
+                    bio=rows[u.username].get('bio') or None,
+                )
+                for u in users
+            ])
+        return len(users), len(rows) - len(users)
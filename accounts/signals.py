@@ -6,6 +6,8 @@ from .models import UserProfile
 # we want to create a profile for each user that has been created
 User_Model = settings.AUTH_USER_MODEL
 @receiver(post_save, sender=User_Model) #receiver catches a signal (now, from a post_save that the user model sends everytime it saves an instance)
-def create_user_profile(sender, instance, created, **kwargs):
-    if created:
+def create_user_profile(sender, instance, created, raw=False, **kwargs):
+    # raw is True when loading fixtures (loaddata), those bring their own profiles
+    # bulk imports don't come through here at all, see accounts/management/commands/import_users.py
+    if created and not raw:
         UserProfile.objects.create(user=instance)
\ No newline at end of file
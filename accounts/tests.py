@@ -1,3 +1,90 @@
-from django.test import TestCase
+import os
+import shutil
+import tempfile
+from io import StringIO
 
-# Create your tests here.
+from django.contrib.auth import get_user, get_user_model
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.test import RequestFactory, TestCase
+
+from .models import UserProfile
+
+
+class ProfileModelBackendTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = get_user_model().objects.create_user('user', password='password')
+        cls.user.profile.bio = 'Hello'
+        cls.user.profile.save()
+
+    def test_request_user_comes_with_its_profile(self):
+        #* what AuthenticationMiddleware does on every request, once the session is loaded
+        self.client.force_login(self.user)
+        request = RequestFactory().get('/')
+        request.session = self.client.session
+        self.assertIn('_auth_user_id', request.session)
+        with self.assertNumQueries(1):
+            user = get_user(request)
+            self.assertEqual(user.profile.bio, 'Hello')
+        self.assertEqual(user, self.user)
+
+    def test_inactive_user_is_not_loaded(self):
+        self.client.force_login(self.user)
+        self.user.is_active = False
+        self.user.save()
+        request = RequestFactory().get('/')
+        request.session = self.client.session
+        self.assertFalse(get_user(request).is_authenticated)
+
+
+class ImportUsersTests(TestCase):
+
+    def setUp(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        self.path = os.path.join(directory, 'users.csv')
+
+    def import_users(self, lines, *args):
+        with open(self.path, 'w', encoding='utf-8') as f:
+            f.write('\n'.join(lines) + '\n')
+        stdout = StringIO()
+        call_command('import_users', self.path, *args, stdout=stdout)
+        return stdout.getvalue()
+
+    def test_users_and_profiles_are_created_in_bulk(self):
+        lines = ['username,email,first_name,bio,password'] + [
+            f'user{i},user{i}@example.com,User {i},Bio {i},' for i in range(5)
+        ] + ['custom,,,,secret']
+        #* 2 batches of 3: per batch, look up existing usernames + the users insert + reading back
+        #* their ids + the profiles insert, with the savepoint around them
+        with self.assertNumQueries(2 * 6):
+            output = self.import_users(lines, '--batch-size', '3', '--password', 'shared')
+        self.assertIn('Imported 6 users (0 skipped).', output)
+
+        User = get_user_model()
+        user = User.objects.select_related('profile').get(username='user3')
+        self.assertEqual((user.email, user.first_name), ('user3@example.com', 'User 3'))
+        self.assertEqual((user.profile.email, user.profile.first_name, user.profile.bio), ('user3@example.com', 'User 3', 'Bio 3'))
+        self.assertTrue(user.check_password('shared'))
+        self.assertTrue(User.objects.get(username='custom').check_password('secret'))
+        self.assertEqual(UserProfile.objects.count(), 6)
+
+    def test_existing_usernames_are_skipped(self):
+        existing = get_user_model().objects.create_user('taken', email='old@example.com')
+        output = self.import_users(['username,email', 'taken,new@example.com', 'fresh,fresh@example.com'])
+        self.assertIn('Imported 1 users (1 skipped).', output)
+        existing.refresh_from_db()
+        self.assertEqual(existing.email, 'old@example.com')
+        self.assertEqual(UserProfile.objects.filter(user=existing).count(), 1)
+        self.assertFalse(get_user_model().objects.get(username='fresh').has_usable_password())
+
+        #* re-running the same file imports nothing
+        output = self.import_users(['username,email', 'taken,new@example.com', 'fresh,fresh@example.com'])
+        self.assertIn('Imported 0 users (2 skipped).', output)
+        self.assertEqual(get_user_model().objects.count(), 2)
+
+    def test_username_column_is_required(self):
+        with self.assertRaisesMessage(CommandError, 'username'):
+            self.import_users(['email', 'someone@example.com'])
@@ -1,10 +1,9 @@
-from django.shortcuts import render, redirect, get_object_or_404
+from django.shortcuts import render, redirect
 from django.contrib.auth.forms import UserCreationForm, AuthenticationForm
 from django.contrib.auth import login, authenticate, logout
 from django.urls import reverse
 from django.contrib import messages
 from .forms import profile_completion_form
-from .models import UserProfile
 
 
 
@@ -55,16 +54,14 @@ def profile_view(request):
             'user': request.user
         }
     else:
-        login_url = reverse('accounts:login') + '?next=' + reverse('account:profile')
+        login_url = reverse('accounts:login') + '?next=' + reverse('accounts:profile')
         return redirect(login_url)
     
     return render(request, 'accounts/profile.html', context)
 
 def profile_completion_view(request):
-    try:
-        profile_obj = get_object_or_404(UserProfile, user = request.user)
-    except:
-        profile_obj = None
+    # the profile already came with request.user (accounts.backends.ProfileModelBackend), no extra query
+    profile_obj = getattr(request.user, 'profile', None)
     form = profile_completion_form(request.POST or None, instance=profile_obj)
     if form.is_valid():
         profile = form.save(commit=False)
@@ -1,23 +1,162 @@
 from django.contrib import admin
+from django.core.paginator import Paginator
+from django.db.models import Prefetch
+from django.urls import reverse
+from django.utils.functional import cached_property
+from django.utils.html import format_html
 from .models import *
 import nested_admin
+from nested_admin.formsets import NestedInlineFormSet
 # Register your models here.
 
+#? ------------------------------------------------------------------------
+#? Admin tuned for big surveys:
+#? - FK fields use raw_id_fields so change forms never render a <select> with every user/question/choice.
+#? - changelists join their FKs (list_select_related), so __str__ doesn't lazy-load per row.
+#? - the nested Survey editor prefetches choices for all questions at once, and above
+#?   INLINE_QUESTION_LIMIT questions it links to the (paginated) Question changelist instead.
+#? ------------------------------------------------------------------------
+
+INLINE_QUESTION_LIMIT = 50
+
+
+class CappedCountPaginator(Paginator):
+    #? COUNT(*) over millions of answers is a full scan on every changelist page.
+    #? Count at most `count_limit` rows instead, pages past that are simply not offered.
+    count_limit = 100_000
+
+    @cached_property
+    def count(self):
+        return self.object_list[:self.count_limit].count()
+
+
+class PrefetchedChoiceFormSet(NestedInlineFormSet):
+    #? On GET, reuse the choices QuestionInline.get_queryset prefetched for every question,
+    #? instead of one query per question. POSTs keep nested_admin's own lookup.
+    def get_queryset(self):
+        prefetched = getattr(self.instance, '_prefetched_objects_cache', {})
+        if not self.data and 'choices' in prefetched:
+            return prefetched['choices']
+        return super().get_queryset()
+
+
 class ChoiceInline(nested_admin.NestedTabularInline):
     model = Choice
     extra = 1
+    formset = PrefetchedChoiceFormSet
+
+class DisplayConditionInline(nested_admin.NestedTabularInline):
+    #* saving one recompiles Survey.logic (signals.py)
+    model = DisplayCondition
+    extra = 0
+    raw_id_fields = ['choice']
+    verbose_name = 'display condition (show this question only if one of these choices was picked)'
 
 class QuestionInline(nested_admin.NestedStackedInline):
     model = Question
     extra = 0
     inlines = [ChoiceInline]
 
+    def get_queryset(self, request):
+        return super().get_queryset(request).prefetch_related(
+            Prefetch('choices', queryset=Choice.objects.order_by('id'))
+        )
+
 class SurveyAdmin(nested_admin.NestedModelAdmin):
-    list_display = ['title', 'user']
-    readonly_fields = ['created', 'slug']
+    list_display = ['title', 'user', 'created', 'status']
+    list_select_related = ['user']
+    list_filter = ['status']
+    search_fields = ['title', 'slug']
+    raw_id_fields = ['user']
+    readonly_fields = ['created', 'slug', 'closed_at', 'archived_at', 'questions_link']
     inlines = [QuestionInline]
+    show_full_result_count = False
+
+    def get_inlines(self, request, obj):
+        #* past the limit, the nested editor would render hundreds of forms; questions_link is used instead
+        if obj is not None and obj.questions.count() > INLINE_QUESTION_LIMIT:
+            return []
+        return super().get_inlines(request, obj)
+
+    @admin.display(description='Questions')
+    def questions_link(self, obj):
+        if obj.pk is None:
+            return '-'
+        url = reverse('admin:survey_question_changelist') + f'?survey__id__exact={obj.pk}'
+        return format_html('<a href="{}">Browse the questions of this survey</a>', url)
+
+class QuestionAdmin(nested_admin.NestedModelAdmin):
+    list_display = ['title', 'question_type', 'survey']
+    list_select_related = ['survey']
+    list_filter = ['question_type']
+    search_fields = ['title']
+    raw_id_fields = ['survey']
+    inlines = [ChoiceInline, DisplayConditionInline]
+    show_full_result_count = False
+
+    def get_queryset(self, request):
+        return super().get_queryset(request).prefetch_related(
+            Prefetch('choices', queryset=Choice.objects.order_by('id'))
+        )
+
+class ChoiceAdmin(admin.ModelAdmin):
+    list_display = ['title', 'question']
+    list_select_related = ['question']
+    search_fields = ['title']
+    raw_id_fields = ['question']
+    show_full_result_count = False
+
+class SubmissionAdmin(admin.ModelAdmin):
+    list_display = ['__str__', 'status', 'submitted_at']
+    list_select_related = ['user', 'survey']
+    list_filter = ['status']
+    raw_id_fields = ['user', 'survey']
+    ordering = ['-id']
+    list_per_page = 50
+    paginator = CappedCountPaginator
+    show_full_result_count = False
+
+class AnswerAdmin(admin.ModelAdmin):
+    #* __str__ reads question.title, user and choice.title: all three are joined in the page query
+    list_display = ['__str__', 'question', 'user', 'choice']
+    list_select_related = ['question', 'user', 'choice']
+    raw_id_fields = ['submission', 'user', 'question', 'choice']
+    ordering = ['-id']
+    list_per_page = 50
+    paginator = CappedCountPaginator
+    show_full_result_count = False
+
+class ArchivedAnswerAdmin(admin.ModelAdmin):
+    #* read-only: rows only get here through `manage.py archive_answers`
+    list_display = ['id', 'survey_id', 'question_id', 'user_id', 'choice_id', 'archived_at']
+    ordering = ['-id']
+    list_per_page = 50
+    paginator = CappedCountPaginator
+    show_full_result_count = False
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+class SurveyReportAdmin(admin.ModelAdmin):
+    #* read-only: rows are written by `manage.py generate_reports`
+    list_display = ['survey', 'generated_at', 'watermark']
+    list_select_related = ['survey']
+    ordering = ['-generated_at']
+    list_per_page = 50
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
 
 admin.site.register(Survey, SurveyAdmin)
-admin.site.register(Question)
-admin.site.register(Choice)
-admin.site.register(Answer)
+admin.site.register(Question, QuestionAdmin)
+admin.site.register(Choice, ChoiceAdmin)
+admin.site.register(Submission, SubmissionAdmin)
+admin.site.register(Answer, AnswerAdmin)
+admin.site.register(ArchivedAnswer, ArchivedAnswerAdmin)
+admin.site.register(SurveyReport, SurveyReportAdmin)
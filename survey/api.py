@@ -0,0 +1,113 @@
+import json
+
+from django.core.exceptions import ValidationError
+from django.core.serializers.json import DjangoJSONEncoder
+
+from .models import Survey, Question, Choice
+
+try:
+    import orjson
+except ImportError:  #* optional dependency, the stdlib json is used without it
+    orjson = None
+
+
+#? ------------------------------------------------------------------------
+#? Read-only JSON API for the structure of a survey (survey_api_view), for dashboards and embeds.
+#? - Sparse fieldsets: ?fields=title,slug  ?fields[question]=id,title  ?fields[choice]=title
+#? - Related data is opt-in: ?include=questions  or  ?include=questions.choices
+#? - Built from values() queries that read only the requested columns, no model instances and no
+#?   templates: at most 3 queries (survey, its questions, all their choices) whatever the size.
+#? - Serialized with orjson when it is installed.
+#? ------------------------------------------------------------------------
+
+#* public name -> column (or lookup) read with values()
+SURVEY_FIELDS = {
+    'slug': 'slug',
+    'title': 'title',
+    'description': 'description',
+    'author': 'user__username',
+    'status': 'status',
+    'created': 'created',
+    'updated': 'updated',
+    'logic': 'logic',
+}
+QUESTION_FIELDS = {
+    'id': 'id',
+    'title': 'title',
+    'type': 'question_type',
+}
+CHOICE_FIELDS = {
+    'id': 'id',
+    'title': 'title',
+}
+INCLUDES = ('questions', 'questions.choices')
+
+
+def _fieldset(requested, available, kind):
+    if requested is None:
+        return list(available)
+    names = [name for name in requested.split(',') if name]
+    unknown = set(names) - set(available)
+    if unknown:
+        raise ValidationError(
+            f'Unknown {kind} fields: {", ".join(sorted(unknown))}. Available: {", ".join(available)}.'
+        )
+    return names
+
+
+def parse_params(params):
+    #? query parameters -> (survey fields, question fields, choice fields, includes). ValidationError if invalid
+    includes = {name for name in params.get('include', '').split(',') if name}
+    unknown = includes - set(INCLUDES)
+    if unknown:
+        raise ValidationError(f'Unknown include: {", ".join(sorted(unknown))}. Available: {", ".join(INCLUDES)}.')
+    if 'questions.choices' in includes:
+        includes.add('questions')
+    return (
+        _fieldset(params.get('fields'), SURVEY_FIELDS, 'survey'),
+        _fieldset(params.get('fields[question]'), QUESTION_FIELDS, 'question'),
+        _fieldset(params.get('fields[choice]'), CHOICE_FIELDS, 'choice'),
+        includes,
+    )
+
+
+def _rows(queryset, fields, mapping, extra=()):
+    #* values() of the mapped columns, renamed to the public names
+    columns = [mapping[name] for name in fields]
+    for row in queryset.values(*columns, *extra):
+        yield {name: row[mapping[name]] for name in fields}, row
+
+
+def survey_document(slug, params):
+    #? returns the API document of the survey, or None if it doesn't exist (or is being deleted by its owner)
+    survey_fields, question_fields, choice_fields, includes = parse_params(params)
+    survey = next(_rows(Survey.objects.filter(slug=slug).exclude(status='deleting'), survey_fields, SURVEY_FIELDS, extra=('id',)), None)
+    if survey is None:
+        return None
+    document, survey_row = survey
+
+    if 'questions' in includes:
+        questions = []
+        by_id = {}
+        for question, row in _rows(
+            Question.objects.filter(survey_id=survey_row['id']).order_by('id'),
+            question_fields, QUESTION_FIELDS, extra=('id',),
+        ):
+            questions.append(question)
+            by_id[row['id']] = question
+        if 'questions.choices' in includes:
+            for question in questions:
+                question['choices'] = []
+            for choice, row in _rows(
+                Choice.objects.filter(question__survey_id=survey_row['id']).order_by('id'),
+                choice_fields, CHOICE_FIELDS, extra=('question_id',),
+            ):
+                by_id[row['question_id']]['choices'].append(choice)
+        document['questions'] = questions
+    return document
+
+
+def dumps(document):
+    if orjson is not None:
+        return orjson.dumps(document)
+    return json.dumps(document, ensure_ascii=False, separators=(',', ':'), cls=DjangoJSONEncoder).encode('utf-8')
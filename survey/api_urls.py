@@ -0,0 +1,9 @@
+from django.urls import path
+from .views import survey_api_view
+
+
+#* read-only JSON API (see api.py), mounted under /api/
+app_name = 'api'
+urlpatterns = [
+    path("survey/<slug:slug>/", survey_api_view, name="survey"),
+]
@@ -4,3 +4,6 @@ from django.apps import AppConfig
 class SurveyConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'survey'
+
+    def ready(self):
+        import survey.signals  # keeps Survey.updated / Question.updated current
@@ -0,0 +1,88 @@
+from django.core.exceptions import ValidationError
+from django.db import transaction
+from django.utils import timezone
+
+from .models import Survey, Answer, ArchivedAnswer, SurveyFinalResults
+from .results import answer_counts
+from .deletion import delete_rows
+
+
+#? ------------------------------------------------------------------------
+#? Survey lifecycle: open -> closed -> (answers) archived.
+#? - Closed surveys take no more answers (survey_response_view checks it).
+#? - archive_survey moves the answers of a closed survey from Answer into ArchivedAnswer, in batches of
+#?   `batch_size` rows, each batch in its own short transaction: the hot Answer table (and its indexes)
+#?   only holds the answers of surveys that still change, and a big survey never locks it for long.
+#? - Before the first row moves, the final counts are stored in SurveyFinalResults: the results page
+#?   of an archived survey reads that one row instead of the archive (see results.survey_counts).
+#? - Interrupted runs just start again: the counts are kept, rows already moved are gone from Answer,
+#?   and ArchivedAnswer keeps the original ids so a row can't be archived twice.
+#? ------------------------------------------------------------------------
+
+ARCHIVE_BATCH_SIZE = 5000
+
+
+def close_survey(survey):
+    if not survey.is_open:
+        return survey
+    survey.status = 'closed'
+    survey.closed_at = timezone.now()
+    survey.save(update_fields=['status', 'closed_at', 'updated'])
+    return survey
+
+
+def reopen_survey(survey):
+    if survey.is_open:
+        return survey
+    if survey.status == 'deleting':
+        raise ValidationError('This survey is being deleted.')
+    #! the counts of an archived survey are frozen and its answers are out of the Answer table
+    if survey.archived_at or SurveyFinalResults.objects.filter(survey=survey).exists():
+        raise ValidationError('The answers of this survey were archived, it cannot be reopened.')
+    survey.status = 'open'
+    survey.closed_at = None
+    survey.save(update_fields=['status', 'closed_at', 'updated'])
+    return survey
+
+
+def archive_survey(survey, batch_size=ARCHIVE_BATCH_SIZE, progress=None):
+    #? Moves all answers of a closed survey to the archive, returns how many rows were moved.
+    #? progress(moved) is called after each batch.
+    if survey.is_open:
+        raise ValidationError(f'Survey "{survey}" is still open, close it before archiving its answers.')
+    if survey.status == 'deleting':
+        raise ValidationError(f'Survey "{survey}" is being deleted.')
+    if survey.archived_at:
+        return 0
+
+    #* computed from the complete Answer table, before any row leaves it
+    SurveyFinalResults.objects.get_or_create(survey=survey, defaults={'counts': answer_counts(survey.id)})
+
+    answers = (
+        Answer.objects.filter(question__survey_id=survey.id)
+        .order_by('id')
+        .values_list('id', 'question_id', 'user_id', 'submission_id', 'choice_id', 'text_answer')
+    )
+    moved = 0
+    while True:
+        with transaction.atomic():
+            rows = list(answers[:batch_size])
+            if not rows:
+                break
+            ArchivedAnswer.objects.bulk_create([
+                ArchivedAnswer(
+                    id=pk, survey_id=survey.id, question_id=question_id, user_id=user_id,
+                    submission_id=submission_id, choice_id=choice_id, text_answer=text_answer,
+                )
+                for pk, question_id, user_id, submission_id, choice_id, text_answer in rows
+            ], ignore_conflicts=True)
+            delete_rows(Answer, [row[0] for row in rows])
+        moved += len(rows)
+        if progress:
+            progress(moved)
+        if len(rows) < batch_size:
+            break
+
+    survey.archived_at = timezone.now()
+    Survey.objects.filter(pk=survey.pk).update(archived_at=survey.archived_at)
+    return moved
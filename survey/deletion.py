@@ -0,0 +1,90 @@
+from functools import partial
+
+from django.db import connection, transaction
+
+from .live import publish_survey_changed
+from .models import (
+    Survey, Question, Choice, Answer, Submission, ArchivedAnswer, SurveyFinalResults, DisplayCondition, SurveyReport,
+    SurveySketch, QuestionSketch, AnswerSample,
+)
+
+
+#? ------------------------------------------------------------------------
+#? Deleting big surveys.
+#? survey.delete() makes Django's collector load every question, choice and answer of the survey
+#? (to cascade and send post_delete for each), for a survey with a million answers that's the whole
+#? table in memory and one huge transaction. delete_survey removes the children with set-based
+#? DELETEs instead, children before parents (SURVEY_DELETE_ORDER), `batch_size` rows per statement,
+#? every batch in its own transaction: memory stays flat and writers are never locked out for long.
+#? - The survey is marked 'deleting' first: it takes no answers (it isn't open), drops out of the
+#?   listings and can't be reopened or archived while it is being emptied.
+#? - Resumable: if a run stops partway (error, timeout, killed worker), the survey stays 'deleting'
+#?   with what is left of its rows. Calling delete_survey again (the delete page, or
+#?   `manage.py delete_survey <slug>`) picks up where it stopped, finished batches are already gone.
+#? - The survey row itself goes last through the ORM: by then it has no children left, and anything
+#?   missing from SURVEY_DELETE_ORDER is still cascaded correctly by the collector (just slowly).
+#? - progress(model, deleted) is called after each batch, deleted = rows of that model so far.
+#? ------------------------------------------------------------------------
+
+DELETE_BATCH_SIZE = 5000
+
+#* (model, lookup from the model to the survey id), children first
+SURVEY_DELETE_ORDER = [
+    (Answer, 'question__survey_id'),
+    (Submission, 'survey_id'),
+    (ArchivedAnswer, 'survey_id'),
+    (DisplayCondition, 'question__survey_id'),
+    (AnswerSample, 'question__survey_id'),
+    (QuestionSketch, 'question__survey_id'),
+    (Choice, 'question__survey_id'),
+    (Question, 'survey_id'),
+    (SurveyFinalResults, 'survey_id'),
+    (SurveyReport, 'survey_id'),
+    (SurveySketch, 'survey_id'),
+]
+
+
+def delete_survey(survey, batch_size=DELETE_BATCH_SIZE, progress=None):
+    #? Returns {model label: rows deleted}
+    Survey.objects.filter(pk=survey.pk).update(status='deleting')
+
+    deleted = {}
+    for model, lookup in SURVEY_DELETE_ORDER:
+        pks = model.objects.filter(**{lookup: survey.pk}).order_by().values_list('pk', flat=True)
+        count = 0
+        while True:
+            with transaction.atomic():
+                batch = list(pks[:batch_size])
+                if not batch:
+                    break
+                delete_rows(model, batch)
+            count += len(batch)
+            if progress:
+                progress(model, count)
+            if len(batch) < batch_size:
+                break
+        deleted[model._meta.label] = count
+
+    survey.delete()
+    deleted[Survey._meta.label] = 1
+    return deleted
+
+
+def delete_submission(submission):
+    #? One respondent's response: its answers (by the submission index), then the header.
+    with transaction.atomic():
+        answer_ids = list(submission.answers.values_list('pk', flat=True))
+        if answer_ids:
+            delete_rows(Answer, answer_ids)
+        delete_rows(Submission, [submission.pk])
+        transaction.on_commit(partial(publish_survey_changed, submission.survey_id))
+
+
+def delete_rows(model, pks):
+    #* plain DELETE ... WHERE id IN (...): no collector loading the rows (and their cascades) into
+    #* memory first, and no pre/post_delete signal sent per row
+    table = connection.ops.quote_name(model._meta.db_table)
+    column = connection.ops.quote_name(model._meta.pk.column)
+    placeholders = ', '.join(['%s'] * len(pks))
+    with connection.cursor() as cursor:
+        cursor.execute(f'DELETE FROM {table} WHERE {column} IN ({placeholders})', pks)
@@ -1,4 +1,6 @@
 from django import forms
+from django.conf import settings
+from django.template.defaultfilters import filesizeformat
 from django.forms import inlineformset_factory, BaseInlineFormSet
 from .models import Survey, Question, Choice, Answer
 from django.core.exceptions import ValidationError
@@ -34,6 +36,27 @@ class SurveyCreationForm(forms.ModelForm):
             "class": "form-control"
         })
 
+class SurveyImportForm(forms.Form):
+    #? upload of a file produced by the export endpoint / export_survey command (see transfer.py)
+    file = forms.FileField(label='Survey File')
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.fields['file'].widget.attrs.update({
+            "accept": ".json,.msgpack",
+            "class": "form-control"
+        })
+
+    def clean_file(self):
+        #* checked before the view reads the upload into memory
+        upload = self.cleaned_data['file']
+        if upload.size > settings.SURVEY_IMPORT_MAX_SIZE:
+            raise ValidationError(
+                f'The file is too large ({filesizeformat(upload.size)}), '
+                f'at most {filesizeformat(settings.SURVEY_IMPORT_MAX_SIZE)} can be imported.'
+            )
+        return upload
+
 class QuestionForm(forms.ModelForm):
     class Meta:
         model= Question
@@ -207,4 +230,49 @@ ChoiceFormSetUpdate = inlineformset_factory(
     formset=BaseChoiceFormset,
     can_delete=True, 
     can_order=False, 
-    extra=0)
\ No newline at end of file
+    extra=0)
+
+
+#? ------------------------------------------------------------------------
+#? AnswerForm
+#? - One form per question on the response page, prefix "answer-<question id>" keeps the names unique.
+#? - Choices come from the question's prefetched choices (a plain ChoiceField): a ModelChoiceField
+#?   would run its own query per question for rendering and again for validation.
+#? ------------------------------------------------------------------------
+class AnswerForm(forms.Form):
+
+    def __init__(self, *args, question=None, **kwargs):
+        kwargs.setdefault('prefix', f'answer-{question.id}')
+        super().__init__(*args, **kwargs)
+        self.question = question
+
+        if question.question_type == 'multiple_choice':
+            self.choices_by_id = {choice.id: choice for choice in question.choices.all()}
+            self.fields['choice'] = forms.TypedChoiceField(
+                choices=[(choice.id, choice.title) for choice in self.choices_by_id.values()],
+                coerce=int,
+                widget=forms.RadioSelect,
+            )
+        else:
+            self.fields['text_answer'] = forms.CharField(widget=forms.Textarea(attrs={
+                "rows": "2",
+                "class": "form-control",
+            }))
+        for field in self.fields.values():
+            field.label = question.title
+
+    def picked_choice(self):
+        #* the choice id picked in this form right now (posted data, else initial), without validating it
+        if self.question.question_type != 'multiple_choice':
+            return None
+        try:
+            value = int(self['choice'].value())
+        except (TypeError, ValueError):
+            return None
+        return value if value in self.choices_by_id else None
+
+    def answer_values(self):
+        #* the column values of the Answer row for this form (call after is_valid())
+        if self.question.question_type == 'multiple_choice':
+            return {'choice': self.choices_by_id[self.cleaned_data['choice']], 'text_answer': None}
+        return {'choice': None, 'text_answer': self.cleaned_data['text_answer'].strip()}
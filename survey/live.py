@@ -0,0 +1,87 @@
+import asyncio
+import threading
+from collections import defaultdict
+
+from django.conf import settings
+from django.utils.module_loading import import_string
+
+
+#? ------------------------------------------------------------------------
+#? Pub/sub used to push live results to connected owners (survey_live_results_view, SSE).
+#? - A message on channel "survey-<id>" means "answers of this survey changed"; subscribers re-read the
+#?   counts themselves, so messages carry no payload and any number of them can be coalesced into one.
+#? - The broker class comes from settings.SURVEY_LIVE_BROKER, so a cross-process backend (redis, postgres
+#?   LISTEN/NOTIFY...) can replace the in-process default. A broker needs:
+#?     subscribe(channel) -> subscription with `await subscription.wait()`
+#?     unsubscribe(channel, subscription)
+#?     publish(channel)   (callable from any thread, sync or async code)
+#? ------------------------------------------------------------------------
+
+DEFAULT_BROKER = 'survey.live.InProcessBroker'
+
+
+def survey_channel(survey_id):
+    return f'survey-{survey_id}'
+
+
+class Subscription:
+    #? A "dirty" flag bound to the subscriber's event loop. The queue holds at most one pending
+    #? notification: a burst of 1000 answers wakes the subscriber once, not 1000 times.
+    def __init__(self):
+        self.loop = asyncio.get_running_loop()
+        self.queue = asyncio.Queue(maxsize=1)
+
+    def notify(self):
+        #* runs on the subscriber's loop (see InProcessBroker.publish)
+        if self.queue.empty():
+            self.queue.put_nowait(None)
+
+    async def wait(self):
+        await self.queue.get()
+
+
+class InProcessBroker:
+    #? Fan-out inside one process: fine for a single ASGI worker and for local development.
+    #? With several workers, answers saved in one process are not seen by streams in another;
+    #? that's what a shared backend in SURVEY_LIVE_BROKER is for.
+    def __init__(self):
+        self._subscribers = defaultdict(set)
+        self._lock = threading.Lock()
+
+    def subscribe(self, channel):
+        subscription = Subscription()
+        with self._lock:
+            self._subscribers[channel].add(subscription)
+        return subscription
+
+    def unsubscribe(self, channel, subscription):
+        with self._lock:
+            self._subscribers[channel].discard(subscription)
+            if not self._subscribers[channel]:
+                del self._subscribers[channel]
+
+    def publish(self, channel):
+        with self._lock:
+            subscriptions = list(self._subscribers.get(channel, ()))
+        for subscription in subscriptions:
+            try:
+                subscription.loop.call_soon_threadsafe(subscription.notify)
+            except RuntimeError:  #! the subscriber's loop is already closed
+                self.unsubscribe(channel, subscription)
+
+
+_broker = None
+_broker_lock = threading.Lock()
+
+
+def get_broker():
+    global _broker
+    if _broker is None:
+        with _broker_lock:
+            if _broker is None:
+                _broker = import_string(getattr(settings, 'SURVEY_LIVE_BROKER', DEFAULT_BROKER))()
+    return _broker
+
+
+def publish_survey_changed(survey_id):
+    get_broker().publish(survey_channel(survey_id))
@@ -0,0 +1,58 @@
+from django.utils import timezone
+
+from .models import Survey, DisplayCondition
+
+
+#? ------------------------------------------------------------------------
+#? Skip logic (DisplayCondition), compiled into Survey.logic:
+#?   {"version": 1,
+#?    "shown_if": {"<question id>": [choice ids]},   questions with conditions -> choices that show them
+#?    "owner":    {"<choice id>": question id}}      the question of every choice used in a condition
+#? - Compiled when conditions change (signals.py), so evaluating it needs no query: the rules come with
+#?   the survey row the page loads anyway.
+#? - Conditions only point to earlier questions (DisplayCondition.clean), so ONE pass in question
+#?   order settles everything, and the picks made in a hidden question don't count.
+#?   Questions without conditions cost a dict lookup, each rule is looked at once.
+#? - The same document is evaluated in the browser (response page, offline field mode).
+#? ------------------------------------------------------------------------
+
+LOGIC_VERSION = 1
+
+
+def compile_logic(conditions):
+    #? conditions: iterable of (question_id, choice_id, choice's question_id)
+    shown_if, owner = {}, {}
+    for question_id, choice_id, choice_question_id in conditions:
+        shown_if.setdefault(str(question_id), []).append(choice_id)
+        owner[str(choice_id)] = choice_question_id
+    if not shown_if:
+        return {}
+    return {'version': LOGIC_VERSION, 'shown_if': shown_if, 'owner': owner}
+
+
+def compile_survey_logic(survey_id):
+    #* one query for the conditions, one UPDATE; bumps Survey.updated (the rules are part of what we render)
+    conditions = (
+        DisplayCondition.objects.filter(question__survey_id=survey_id)
+        .order_by('question_id', 'choice_id')
+        .values_list('question_id', 'choice_id', 'choice__question_id')
+    )
+    logic = compile_logic(conditions)
+    Survey.objects.filter(pk=survey_id).update(logic=logic, updated=timezone.now())
+    return logic
+
+
+def visible_questions(logic, question_ids, selected):
+    #? question_ids: the survey's questions in order. selected: the picked choice ids (any iterable).
+    #? Returns the set of question ids to show.
+    shown_if = (logic or {}).get('shown_if')
+    if not shown_if:
+        return set(question_ids)
+    owner = logic['owner']
+    selected = set(selected)
+    visible = set()
+    for question_id in question_ids:
+        choices = shown_if.get(str(question_id))
+        if choices is None or any(c in selected and owner[str(c)] in visible for c in choices):
+            visible.add(question_id)
+    return visible
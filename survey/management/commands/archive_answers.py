@@ -0,0 +1,38 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from survey.archive import ARCHIVE_BATCH_SIZE, archive_survey
+from survey.models import Survey
+
+
+class Command(BaseCommand):
+    help = 'Move the answers of closed surveys out of the Answer table, in batches (see survey/archive.py).'
+    requires_system_checks = []
+
+    def add_arguments(self, parser):
+        parser.add_argument('slugs', nargs='*', help='Surveys to archive. Defaults to every closed survey not archived yet.')
+        parser.add_argument('--batch-size', type=int, default=ARCHIVE_BATCH_SIZE,
+                            help=f'Answers moved per transaction (default {ARCHIVE_BATCH_SIZE}).')
+        parser.add_argument('--closed-for', type=int, default=0, metavar='DAYS',
+                            help='Only archive surveys closed at least DAYS days ago.')
+
+    def handle(self, *args, **options):
+        if options['batch_size'] < 1:
+            raise CommandError('--batch-size must be at least 1')
+
+        surveys = Survey.objects.filter(status='closed', archived_at__isnull=True).order_by('closed_at', 'id')
+        if options['slugs']:
+            surveys = surveys.filter(slug__in=options['slugs'])
+        if options['closed_for']:
+            surveys = surveys.filter(closed_at__lte=timezone.now() - timedelta(days=options['closed_for']))
+
+        total = 0
+        for survey in surveys:
+            self.stdout.write(f'{survey.slug}: ', ending='')
+            progress = lambda moved: self.stdout.write(f'{moved}.. ', ending='')
+            moved = archive_survey(survey, batch_size=options['batch_size'], progress=progress)
+            self.stdout.write(self.style.SUCCESS(f'{moved} answers archived'))
+            total += moved
+        self.stdout.write(self.style.SUCCESS(f'Done, {total} answers archived.'))
@@ -0,0 +1,60 @@
+import time
+from uuid import uuid4
+
+from django.conf import settings
+from django.contrib.auth.models import AnonymousUser
+from django.core.management.base import BaseCommand
+from django.http import HttpResponse
+from django.test import RequestFactory, override_settings
+
+from survey.ratelimit import TokenBucket, client_key, ratelimit
+
+
+class Command(BaseCommand):
+    help = (
+        'Benchmark the per-request overhead of the token bucket rate limiter against the configured '
+        'cache backend (settings.CACHES["default"]).'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--iterations', type=int, default=20000)
+        parser.add_argument('--clients', type=int, default=500, help='Distinct buckets to spread requests over.')
+
+    def handle(self, *args, **options):
+        iterations = options['iterations']
+        clients = [f'ip:10.0.{n // 256}.{n % 256}' for n in range(options['clients'])]
+        #* a scope of its own, and a bucket big enough to never deny: we measure the cost, not the limit
+        scope = f'bench-{uuid4().hex[:8]}'
+        bucket = TokenBucket(scope, capacity=10**9, rate=10**9)
+
+        self.stdout.write(f'cache backend: {settings.CACHES["default"]["BACKEND"]}')
+        self.stdout.write(f'{iterations} iterations over {len(clients)} clients\n')
+
+        self.report('bucket.consume()', iterations, lambda i: bucket.consume(clients[i % len(clients)]))
+
+        factory = RequestFactory()
+        requests = []
+        for n in range(len(clients)):
+            request = factory.post('/survey/x/response/', REMOTE_ADDR=clients[n].split(':', 1)[1])
+            request.user = AnonymousUser()
+            requests.append(request)
+        self.report('client_key()', iterations, lambda i: client_key(requests[i % len(requests)]))
+
+        def noop_view(request):
+            return HttpResponse('')
+
+        with override_settings(SURVEY_RATE_LIMITS={scope: '1000000000/s'}):
+            limited_view = ratelimit(scope)(noop_view)
+            baseline = self.report('view without @ratelimit', iterations, lambda i: noop_view(requests[i % len(requests)]))
+            limited = self.report('view with @ratelimit', iterations, lambda i: limited_view(requests[i % len(requests)]))
+        self.stdout.write(self.style.SUCCESS(f'\noverhead per request: {limited - baseline:.1f} us'))
+
+    def report(self, label, iterations, call):
+        for i in range(min(1000, iterations)):  #* warm up
+            call(i)
+        start = time.perf_counter()
+        for i in range(iterations):
+            call(i)
+        per_call = (time.perf_counter() - start) / iterations * 1e6
+        self.stdout.write(f'{label:<28} {per_call:8.1f} us/call')
+        return per_call
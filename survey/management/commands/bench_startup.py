@@ -0,0 +1,105 @@
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+
+#? ------------------------------------------------------------------------
+#? How long a fresh process takes to become useful, measured in new interpreters (nothing is
+#? already imported or cached in them, like an autoscaled worker or a cron job):
+#? - wsgi: `import DjSurvey.wsgi` (django.setup(), app registry, middleware chain), then the first
+#?   request through the WSGI application (URLconf, views and templates loaded on demand);
+#? - manage.py: wall time of `manage.py <command>` (--command, default "check").
+#? --settings picks the settings module to measure, e.g. DjSurvey.settings_production.
+#? --importtime N adds the N slowest imports of one run (python -X importtime).
+#? ------------------------------------------------------------------------
+
+#* runs in the child interpreter; timings are taken before anything else is imported
+WSGI_PROBE = '''
+import time
+started = time.perf_counter()
+import io, json, sys
+import DjSurvey.wsgi
+application = DjSurvey.wsgi.application
+booted = time.perf_counter()
+environ = {
+    'REQUEST_METHOD': 'GET', 'PATH_INFO': sys.argv[1], 'QUERY_STRING': '', 'SERVER_NAME': 'localhost',
+    'SERVER_PORT': '80', 'HTTP_HOST': 'localhost', 'SERVER_PROTOCOL': 'HTTP/1.1', 'wsgi.url_scheme': 'http',
+    'wsgi.input': io.BytesIO(), 'wsgi.errors': sys.stderr,
+}
+statuses = []
+response = application(environ, lambda status, headers, exc_info=None: statuses.append(status))
+b''.join(response)
+getattr(response, 'close', lambda: None)()
+done = time.perf_counter()
+print(json.dumps({'boot': booted - started, 'first_request': done - booted, 'status': statuses[0], 'modules': len(sys.modules)}))
+'''
+
+
+class Command(BaseCommand):
+    help = 'Measure process startup: import time and time to first request (wsgi.py), and manage.py run time.'
+    #* nothing to check, and checks would only add to what is being measured in the parent
+    requires_system_checks = []
+
+    def add_arguments(self, parser):
+        parser.add_argument('--repeat', type=int, default=5, help='Fresh processes per measure (default 5), the median is shown.')
+        parser.add_argument('--path', default='/', help='URL of the first request (default /).')
+        parser.add_argument('--command', default='check', help='manage.py command to time (default "check"), "" to skip.')
+        parser.add_argument('--importtime', type=int, default=0, metavar='N', help='Show the N slowest imports.')
+
+    def handle(self, *args, **options):
+        if options['repeat'] < 1:
+            raise CommandError('--repeat must be at least 1')
+        base_dir = str(settings.BASE_DIR)
+        env = {**os.environ, 'DJANGO_SETTINGS_MODULE': os.environ.get('DJANGO_SETTINGS_MODULE', 'DjSurvey.settings')}
+        self.stdout.write(f'settings: {env["DJANGO_SETTINGS_MODULE"]}, {options["repeat"]} runs each, medians:')
+
+        runs = []
+        for _ in range(options['repeat']):
+            started = time.perf_counter()
+            result = subprocess.run(
+                [sys.executable, '-c', WSGI_PROBE, options['path']],
+                cwd=base_dir, env=env, capture_output=True, text=True,
+            )
+            if result.returncode:
+                raise CommandError(f'the WSGI probe failed:\n{result.stderr}')
+            runs.append({**json.loads(result.stdout.strip().splitlines()[-1]), 'total': time.perf_counter() - started})
+        median = lambda key: statistics.median(run[key] for run in runs) * 1000
+        self.stdout.write(
+            f'  wsgi.py   boot {median("boot"):7.1f} ms   first request {median("first_request"):7.1f} ms '
+            f'({runs[0]["status"]} {options["path"]})   whole process {median("total"):7.1f} ms   '
+            f'{runs[0]["modules"]} modules'
+        )
+
+        if options['command']:
+            times = []
+            for _ in range(options['repeat']):
+                started = time.perf_counter()
+                result = subprocess.run(
+                    [sys.executable, 'manage.py', *options['command'].split()],
+                    cwd=base_dir, env=env, capture_output=True, text=True,
+                )
+                if result.returncode:
+                    raise CommandError(f'manage.py {options["command"]} failed:\n{result.stderr}')
+                times.append(time.perf_counter() - started)
+            self.stdout.write(f'  manage.py {options["command"]}: {statistics.median(times) * 1000:7.1f} ms')
+
+        if options['importtime']:
+            result = subprocess.run(
+                [sys.executable, '-X', 'importtime', '-c', WSGI_PROBE, options['path']],
+                cwd=base_dir, env=env, capture_output=True, text=True,
+            )
+            imports = []
+            for line in result.stderr.splitlines():
+                #* "import time:   self [us] | cumulative | imported package"
+                if line.startswith('import time:') and '|' in line and 'cumulative' not in line:
+                    _, cumulative, name = line[len('import time:'):].split('|')
+                    imports.append((int(cumulative), name.rstrip()))
+            self.stdout.write('  slowest imports (cumulative, nested ones indented):')
+            for cumulative, name in sorted(imports, reverse=True)[:options['importtime']]:
+                self.stdout.write(f'  {cumulative / 1000:7.1f} ms {name}')
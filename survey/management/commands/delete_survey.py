@@ -0,0 +1,38 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from survey.deletion import DELETE_BATCH_SIZE, delete_survey
+from survey.models import Survey
+
+
+class Command(BaseCommand):
+    help = 'Delete a survey and everything under it in batches, with progress (see survey/deletion.py).'
+
+    def add_arguments(self, parser):
+        parser.add_argument('slug')
+        parser.add_argument('--batch-size', type=int, default=DELETE_BATCH_SIZE,
+                            help=f'Rows deleted per transaction (default {DELETE_BATCH_SIZE}).')
+        parser.add_argument('--noinput', '--no-input', action='store_false', dest='interactive',
+                            help='Do not ask for confirmation.')
+
+    def handle(self, *args, **options):
+        if options['batch_size'] < 1:
+            raise CommandError('--batch-size must be at least 1')
+        try:
+            survey = Survey.objects.get(slug=options['slug'])
+        except Survey.DoesNotExist:
+            raise CommandError(f'Survey "{options["slug"]}" does not exist')
+
+        if options['interactive']:
+            confirm = input(f'Delete "{survey.title}" and all its questions, choices and answers? [y/N] ')
+            if confirm.lower() not in ('y', 'yes'):
+                raise CommandError('Deletion cancelled.')
+
+        def progress(model, deleted):
+            self.stdout.write(f'\r{model._meta.verbose_name_plural}: {deleted}', ending='')
+            self.stdout.flush()
+
+        deleted = delete_survey(survey, batch_size=options['batch_size'], progress=progress)
+        self.stdout.write('')
+        for label, count in deleted.items():
+            self.stdout.write(f'{label}: {count}')
+        self.stdout.write(self.style.SUCCESS(f'Deleted "{survey.title}".'))
@@ -0,0 +1,35 @@
+import sys
+
+from django.core.exceptions import ValidationError
+from django.core.management.base import BaseCommand, CommandError
+
+from survey.models import Survey
+from survey.transfer import FORMATS, detect_format, dumps, export_survey
+
+
+class Command(BaseCommand):
+    help = 'Export a survey (questions and choices included) as JSON or MessagePack.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('slug')
+        parser.add_argument('-o', '--output', help='File to write to. Defaults to stdout.')
+        parser.add_argument('--format', choices=FORMATS, help='Defaults to the output file extension, else json.')
+
+    def handle(self, *args, **options):
+        try:
+            survey = Survey.objects.get(slug=options['slug'])
+        except Survey.DoesNotExist:
+            raise CommandError(f'Survey "{options["slug"]}" does not exist')
+
+        fmt = options['format'] or detect_format(options['output'])
+        try:
+            payload = dumps(export_survey(survey), fmt)
+        except ValidationError as exc:
+            raise CommandError(exc.messages[0])
+
+        if options['output']:
+            with open(options['output'], 'wb') as f:
+                f.write(payload)
+            self.stderr.write(self.style.SUCCESS(f'Exported "{survey.title}" to {options["output"]}'))
+        else:
+            sys.stdout.buffer.write(payload)
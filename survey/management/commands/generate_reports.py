@@ -0,0 +1,113 @@
+import os
+import time
+from multiprocessing import Pool
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+
+from survey.management.utils import chunked, init_worker
+
+
+#? ------------------------------------------------------------------------
+#? Nightly result reports (CSV + HTML, see survey/reports.py) for many surveys at once.
+#? - Only surveys whose answer set changed since their last report are done: the parent computes
+#?   every survey's watermark (a couple of grouped queries per 500 surveys) and compares it with the
+#?   one stored in SurveyReport. --force ignores them.
+#? - The reports are built in a process pool (--workers), a few surveys per task. Each worker opens
+#?   its own database connection; workers only read and write files.
+#? - The parent stores the watermarks as results come back, in one upsert per task. A survey that
+#?   failed keeps its old watermark and is tried again on the next run; the others are not held up.
+#? - No model imports at module level, like seed_surveys: workers import this module to unpickle
+#?   the task function.
+#? ------------------------------------------------------------------------
+
+
+def _generate_reports(task):
+    #? Worker: writes the reports of some surveys. Returns [(survey id, error message or None)]
+    from survey.reports import generate_report
+
+    survey_ids, directory = task
+    results = []
+    for survey_id in survey_ids:
+        try:
+            generate_report(survey_id, directory)
+        except Exception as exc:
+            results.append((survey_id, f'{type(exc).__name__}: {exc}'))
+        else:
+            results.append((survey_id, None))
+    return results
+
+
+class Command(BaseCommand):
+    help = 'Write the result reports (CSV, cross-tabs, HTML) of the surveys whose answers changed since the last run.'
+    requires_system_checks = []
+
+    def add_arguments(self, parser):
+        parser.add_argument('slugs', nargs='*', help='Surveys to report on. Defaults to every survey.')
+        parser.add_argument('--output', default=None,
+                            help='Directory of the report files (default settings.SURVEY_REPORTS_DIR).')
+        parser.add_argument('--workers', type=int, default=os.cpu_count() or 1,
+                            help='Processes building reports (default: one per CPU).')
+        parser.add_argument('--force', action='store_true', help='Rebuild every report, changed or not.')
+
+    def handle(self, *args, **options):
+        from survey.models import Survey, SurveyReport
+        from survey.reports import report_paths, watermarks
+
+        if options['workers'] < 1:
+            raise CommandError('--workers must be at least 1')
+        directory = str(options['output'] or settings.SURVEY_REPORTS_DIR)
+        os.makedirs(directory, exist_ok=True)
+        started = time.perf_counter()
+
+        surveys = Survey.objects.order_by('id')
+        if options['slugs']:
+            surveys = surveys.filter(slug__in=options['slugs'])
+        rows = list(surveys.values_list('id', 'slug', 'updated', 'archived_at'))
+        current = watermarks((survey_id, updated, archived_at) for survey_id, _, updated, archived_at in rows)
+        stored = dict(SurveyReport.objects.values_list('survey_id', 'watermark'))
+        todo = [
+            survey_id for survey_id, slug, _, _ in rows
+            if options['force'] or stored.get(survey_id) != current[survey_id]
+            #* files removed by hand are written again
+            or not os.path.exists(report_paths(directory, slug)['html'])
+        ]
+        self.stdout.write(f'{len(todo)} of {len(rows)} surveys changed since their last report')
+        if not todo:
+            return
+
+        per_task = max(1, min(50, len(todo) // (options['workers'] * 4)))
+        tasks = [(chunk, directory) for chunk in chunked(todo, per_task)]
+        done, failed = 0, []
+
+        def store(results):
+            nonlocal done
+            ok = [survey_id for survey_id, error in results if error is None]
+            failed.extend((survey_id, error) for survey_id, error in results if error is not None)
+            SurveyReport.objects.bulk_create(
+                [SurveyReport(survey_id=survey_id, watermark=current[survey_id]) for survey_id in ok],
+                update_conflicts=True,
+                unique_fields=['survey'],
+                update_fields=['watermark', 'generated_at'],
+            )
+            done += len(ok)
+            self.stdout.write(f'{done} reports...')
+
+        if options['workers'] > 1 and len(tasks) > 1:
+            connections.close_all()  #* forked workers must not share the parent's connection
+            with Pool(min(options['workers'], len(tasks)), initializer=init_worker) as pool:
+                for results in pool.imap_unordered(_generate_reports, tasks):
+                    store(results)
+        else:
+            for task in tasks:
+                store(_generate_reports(task))
+
+        slugs = dict((survey_id, slug) for survey_id, slug, _, _ in rows)
+        for survey_id, error in failed:
+            self.stderr.write(f'{slugs[survey_id]}: {error}')
+        elapsed = time.perf_counter() - started
+        message = f'{done} reports written to {directory} in {elapsed:.1f}s'
+        if failed:
+            raise CommandError(f'{message}, {len(failed)} failed.')
+        self.stdout.write(self.style.SUCCESS(f'{message}.'))
@@ -0,0 +1,37 @@
+from django.contrib.auth import get_user_model
+from django.core.exceptions import ValidationError
+from django.core.management.base import BaseCommand, CommandError
+
+from survey.transfer import FORMATS, detect_format, import_survey, loads
+
+
+class Command(BaseCommand):
+    help = 'Import a survey exported with export_survey. Creates a new survey owned by --user.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path')
+        parser.add_argument('--user', required=True, help='Username of the new survey owner.')
+        parser.add_argument('--format', choices=FORMATS, help='Defaults to the file extension, else json.')
+
+    def handle(self, *args, **options):
+        User = get_user_model()
+        try:
+            owner = User.objects.get(username=options['user'])
+        except User.DoesNotExist:
+            raise CommandError(f'User "{options["user"]}" does not exist')
+
+        try:
+            with open(options['path'], 'rb') as f:
+                raw = f.read()
+        except OSError as exc:
+            raise CommandError(f'Could not read {options["path"]}: {exc}')
+
+        fmt = options['format'] or detect_format(options['path'])
+        try:
+            survey = import_survey(loads(raw, fmt), owner)
+        except ValidationError as exc:
+            raise CommandError(exc.messages[0])
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Imported "{survey.title}" as /{survey.slug}/ with {survey.questions.count()} questions.'
+        ))
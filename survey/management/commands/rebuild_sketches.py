@@ -0,0 +1,56 @@
+from itertools import groupby, islice
+from operator import itemgetter
+
+from django.core.management.base import BaseCommand, CommandError
+
+from survey.models import Survey, Answer, ArchivedAnswer, SurveySketch
+from survey.sketches import record_responses, reset_sketch, surveys_to_sketch
+
+
+class Command(BaseCommand):
+    help = (
+        'Start the approximate-results sketches (survey/sketches.py) of the surveys past SURVEY_APPROX_SKETCH_FROM '
+        'answers, or recompute them from the answers, e.g. after bulk loads (seed_surveys) or a change of '
+        'SURVEY_APPROX_SAMPLE_SIZE.'
+    )
+    requires_system_checks = []
+
+    def add_arguments(self, parser):
+        parser.add_argument('slugs', nargs='*', help='Surveys to rebuild. Defaults to the surveys that need a new sketch.')
+        parser.add_argument('--all', action='store_true', help='Also rebuild the sketches that already exist.')
+        parser.add_argument('--batch-size', type=int, default=5000, help='Responses recorded per transaction (default 5000).')
+
+    def handle(self, *args, **options):
+        if options['batch_size'] < 1:
+            raise CommandError('--batch-size must be at least 1')
+        surveys = Survey.objects.order_by('id').only('id', 'slug', 'archived_at')
+        if options['slugs']:
+            surveys = surveys.filter(slug__in=options['slugs'])
+        else:
+            survey_ids = surveys_to_sketch()
+            if options['all']:
+                survey_ids += SurveySketch.objects.values_list('survey_id', flat=True)
+            surveys = surveys.filter(id__in=survey_ids)
+
+        for survey in surveys.iterator():
+            reset_sketch(survey.id)
+            source = (
+                ArchivedAnswer.objects.filter(survey_id=survey.id) if survey.archived_at
+                else Answer.objects.filter(question__survey_id=survey.id)
+            )
+            #* streamed in submission order, one response per submission
+            rows = (
+                source.order_by('submission_id', 'question_id')
+                .values_list('submission_id', 'user_id', 'question_id', 'choice_id')
+                .iterator(chunk_size=options['batch_size'])
+            )
+            responses = (
+                (answers[0][1], [(question_id, choice_id) for _, _, question_id, choice_id in answers])
+                for answers in (list(group) for _, group in groupby(rows, key=itemgetter(0)))
+            )
+            recorded = 0
+            while batch := list(islice(responses, options['batch_size'])):
+                record_responses(survey.id, batch)
+                recorded += len(batch)
+            self.stdout.write(f'{survey.slug}: {recorded} responses')
+        self.stdout.write(self.style.SUCCESS('Done.'))
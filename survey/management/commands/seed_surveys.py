@@ -0,0 +1,197 @@
+import random
+import time
+from multiprocessing import Pool
+from uuid import uuid4
+
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections, transaction
+
+from survey.management.utils import chunked, init_worker
+
+
+#? ------------------------------------------------------------------------
+#? Synthetic data for load testing: users + profiles, surveys, questions of both types, choices,
+#? and one complete submission (Submission + an Answer per question) per respondent and survey.
+#? - Everything goes in with chunked bulk_create: no post_save, so accounts.signals.create_user_profile
+#?   and the survey signals (Survey.updated bumps, live result pushes) never fire per row.
+#?   Profiles are bulk created next to their users, like accounts' import_users does.
+#? - Answers are by far the biggest part (surveys x respondents x questions), so they are generated
+#?   survey by survey, optionally in several processes (--workers). Each worker has its own connection;
+#?   on SQLite writers still take turns on the database lock, the gain is in the row building.
+#? - Every run gets its own tag in the usernames and slugs, so runs never collide and can be told apart.
+#? - No model imports at module level: with the "spawn" start method, workers import this module before
+#?   django.setup() has run (see survey/management/utils.py).
+#? ------------------------------------------------------------------------
+
+WORDS = (
+    'customer team product service delivery quality price support website office training event '
+    'course feedback experience meeting project manager community mobile app store order checkout '
+    'onboarding release feature workshop newsletter employee benefits commute lunch'
+).split()
+CHOICE_SETS = (
+    ['Very satisfied', 'Satisfied', 'Neutral', 'Dissatisfied', 'Very dissatisfied'],
+    ['Yes', 'No'],
+    ['Yes', 'No', 'Not sure'],
+    ['Daily', 'Weekly', 'Monthly', 'Rarely', 'Never'],
+    ['Strongly agree', 'Agree', 'Disagree', 'Strongly disagree'],
+)
+TEXT_ANSWERS = (
+    'Works well for me.', 'Could be faster.', 'No complaints.', 'Please add more options.',
+    'The support team was great.', 'Too expensive.', 'I would recommend it.', 'Hard to find at first.',
+)
+
+
+def _seed_answers(task):
+    #? Worker: creates the submissions and answers of some surveys. Returns the number of answers.
+    from survey.models import Question, Choice, Submission, Answer
+
+    survey_ids, user_ids, respondents, batch_size, seed = task
+    rng = random.Random(seed)
+    questions = {}
+    for question_id, survey_id, question_type in (
+        Question.objects.filter(survey_id__in=survey_ids).order_by('id').values_list('id', 'survey_id', 'question_type')
+    ):
+        questions.setdefault(survey_id, []).append((question_id, question_type))
+    choices = {}
+    for choice_id, question_id in Choice.objects.filter(question__survey_id__in=survey_ids).order_by('id').values_list('id', 'question_id'):
+        choices.setdefault(question_id, []).append(choice_id)
+    #* a skewed distribution per question, so results look like real ones instead of flat noise
+    weights = {question_id: [rng.random() ** 2 for _ in ids] for question_id, ids in choices.items()}
+
+    total = 0
+    for survey_id in survey_ids:
+        users = rng.sample(user_ids, min(respondents, len(user_ids)))
+        with transaction.atomic():
+            for user_chunk in chunked(users, batch_size):
+                Submission.objects.bulk_create(
+                    [Submission(user_id=user_id, survey_id=survey_id) for user_id in user_chunk],
+                    batch_size=batch_size,
+                )
+                submission_ids = dict(
+                    Submission.objects.filter(survey_id=survey_id, user_id__in=user_chunk, client_id='')
+                    .values_list('user_id', 'id')
+                )
+                rows = (
+                    Answer(
+                        submission_id=submission_ids[user_id], user_id=user_id, question_id=question_id,
+                        choice_id=rng.choices(choices[question_id], weights[question_id])[0] if question_type == 'multiple_choice' else None,
+                        text_answer=rng.choice(TEXT_ANSWERS) if question_type == 'text' else None,
+                    )
+                    for user_id in user_chunk
+                    for question_id, question_type in questions.get(survey_id, [])
+                )
+                for batch in chunked(rows, batch_size):
+                    Answer.objects.bulk_create(batch)
+                    total += len(batch)
+    return total
+
+
+class Command(BaseCommand):
+    help = 'Generate production-sized synthetic data (users, surveys, questions, choices, answers) with bulk inserts.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=1000)
+        parser.add_argument('--surveys', type=int, default=100)
+        parser.add_argument('--questions', type=int, default=10, help='Questions per survey.')
+        parser.add_argument('--text-ratio', type=float, default=0.2, help='Share of text questions (default 0.2).')
+        parser.add_argument('--respondents', type=int, default=500,
+                            help='Respondents per survey, picked among the generated users (default 500).')
+        parser.add_argument('--batch-size', type=int, default=5000)
+        parser.add_argument('--workers', type=int, default=1, help='Processes generating answers (default 1).')
+        parser.add_argument('--seed', type=int, default=None, help='Random seed, for reproducible data.')
+        parser.add_argument('--password', default=None,
+                            help='Password of the generated users. Without it they get an unusable password.')
+
+    def handle(self, *args, **options):
+        from django.contrib.auth import get_user_model
+        from accounts.models import UserProfile
+        from survey.models import Survey, Question, Choice
+
+        for name in ('users', 'surveys', 'batch_size', 'workers'):
+            if options[name] < 1:
+                raise CommandError(f'--{name.replace("_", "-")} must be at least 1')
+        #* 0 is fine: surveys without questions, or without answers
+        for name in ('questions', 'respondents'):
+            if options[name] < 0:
+                raise CommandError(f'--{name} must be at least 0')
+        if not 0 <= options['text_ratio'] <= 1:
+            raise CommandError('--text-ratio must be between 0 and 1')
+        User = get_user_model()
+        batch_size = options['batch_size']
+        rng = random.Random(options['seed'])
+        tag = uuid4().hex[:6]
+        started = time.perf_counter()
+
+        #* 1. users + profiles (the password is hashed once, PBKDF2 is slow)
+        password = make_password(options['password'])
+        for chunk in chunked(range(options['users']), batch_size):
+            with transaction.atomic():
+                users = User.objects.bulk_create([
+                    User(username=f'seed-{tag}-{n}', email=f'seed-{tag}-{n}@example.com', password=password)
+                    for n in chunk
+                ])
+                ids = User.objects.filter(username__in=[u.username for u in users]).values_list('id', flat=True)
+                UserProfile.objects.bulk_create([UserProfile(user_id=user_id) for user_id in ids])
+        user_ids = list(User.objects.filter(username__startswith=f'seed-{tag}-').values_list('id', flat=True))
+        self.stdout.write(f'{len(user_ids)} users and profiles')
+
+        #* 2. surveys (bulk_create skips Survey.save, so the slugs are set here), questions, choices
+        for chunk in chunked(range(options['surveys']), batch_size):
+            Survey.objects.bulk_create([
+                Survey(
+                    user_id=rng.choice(user_ids),
+                    title=f'{" ".join(rng.sample(WORDS, 3)).capitalize()} survey {n}',
+                    description=f'Synthetic survey about {", ".join(rng.sample(WORDS, 4))}.',
+                    slug=f'seed-{tag}-{n}',
+                )
+                for n in chunk
+            ])
+        survey_ids = list(Survey.objects.filter(slug__startswith=f'seed-{tag}-').order_by('id').values_list('id', flat=True))
+
+        questions = (
+            Question(
+                survey_id=survey_id,
+                title=f'How do you feel about our {rng.choice(WORDS)}?',
+                question_type='text' if rng.random() < options['text_ratio'] else 'multiple_choice',
+            )
+            for survey_id in survey_ids
+            for _ in range(options['questions'])
+        )
+        for batch in chunked(questions, batch_size):
+            Question.objects.bulk_create(batch)
+        question_ids = Question.objects.filter(
+            survey_id__in=survey_ids, question_type='multiple_choice'
+        ).values_list('id', flat=True).iterator()
+        choices = (
+            Choice(question_id=question_id, title=title)
+            for question_id in question_ids
+            for title in rng.choice(CHOICE_SETS)
+        )
+        for batch in chunked(choices, batch_size):
+            Choice.objects.bulk_create(batch)
+        self.stdout.write(f'{len(survey_ids)} surveys with {options["questions"]} questions each')
+
+        #* 3. submissions + answers, a few surveys per task
+        per_task = max(1, len(survey_ids) // (options['workers'] * 4))
+        tasks = [
+            (chunk, user_ids, options['respondents'], batch_size, rng.random())
+            for chunk in chunked(survey_ids, per_task)
+        ]
+        answers = 0
+        if options['workers'] > 1:
+            connections.close_all()  #* forked workers must not share the parent's connection
+            with Pool(options['workers'], initializer=init_worker) as pool:
+                for count in pool.imap_unordered(_seed_answers, tasks):
+                    answers += count
+                    self.stdout.write(f'{answers} answers...')
+        else:
+            for task in tasks:
+                answers += _seed_answers(task)
+                self.stdout.write(f'{answers} answers...')
+
+        elapsed = time.perf_counter() - started
+        self.stdout.write(self.style.SUCCESS(
+            f'Done in {elapsed:.1f}s: {len(user_ids)} users, {len(survey_ids)} surveys, {answers} answers '
+            f'({answers / elapsed:,.0f} answers/s). Usernames and slugs start with "seed-{tag}-".'
+        ))
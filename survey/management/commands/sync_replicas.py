@@ -0,0 +1,35 @@
+import sqlite3
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+
+
+class Command(BaseCommand):
+    help = (
+        'Refresh the SQLite read replicas (settings.DATABASE_REPLICAS) with a consistent copy of the '
+        'primary database. Local stand-in for real replication, see DjSurvey/routers.py.'
+    )
+    requires_system_checks = []
+
+    def handle(self, *args, **options):
+        primary = settings.DATABASES['default']
+        if not settings.DATABASE_REPLICAS:
+            raise CommandError('No replicas configured, set DJSURVEY_DB_REPLICAS (see settings.py).')
+        if primary['ENGINE'] != 'django.db.backends.sqlite3':
+            raise CommandError('Only SQLite primaries can be copied this way.')
+
+        #* sqlite's online backup: a consistent snapshot even while the app keeps writing
+        source = sqlite3.connect(primary['NAME'])
+        try:
+            for alias in settings.DATABASE_REPLICAS:
+                connections[alias].close()
+                target = sqlite3.connect(settings.DATABASES[alias]['NAME'])
+                try:
+                    source.backup(target)
+                finally:
+                    target.close()
+                self.stdout.write(f'{alias}: {settings.DATABASES[alias]["NAME"]}')
+        finally:
+            source.close()
+        self.stdout.write(self.style.SUCCESS(f'{len(settings.DATABASE_REPLICAS)} replica(s) refreshed.'))
@@ -0,0 +1,30 @@
+from itertools import islice
+
+import django
+from django.db import connections
+
+
+#? ------------------------------------------------------------------------
+#? Helpers shared by the management commands that fan work out to a process pool
+#? (seed_surveys, generate_reports).
+#? No model imports here: with the "spawn" start method, workers import this module before
+#? django.setup() has run (see init_worker).
+#? ------------------------------------------------------------------------
+
+SQLITE_WORKER_TIMEOUT = 300
+
+
+def chunked(iterable, size):
+    iterator = iter(iterable)
+    while chunk := list(islice(iterator, size)):
+        yield chunk
+
+
+def init_worker():
+    #? Pool initializer
+    #* no-op when the worker was forked from an already set up process
+    django.setup()
+    for connection in connections.all():
+        if connection.vendor == 'sqlite':
+            #* workers queue up for SQLite's single write lock instead of failing after the default 5s
+            connection.settings_dict['OPTIONS'] = {**connection.settings_dict['OPTIONS'], 'timeout': SQLITE_WORKER_TIMEOUT}
@@ -0,0 +1,23 @@
+# Generated by Django 5.2.5 on 2026-10-19 16:03
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('survey', '0002_survey_slug'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='survey',
+            index=models.Index(fields=['-created', '-id'], name='survey_created_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='survey',
+            index=models.Index(fields=['user', '-created', '-id'], name='survey_user_created_id_idx'),
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.2.5 on 2026-10-19 16:09
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('survey', '0003_survey_keyset_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='question',
+            name='updated',
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.AddField(
+            model_name='survey',
+            name='updated',
+            field=models.DateTimeField(auto_now=True),
+        ),
+    ]
@@ -0,0 +1,34 @@
+# Generated by Django 5.2.5 on 2026-10-19 16:12
+
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count, Max
+
+
+def remove_duplicate_answers(apps, schema_editor):
+    # keep the latest answer of each (user, question) pair so the unique constraint can be added
+    Answer = apps.get_model('survey', 'Answer')
+    duplicates = (
+        Answer.objects.values('user_id', 'question_id')
+        .annotate(n=Count('id'), keep=Max('id'))
+        .filter(n__gt=1)
+        .order_by()
+    )
+    for row in duplicates.iterator():
+        Answer.objects.filter(user_id=row['user_id'], question_id=row['question_id']).exclude(id=row['keep']).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('survey', '0004_updated_timestamps'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RunPython(remove_duplicate_answers, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='answer',
+            constraint=models.UniqueConstraint(fields=('user', 'question'), name='answer_unique_user_question'),
+        ),
+    ]
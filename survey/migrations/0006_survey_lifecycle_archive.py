@@ -0,0 +1,50 @@
+# Generated by Django 5.2.5 on 2026-10-19 16:15
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('survey', '0005_answer_unique_user_question'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ArchivedAnswer',
+            fields=[
+                ('id', models.BigIntegerField(primary_key=True, serialize=False)),
+                ('survey_id', models.BigIntegerField(db_index=True)),
+                ('question_id', models.BigIntegerField()),
+                ('user_id', models.BigIntegerField()),
+                ('choice_id', models.BigIntegerField(blank=True, null=True)),
+                ('text_answer', models.TextField(blank=True, null=True)),
+                ('archived_at', models.DateTimeField(auto_now_add=True)),
+            ],
+        ),
+        migrations.AddField(
+            model_name='survey',
+            name='archived_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='survey',
+            name='closed_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='survey',
+            name='status',
+            field=models.CharField(choices=[('open', 'Open'), ('closed', 'Closed')], default='open', max_length=10),
+        ),
+        migrations.CreateModel(
+            name='SurveyFinalResults',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('counts', models.JSONField()),
+                ('computed_at', models.DateTimeField(auto_now=True)),
+                ('survey', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='final_results', to='survey.survey')),
+            ],
+        ),
+    ]
@@ -0,0 +1,59 @@
+# Generated by Django 5.2.5 on 2026-10-19 16:18
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import OuterRef, Subquery
+
+
+def create_submissions(apps, schema_editor):
+    # one Submission per (user, survey) that has answers, then every answer is pointed at its
+    # submission with a single UPDATE ... SET submission_id = (subquery)
+    Answer = apps.get_model('survey', 'Answer')
+    Submission = apps.get_model('survey', 'Submission')
+    pairs = Answer.objects.values_list('user_id', 'question__survey_id').distinct().order_by()
+    now = django.utils.timezone.now()
+    Submission.objects.bulk_create(
+        (Submission(user_id=user_id, survey_id=survey_id, submitted_at=now) for user_id, survey_id in pairs.iterator()),
+        batch_size=1000,
+    )
+    Answer.objects.filter(submission__isnull=True).update(submission_id=Subquery(
+        Submission.objects.filter(user_id=OuterRef('user_id'), survey__questions=OuterRef('question_id')).values('id')[:1]
+    ))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('survey', '0006_survey_lifecycle_archive'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='archivedanswer',
+            name='submission_id',
+            field=models.BigIntegerField(blank=True, null=True),
+        ),
+        migrations.CreateModel(
+            name='Submission',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('submitted_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('status', models.CharField(choices=[('complete', 'Complete'), ('partial', 'Partial')], default='complete', max_length=10)),
+                ('survey', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='submissions', to='survey.survey')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='submissions', to=settings.AUTH_USER_MODEL)),
+            ],
+        ),
+        migrations.AddField(
+            model_name='answer',
+            name='submission',
+            field=models.ForeignKey(null=True, on_delete=django.db.models.deletion.CASCADE, related_name='answers', to='survey.submission'),
+        ),
+        migrations.AddConstraint(
+            model_name='submission',
+            constraint=models.UniqueConstraint(fields=('user', 'survey'), name='submission_unique_user_survey'),
+        ),
+        migrations.RunPython(create_submissions, migrations.RunPython.noop),
+    ]
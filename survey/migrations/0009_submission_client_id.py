@@ -0,0 +1,28 @@
+# Generated by Django 5.2.5 on 2026-10-19 16:23
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('survey', '0008_answer_submission_required'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RemoveConstraint(
+            model_name='submission',
+            name='submission_unique_user_survey',
+        ),
+        migrations.AddField(
+            model_name='submission',
+            name='client_id',
+            field=models.CharField(blank=True, default='', max_length=64),
+        ),
+        migrations.AddConstraint(
+            model_name='submission',
+            constraint=models.UniqueConstraint(fields=('user', 'survey', 'client_id'), name='submission_unique_user_survey_client'),
+        ),
+    ]
@@ -0,0 +1,30 @@
+# Generated by Django 5.2.5 on 2026-10-19 16:29
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('survey', '0009_submission_client_id'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='survey',
+            name='logic',
+            field=models.JSONField(blank=True, default=dict, editable=False),
+        ),
+        migrations.CreateModel(
+            name='DisplayCondition',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('choice', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='dependent_conditions', to='survey.choice')),
+                ('question', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='conditions', to='survey.question')),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('question', 'choice'), name='displaycondition_unique_question_choice')],
+            },
+        ),
+    ]
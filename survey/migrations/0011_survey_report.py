@@ -0,0 +1,23 @@
+# Generated by Django 5.2.5 on 2026-10-19 16:33
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('survey', '0010_display_conditions'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SurveyReport',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('watermark', models.CharField(max_length=255)),
+                ('generated_at', models.DateTimeField(auto_now=True)),
+                ('survey', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='report', to='survey.survey')),
+            ],
+        ),
+    ]
@@ -0,0 +1,44 @@
+# Generated by Django 5.2.5 on 2026-10-19 16:37
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('survey', '0011_survey_report'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SurveySketch',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('registers', models.BinaryField(default=b'')),
+                ('submissions', models.BigIntegerField(default=0)),
+                ('updated', models.DateTimeField(auto_now=True)),
+                ('survey', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='sketch', to='survey.survey')),
+            ],
+        ),
+        migrations.CreateModel(
+            name='QuestionSketch',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('seen', models.BigIntegerField(default=0)),
+                ('question', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='sketch', to='survey.question')),
+            ],
+        ),
+        migrations.CreateModel(
+            name='AnswerSample',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('slot', models.PositiveIntegerField()),
+                ('choice', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='survey.choice')),
+                ('question', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='samples', to='survey.question')),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('question', 'slot'), name='answersample_unique_question_slot')],
+            },
+        ),
+    ]
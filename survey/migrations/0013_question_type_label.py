@@ -0,0 +1,18 @@
+# Generated by Django 5.2.5 on 2026-10-19 16:53
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('survey', '0012_approximate_results'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='question',
+            name='question_type',
+            field=models.CharField(choices=[('multiple_choice', 'Multiple Choice'), ('text', 'Text Answer')], max_length=25),
+        ),
+    ]
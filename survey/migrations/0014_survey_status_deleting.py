@@ -0,0 +1,18 @@
+# Generated by Django 5.2.5 on 2026-10-19 17:02
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('survey', '0013_question_type_label'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='survey',
+            name='status',
+            field=models.CharField(choices=[('open', 'Open'), ('closed', 'Closed'), ('deleting', 'Deleting')], default='open', max_length=10),
+        ),
+    ]
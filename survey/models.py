@@ -1,6 +1,8 @@
 from django.db import models
 from django.conf import settings
+from django.core.exceptions import ValidationError
 from django.urls import reverse
+from django.utils import timezone
 from .utils import slugify_instance_name
 
 # Create your models here.
@@ -10,7 +12,34 @@ class Survey(models.Model):
     title = models.CharField(max_length=255)
     description = models.TextField(null=True, blank=True)
     created = models.DateField(auto_now_add=True)
+    #? bumped on every change to the survey, its questions or their choices (see signals.py).
+    #? used as the version of everything rendered from this survey (ETags, cache keys)
+    updated = models.DateTimeField(auto_now=True)
     slug = models.SlugField(unique= True, blank=True, null=True)
+    #? lifecycle: open surveys take answers. Once closed, `manage.py archive_answers` can move their
+    #? answers out of the hot Answer table (see archive.py), archived_at is set when that is done.
+    #? 'deleting' while delete_survey empties it in batches (see deletion.py): it takes no answers and is
+    #? left out of the listings until it is gone
+    status = models.CharField(max_length=10, choices=[('open', 'Open'), ('closed', 'Closed'), ('deleting', 'Deleting')], default='open')
+    closed_at = models.DateTimeField(null=True, blank=True)
+    archived_at = models.DateTimeField(null=True, blank=True)
+    #? the DisplayConditions of the survey compiled into lookup tables (see logic.py), rebuilt whenever
+    #? a condition changes: respondents' pages never query the conditions themselves
+    logic = models.JSONField(default=dict, blank=True, editable=False)
+
+    class Meta:
+        #? listings are keyset-paginated on (created, id), newest first (see utils.keyset_page)
+        indexes = [
+            models.Index(fields=['-created', '-id'], name='survey_created_id_idx'),
+            models.Index(fields=['user', '-created', '-id'], name='survey_user_created_id_idx'),
+        ]
+
+    def __str__(self):
+        return self.title
+
+    @property
+    def is_open(self):
+        return self.status == 'open'
 
     def save(self, *args, **kwargs):
         if not self.slug:
@@ -33,6 +62,11 @@ class Question(models.Model):
     survey = models.ForeignKey(Survey, on_delete=models.CASCADE, related_name='questions')
     title = models.CharField(max_length=255)
     question_type = models.CharField(max_length=25, choices=[('multiple_choice', 'Multiple Choice'), ('text', 'Text Answer')])
+    #? bumped on every change to the question or its choices (see signals.py)
+    updated = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return self.title
 
     def get_absolute_url(self):
         return reverse('survey:question-detail', kwargs={'id': self.id, 'parent_slug': self.survey.slug})
@@ -50,10 +84,62 @@ class Question(models.Model):
 class Choice(models.Model):
     question = models.ForeignKey(Question, on_delete=models.CASCADE, related_name='choices')
     title = models.CharField(max_length=255)
+
+    def __str__(self):
+        return self.title
     
 
 
+class DisplayCondition(models.Model):
+    #? Skip logic: `question` is shown only if `choice` (of an earlier question) was picked.
+    #? A question with several conditions is shown if any of them is met, one without any always is.
+    question = models.ForeignKey(Question, on_delete=models.CASCADE, related_name='conditions')
+    choice = models.ForeignKey(Choice, on_delete=models.CASCADE, related_name='dependent_conditions')
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['question', 'choice'], name='displaycondition_unique_question_choice'),
+        ]
+
+    def __str__(self):
+        return f'Show "{self.question}" if "{self.choice}"'
+
+    def clean(self):
+        #* pointing only backwards keeps the rules acyclic, and lets one pass in question order evaluate them
+        if self.question_id and self.choice_id:
+            choice_question = self.choice.question
+            if choice_question.survey_id != self.question.survey_id:
+                raise ValidationError('The choice must belong to a question of the same survey.')
+            if choice_question.id >= self.question_id:
+                raise ValidationError('A question can only depend on the choices of an earlier question.')
+
+
+
+class Submission(models.Model):
+    #? The header of one respondent's response to a survey, its answers hang off it.
+    #? "has this user answered survey X", "their answers", "delete their response" are all lookups on the
+    #? (user, survey, client_id) unique index instead of scans of Answer joined through Question.
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='submissions')
+    survey = models.ForeignKey(Survey, on_delete=models.CASCADE, related_name='submissions')
+    submitted_at = models.DateTimeField(default=timezone.now)
+    status = models.CharField(max_length=10, choices=[('complete', 'Complete'), ('partial', 'Partial')], default='complete')
+    #? empty for the web form (one submission per user and survey). Responses collected offline and
+    #? uploaded by a field worker carry the id the device gave them, so a re-upload is recognised (see sync.py)
+    client_id = models.CharField(max_length=64, blank=True, default='')
+
+    class Meta:
+        #* not a partial index on client_id: save_response upserts ON CONFLICT (user, survey, client_id)
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'survey', 'client_id'], name='submission_unique_user_survey_client'),
+        ]
+
+    def __str__(self):
+        return f'Submission of "{self.user}" to "{self.survey}"'
+
+
+
 class Answer(models.Model):
+    submission = models.ForeignKey(Submission, on_delete=models.CASCADE, related_name='answers')
     user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='answers')
     question = models.ForeignKey(Question, on_delete=models.CASCADE, related_name='answers')
 
@@ -63,9 +149,95 @@ class Answer(models.Model):
     # if it was text:
     text_answer = models.TextField(null=True, blank=True)
 
+    class Meta:
+        #? one answer per question per submission: retries/double submits update the row instead of adding one
+        constraints = [
+            models.UniqueConstraint(fields=['submission', 'question'], name='answer_unique_submission_question'),
+        ]
+
     def __str__(self):
         return f'Answer for \"{self.question.title}\" by \"{self.user}\" : {[self.choice.title if self.choice else self.text_answer]}'
-    
 
 
-    
+
+class ArchivedAnswer(models.Model):
+    #? Answers of closed surveys, moved here in batches by `manage.py archive_answers` (see archive.py).
+    #? Plain integer columns instead of foreign keys: nothing reads these rows through the ORM relations,
+    #? and deleting a user/question must not have to scan the archive. id is the original Answer.id,
+    #? so re-running an interrupted batch can't archive a row twice.
+    id = models.BigIntegerField(primary_key=True)
+    survey_id = models.BigIntegerField(db_index=True)
+    question_id = models.BigIntegerField()
+    user_id = models.BigIntegerField()
+    submission_id = models.BigIntegerField(null=True, blank=True)
+    choice_id = models.BigIntegerField(null=True, blank=True)
+    text_answer = models.TextField(null=True, blank=True)
+    archived_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f'Archived answer {self.id} (survey {self.survey_id})'
+
+
+
+class SurveyFinalResults(models.Model):
+    #? The answer counts of a survey, computed once before its answers are archived.
+    #? counts has the shape of results.answer_counts() (JSON, so the ids are string keys).
+    survey = models.OneToOneField(Survey, on_delete=models.CASCADE, related_name='final_results')
+    counts = models.JSONField()
+    computed_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f'Final results of "{self.survey}"'
+
+
+
+class SurveyReport(models.Model):
+    #? The last report files written for a survey by `manage.py generate_reports` (see reports.py).
+    #? watermark fingerprints the survey and its answer set at that time: a survey whose current
+    #? watermark matches is skipped, nothing about its report would change.
+    survey = models.OneToOneField(Survey, on_delete=models.CASCADE, related_name='report')
+    watermark = models.CharField(max_length=255)
+    generated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f'Report of "{self.survey}"'
+
+
+
+class SurveySketch(models.Model):
+    #? Running summaries of a survey's responses for the approximate results of very large surveys
+    #? (see sketches.py), updated as responses come in instead of aggregating the Answer table:
+    #? a HyperLogLog of the respondents and the number of responses. Answers per question are counted
+    #? in QuestionSketch, one row each, so that a response only increments small counters.
+    survey = models.OneToOneField(Survey, on_delete=models.CASCADE, related_name='sketch')
+    registers = models.BinaryField(default=b'')
+    submissions = models.BigIntegerField(default=0)
+    updated = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f'Sketch of "{self.survey}"'
+
+
+class QuestionSketch(models.Model):
+    #? The number of answers seen so far to a question of a sketched survey (see sketches.py)
+    question = models.OneToOneField(Question, on_delete=models.CASCADE, related_name='sketch')
+    seen = models.BigIntegerField(default=0)
+
+    def __str__(self):
+        return f'Sketch of "{self.question}"'
+
+
+class AnswerSample(models.Model):
+    #? Reservoir sample of the picked choices of a multiple choice question: slot 0..SURVEY_APPROX_SAMPLE_SIZE-1,
+    #? each a uniformly random one of the answers seen so far (see sketches.py)
+    question = models.ForeignKey(Question, on_delete=models.CASCADE, related_name='samples')
+    slot = models.PositiveIntegerField()
+    choice = models.ForeignKey(Choice, on_delete=models.CASCADE, related_name='+')
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['question', 'slot'], name='answersample_unique_question_slot'),
+        ]
+
+    def __str__(self):
+        return f'Sample {self.slot} of "{self.question}"'
@@ -0,0 +1,89 @@
+import time
+from functools import wraps
+
+from django.conf import settings
+from django.core.cache import caches
+from django.http import HttpResponse
+
+
+#? ------------------------------------------------------------------------
+#? Token bucket rate limiting, state kept in the cache backend.
+#? - Each client has a bucket of `capacity` tokens that refills at `rate` tokens per second.
+#?   A request takes one token; an empty bucket means 429 Too Many Requests.
+#? - Bursts up to `capacity` are fine (a respondent clicking through quickly), a sustained flood is capped
+#?   at `rate`, so bots can't take all the write capacity away from real respondents.
+#? - Buckets are keyed by user id, else session key, else IP (client_key).
+#? - The read-modify-write on the cache is not atomic: under heavy concurrency from ONE client a few
+#?   extra requests can slip through. That's the trade-off for one get + one set per request.
+#? ------------------------------------------------------------------------
+
+PERIODS = {'s': 1, 'm': 60, 'h': 3600}
+
+
+def parse_rate(rate):
+    #* "10/m" -> (capacity=10, rate=10/60 tokens per second)
+    count, _, period = rate.partition('/')
+    count = int(count)
+    return count, count / PERIODS[period[:1] or 's']
+
+
+def client_key(request):
+    user = getattr(request, 'user', None)
+    if user is not None and user.is_authenticated:
+        return f'user:{user.pk}'
+    session = getattr(request, 'session', None)
+    if session is not None and session.session_key:
+        return f'session:{session.session_key}'
+    return f'ip:{request.META.get("REMOTE_ADDR", "")}'
+
+
+class TokenBucket:
+
+    def __init__(self, scope, capacity, rate, cache_alias='default'):
+        self.scope = scope
+        self.capacity = capacity
+        self.rate = rate
+        self.cache = caches[cache_alias]
+        #* an idle bucket is full again after this long, so its cache entry can simply expire
+        self.timeout = max(1, int(capacity / rate) + 1)
+
+    def consume(self, key, tokens=1, now=None):
+        #? -> (allowed, retry_after_seconds)
+        now = time.time() if now is None else now
+        cache_key = f'ratelimit:{self.scope}:{key}'
+        state = self.cache.get(cache_key)
+        if state is None:
+            available, last = float(self.capacity), now
+        else:
+            available, last = state
+            available = min(self.capacity, available + (now - last) * self.rate)
+
+        if available >= tokens:
+            self.cache.set(cache_key, (available - tokens, now), self.timeout)
+            return True, 0
+        self.cache.set(cache_key, (available, now), self.timeout)
+        return False, (tokens - available) / self.rate
+
+
+def get_bucket(scope):
+    #* settings.SURVEY_RATE_LIMITS = {'scope': 'count/period'}, e.g. {'answer-submit': '10/m'}
+    capacity, rate = parse_rate(settings.SURVEY_RATE_LIMITS[scope])
+    return TokenBucket(scope, capacity, rate)
+
+
+def ratelimit(scope, methods=('POST',)):
+    #? view decorator. Only the listed methods spend tokens, so viewing a survey is never limited.
+    def decorator(view):
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            if request.method in methods:
+                allowed, retry_after = get_bucket(scope).consume(client_key(request))
+                if not allowed:
+                    return HttpResponse(
+                        'Too many requests, please slow down.',
+                        status=429,
+                        headers={'Retry-After': str(int(retry_after) + 1)},
+                    )
+            return view(request, *args, **kwargs)
+        return wrapper
+    return decorator
@@ -0,0 +1,183 @@
+import csv
+import io
+import os
+import tempfile
+from collections import Counter
+from itertools import combinations, groupby
+from operator import itemgetter
+
+from django.db.models import Count, Max
+from django.template.loader import render_to_string
+from django.utils import timezone
+
+from .models import Survey, Question, Choice, Answer, ArchivedAnswer, Submission
+from .results import survey_counts
+
+
+#? ------------------------------------------------------------------------
+#? Result reports written to files by `manage.py generate_reports`, for every survey:
+#?   <slug>.csv            answers per question and choice, with their share
+#?   <slug>-crosstabs.csv  for every pair of multiple choice questions, how many respondents picked
+#?                         each combination of their choices
+#?   <slug>.html           both, as a standalone page
+#? - A report is built from a handful of queries whatever the size: the grouped counts of results.py
+#?   (frozen counts for archived surveys) and one ordered pass over the picked choices for the
+#?   cross-tabs, streamed with iterator() and grouped per submission, never held in memory.
+#? - Files are written atomically (write_atomic): readers see the previous report or the new one.
+#? - watermarks() fingerprints the survey and its answer set; the command skips surveys whose
+#?   fingerprint matches the one stored in SurveyReport. Bump REPORT_VERSION when the output changes,
+#?   every report is then written again.
+#? ------------------------------------------------------------------------
+
+REPORT_VERSION = 1
+#* cross-tabs grow with the square of the questions: only the first ones are crossed
+CROSSTAB_MAX_QUESTIONS = 12
+WATERMARK_CHUNK_SIZE = 500
+
+
+def report_paths(directory, slug):
+    return {
+        'csv': os.path.join(directory, f'{slug}.csv'),
+        'crosstabs': os.path.join(directory, f'{slug}-crosstabs.csv'),
+        'html': os.path.join(directory, f'{slug}.html'),
+    }
+
+
+def watermarks(surveys):
+    #? surveys: iterable of (id, updated, archived_at). Returns {survey id: watermark}
+    #? Two grouped queries per WATERMARK_CHUNK_SIZE surveys. Anything that changes a report changes
+    #? the fingerprint: a new or withdrawn response (count, last id), an edited one (submitted_at is
+    #? bumped on every save), edited questions (Survey.updated), archiving (archived_at).
+    result = {}
+    surveys = list(surveys)
+    for start in range(0, len(surveys), WATERMARK_CHUNK_SIZE):
+        chunk = surveys[start:start + WATERMARK_CHUNK_SIZE]
+        ids = [survey_id for survey_id, _, _ in chunk]
+        submissions = {
+            row['survey_id']: row for row in
+            Submission.objects.filter(survey_id__in=ids).values('survey_id')
+            .annotate(n=Count('id'), last=Max('id'), at=Max('submitted_at')).order_by()
+        }
+        answers = dict(
+            Answer.objects.filter(question__survey_id__in=ids).values('question__survey_id')
+            .annotate(n=Count('id')).order_by().values_list('question__survey_id', 'n')
+        )
+        for survey_id, updated, archived_at in chunk:
+            sub = submissions.get(survey_id, {})
+            parts = (
+                f'v{REPORT_VERSION}', updated.isoformat(), archived_at.isoformat() if archived_at else '',
+                sub.get('n', 0), sub.get('last') or 0, sub['at'].isoformat() if sub.get('at') else '',
+                answers.get(survey_id, 0),
+            )
+            result[survey_id] = '|'.join(str(part) for part in parts)
+    return result
+
+
+def crosstab_counts(survey, question_ids):
+    #? {((question a, choice a), (question b, choice b)): respondents}, question a < question b
+    source = (
+        ArchivedAnswer.objects.filter(survey_id=survey.id) if survey.archived_at
+        else Answer.objects.filter(question__survey_id=survey.id)
+    )
+    rows = (
+        source.filter(choice_id__isnull=False, question_id__in=question_ids)
+        .order_by('submission_id', 'question_id')
+        .values_list('submission_id', 'question_id', 'choice_id')
+        .iterator(chunk_size=5000)
+    )
+    pairs = Counter()
+    for _, picks in groupby(rows, key=itemgetter(0)):
+        pairs.update(combinations([(question_id, choice_id) for _, question_id, choice_id in picks], 2))
+    return pairs
+
+
+def build_report(survey_id):
+    #? everything the report files show, as plain data
+    survey = Survey.objects.only('id', 'slug', 'title', 'status', 'closed_at', 'archived_at').get(pk=survey_id)
+    questions = list(Question.objects.filter(survey_id=survey_id).order_by('id').values('id', 'title', 'question_type'))
+    choices = {}
+    for choice in Choice.objects.filter(question__survey_id=survey_id).order_by('id').values('id', 'question_id', 'title'):
+        choices.setdefault(choice['question_id'], []).append(choice)
+    counts = survey_counts(survey)
+
+    for question in questions:
+        question['answers'] = counts['questions'].get(question['id'], 0)
+        question['choices'] = [
+            {**choice, 'count': counts['choices'].get(choice['id'], 0),
+             'share': counts['choices'].get(choice['id'], 0) / question['answers'] if question['answers'] else 0}
+            for choice in choices.get(question['id'], [])
+        ]
+
+    crossed = [q for q in questions if q['question_type'] == 'multiple_choice'][:CROSSTAB_MAX_QUESTIONS]
+    pairs = crosstab_counts(survey, [q['id'] for q in crossed]) if len(crossed) > 1 else Counter()
+    crosstabs = [
+        {
+            'question': a, 'by': b,
+            'rows': [
+                {'title': row['title'],
+                 'cells': [pairs[((a['id'], row['id']), (b['id'], column['id']))] for column in b['choices']]}
+                for row in a['choices']
+            ],
+        }
+        for a, b in combinations(crossed, 2)
+    ]
+    return {
+        'survey': survey,
+        'respondents': Submission.objects.filter(survey_id=survey_id).count(),
+        'answers': counts['answers'],
+        'questions': questions,
+        'crosstabs': crosstabs,
+        'generated_at': timezone.now(),
+    }
+
+
+def _csv(header, rows):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(header)
+    writer.writerows(rows)
+    return buffer.getvalue()
+
+
+def write_atomic(path, content):
+    #* written to a temporary file next to the target, then renamed over it (atomic on the same filesystem)
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), prefix='.', suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'w', encoding='utf-8', newline='') as file:
+            file.write(content)
+            file.flush()
+            os.fsync(file.fileno())
+        os.chmod(tmp_path, 0o644)
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+
+
+def generate_report(survey_id, directory):
+    #? builds the report of a survey and writes its files. Returns their paths
+    report = build_report(survey_id)
+    paths = report_paths(directory, report['survey'].slug)
+    write_atomic(paths['csv'], _csv(
+        ['question', 'type', 'choice', 'count', 'share'],
+        (
+            row
+            for question in report['questions']
+            for row in (
+                [[question['title'], question['question_type'], choice['title'], choice['count'], f'{choice["share"]:.4f}']
+                 for choice in question['choices']]
+                or [[question['title'], question['question_type'], '', question['answers'], '']]
+            )
+        ),
+    ))
+    write_atomic(paths['crosstabs'], _csv(
+        ['question', 'choice', 'by question', 'by choice', 'respondents'],
+        (
+            [table['question']['title'], row['title'], table['by']['title'], column['title'], count]
+            for table in report['crosstabs']
+            for row in table['rows']
+            for column, count in zip(table['by']['choices'], row['cells'])
+        ),
+    ))
+    write_atomic(paths['html'], render_to_string('survey/report/report.html', report))
+    return paths
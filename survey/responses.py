@@ -0,0 +1,47 @@
+from functools import partial
+
+from django.db import transaction
+from django.utils import timezone
+
+from .live import publish_survey_changed
+from .models import Answer, Submission
+from .sketches import record_responses
+
+
+#? ------------------------------------------------------------------------
+#? Answer ingestion: the one place that writes a respondent's answers.
+#? - A response is one Submission (unique per user and survey, upserted the same way) + its answers.
+#? - All answers of a response go in ONE upsert (INSERT ... ON CONFLICT (submission, question) DO UPDATE):
+#?   a retried or double-submitted response updates the same rows, it can never add duplicates
+#?   (Answer has a unique constraint on (submission, question)).
+#? - bulk_create sends no post_save, so live results are notified here, once per response.
+#? - A first response is also added to the survey's approximate-results sketch (sketches.py).
+#? ------------------------------------------------------------------------
+
+def save_response(survey, user, answers, skipped=()):
+    #? answers: iterable of (question, {'choice': Choice|None, 'text_answer': str|None})
+    #? skipped: ids of the questions the skip logic hid, earlier answers to them are removed
+    with transaction.atomic():
+        is_new = not Submission.objects.filter(user=user, survey=survey, client_id='').exists()
+        submission = Submission(user=user, survey=survey, submitted_at=timezone.now(), status='complete')
+        Submission.objects.bulk_create(
+            [submission],
+            update_conflicts=True,
+            unique_fields=['user', 'survey', 'client_id'],
+            update_fields=['submitted_at', 'status'],
+        )
+        if submission.pk is None:  #! backends that can't return the id of an upserted row
+            submission = Submission.objects.get(user=user, survey=survey, client_id='')
+        rows = [Answer(submission=submission, user=user, question=question, **values) for question, values in answers]
+        Answer.objects.bulk_create(
+            rows,
+            update_conflicts=True,
+            unique_fields=['submission', 'question'],
+            update_fields=['choice', 'text_answer'],
+        )
+        if skipped:
+            Answer.objects.filter(submission=submission, question_id__in=skipped).delete()
+        if is_new:
+            record_responses(survey.id, [(user.pk, [(row.question_id, row.choice_id) for row in rows])])
+        transaction.on_commit(partial(publish_survey_changed, survey.id))
+    return rows
@@ -0,0 +1,63 @@
+from django.db.models import Count
+
+from .models import Answer, SurveyFinalResults
+
+
+#? ------------------------------------------------------------------------
+#? Result aggregates for a survey, in one grouped query over Answer:
+#?   {'choices': {choice_id: count}, 'questions': {question_id: count}, 'answers': total}
+#? Used by the results page and the live (SSE) stream.
+#? Surveys whose answers were archived (archive.py) read their frozen SurveyFinalResults row instead.
+#? ------------------------------------------------------------------------
+
+def _answer_counts_query(survey_id):
+    return (
+        Answer.objects.filter(question__survey_id=survey_id)
+        .values('question_id', 'choice_id')
+        .annotate(n=Count('id'))
+        .order_by()
+    )
+
+
+def _collect(rows):
+    counts = {'choices': {}, 'questions': {}, 'answers': 0}
+    for row in rows:
+        if row['choice_id'] is not None:
+            counts['choices'][row['choice_id']] = row['n']
+        counts['questions'][row['question_id']] = counts['questions'].get(row['question_id'], 0) + row['n']
+        counts['answers'] += row['n']
+    return counts
+
+
+def answer_counts(survey_id):
+    return _collect(_answer_counts_query(survey_id))
+
+
+async def aanswer_counts(survey_id):
+    #* same thing for async views (the SSE stream), without a thread hop
+    return _collect([row async for row in _answer_counts_query(survey_id)])
+
+
+def _frozen(counts):
+    #* JSON turned the ids into strings
+    return {
+        'choices': {int(k): n for k, n in counts['choices'].items()},
+        'questions': {int(k): n for k, n in counts['questions'].items()},
+        'answers': counts['answers'],
+    }
+
+
+def survey_counts(survey):
+    if survey.archived_at:
+        final = SurveyFinalResults.objects.filter(survey_id=survey.id).values_list('counts', flat=True).first()
+        if final is not None:
+            return _frozen(final)
+    return answer_counts(survey.id)
+
+
+async def asurvey_counts(survey):
+    if survey.archived_at:
+        final = await SurveyFinalResults.objects.filter(survey_id=survey.id).values_list('counts', flat=True).afirst()
+        if final is not None:
+            return _frozen(final)
+    return await aanswer_counts(survey.id)
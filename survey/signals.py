@@ -0,0 +1,39 @@
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+from django.utils import timezone
+from .models import Survey, Question, Choice, ArchivedAnswer, DisplayCondition
+from .logic import compile_survey_logic
+
+# Survey.updated and Question.updated are the "version" of what we render from them
+# (ETags of the HTMX partials, template fragment cache keys), so any change below a survey must bump them.
+# .update() is used so bumping the parents doesn't send more signals.
+# Answer has no receivers on purpose: a post_delete receiver would make every cascade load and delete
+# answers one by one. The code that writes answers publishes live result changes itself
+# (responses.py, sync.py, deletion.py, the question views).
+
+@receiver([post_save, post_delete], sender=Question)
+def touch_question_survey(sender, instance, **kwargs):
+    Survey.objects.filter(pk=instance.survey_id).update(updated=timezone.now())
+
+
+@receiver([post_save, post_delete], sender=Choice)
+def touch_choice_question(sender, instance, **kwargs):
+    now = timezone.now()
+    Question.objects.filter(pk=instance.question_id).update(updated=now)
+    Survey.objects.filter(questions__id=instance.question_id).update(updated=now)
+
+
+# ArchivedAnswer has no foreign keys (see models.py), so its rows don't go away with their survey by cascade.
+# one DELETE: ArchivedAnswer has no signals or dependents, Django doesn't load the rows
+@receiver(post_delete, sender=Survey)
+def delete_archived_answers(sender, instance, **kwargs):
+    ArchivedAnswer.objects.filter(survey_id=instance.id).delete()
+
+
+# skip logic: Survey.logic is the compiled form of the survey's DisplayConditions (see logic.py).
+# conditions also go away with their question or choice (cascade), which sends post_delete too.
+@receiver([post_save, post_delete], sender=DisplayCondition)
+def recompile_survey_logic(sender, instance, **kwargs):
+    survey_id = Question.objects.filter(pk=instance.question_id).values_list('survey_id', flat=True).first()
+    if survey_id is not None:
+        compile_survey_logic(survey_id)
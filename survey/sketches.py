@@ -0,0 +1,198 @@
+import hashlib
+import math
+import random
+from collections import Counter
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import BigIntegerField, Case, Count, F, Value, When
+from django.utils import timezone
+
+from .models import Answer, SurveySketch, QuestionSketch, AnswerSample
+
+
+#? ------------------------------------------------------------------------
+#? Approximate results for very large surveys, kept up to date as responses arrive (record_responses,
+#? called by save_response and the offline sync) so the results page never aggregates millions of rows:
+#? - respondents: a HyperLogLog of the user ids (SurveySketch.registers, 2**HLL_PRECISION one-byte
+#?   registers), standard error 1.04 / sqrt(4096) ~ 1.6%.
+#? - answers per question: plain counters, one QuestionSketch row per question.
+#? - choice distributions: a reservoir sample (algorithm R) of SURVEY_APPROX_SAMPLE_SIZE picked choices
+#?   per question (AnswerSample), read with one grouped query; shares come with a 95% Wilson interval.
+#? Writes stay small: the counters are incremented in place (F() expressions, no read-modify-write of a
+#? document), the registers are written only when one of them grows, and a sample slot only when the
+#? reservoir takes the answer (SAMPLE_SIZE / seen of the time).
+#? Only surveys past SURVEY_APPROX_SKETCH_FROM answers have a sketch: `manage.py rebuild_sketches` (cron)
+#? starts them from the answers, record_responses only keeps existing sketches current, so small
+#? surveys cost one UPDATE that matches nothing.
+#? Only new responses are recorded: edits and withdrawals don't change the sketch (they are a tiny
+#? part of a survey this size), `manage.py rebuild_sketches` recomputes it from the answers, e.g.
+#? after bulk loads or a change of SURVEY_APPROX_SAMPLE_SIZE.
+#? approximate_counts() is what the results page switches to past SURVEY_APPROX_THRESHOLD answers.
+#? ------------------------------------------------------------------------
+
+HLL_PRECISION = 12
+HLL_REGISTERS = 1 << HLL_PRECISION
+#* 95% confidence
+Z = 1.96
+
+
+def _hash64(value):
+    return int.from_bytes(hashlib.blake2b(str(value).encode(), digest_size=8).digest(), 'big')
+
+
+def hll_add(registers, value):
+    #? adds `value` to the HyperLogLog `registers` (bytearray), returns True if a register changed
+    hashed = _hash64(value)
+    index = hashed >> (64 - HLL_PRECISION)
+    rest = hashed & ((1 << (64 - HLL_PRECISION)) - 1)
+    rank = (64 - HLL_PRECISION) - rest.bit_length() + 1
+    if rank > registers[index]:
+        registers[index] = rank
+        return True
+    return False
+
+
+def hll_count(registers):
+    m = len(registers)
+    if not m:
+        return 0
+    alpha = 0.7213 / (1 + 1.079 / m)
+    estimate = alpha * m * m / sum(2.0 ** -r for r in registers)
+    zeros = registers.count(0)
+    if estimate <= 2.5 * m and zeros:  #* small range correction (linear counting)
+        estimate = m * math.log(m / zeros)
+    return round(estimate)
+
+
+def wilson_interval(hits, n):
+    #? (low, high) of the share hits / n
+    if not n:
+        return 0.0, 0.0
+    p = hits / n
+    denominator = 1 + Z * Z / n
+    center = (p + Z * Z / (2 * n)) / denominator
+    half = Z * math.sqrt(p * (1 - p) / n + Z * Z / (4 * n * n)) / denominator
+    return max(0.0, center - half), min(1.0, center + half)
+
+
+def record_responses(survey_id, responses, rng=random):
+    #? responses: iterable of (user id, [(question id, choice id or None), ...]), new responses only.
+    #? Surveys without a sketch are left alone.
+    responses = list(responses)
+    if not responses:
+        return
+    sample_size = settings.SURVEY_APPROX_SAMPLE_SIZE
+    answered = Counter(question_id for _user_id, answers in responses for question_id, _choice_id in answers)
+    with transaction.atomic():
+        #* the increment locks the sketch row until commit: concurrent responses to the survey are
+        #* recorded one after the other, so the reservoir positions read below stay consistent
+        if not SurveySketch.objects.filter(survey_id=survey_id).update(
+            submissions=F('submissions') + len(responses), updated=timezone.now(),
+        ):
+            return
+        seen = {}
+        if answered:
+            QuestionSketch.objects.filter(question_id__in=list(answered)).update(seen=F('seen') + Case(
+                *[When(question_id=question_id, then=Value(n)) for question_id, n in answered.items()],
+                output_field=BigIntegerField(),
+            ))
+            seen = dict(
+                QuestionSketch.objects.filter(question_id__in=list(answered)).values_list('question_id', 'seen')
+            )
+            #* questions added after the sketch was started
+            missing = [question_id for question_id in answered if question_id not in seen]
+            if missing:
+                QuestionSketch.objects.bulk_create(
+                    [QuestionSketch(question_id=question_id, seen=answered[question_id]) for question_id in missing]
+                )
+                seen.update((question_id, answered[question_id]) for question_id in missing)
+        registers = SurveySketch.objects.filter(survey_id=survey_id).values_list('registers', flat=True).get()
+        registers = bytearray(registers) or bytearray(HLL_REGISTERS)
+
+        #* answers seen before this batch, then counted up through it in order
+        position = {question_id: seen[question_id] - n for question_id, n in answered.items()}
+        grew = False
+        slots = {}
+        for user_id, answers in responses:
+            grew = hll_add(registers, user_id) or grew
+            for question_id, choice_id in answers:
+                position[question_id] += 1
+                if choice_id is None:
+                    continue
+                count = position[question_id]
+                slot = count - 1 if count <= sample_size else rng.randrange(count)
+                if slot < sample_size:
+                    slots[question_id, slot] = choice_id
+        if grew:
+            SurveySketch.objects.filter(survey_id=survey_id).update(registers=bytes(registers))
+        if slots:
+            AnswerSample.objects.bulk_create(
+                [AnswerSample(question_id=question_id, slot=slot, choice_id=choice_id) for (question_id, slot), choice_id in slots.items()],
+                update_conflicts=True,
+                unique_fields=['question', 'slot'],
+                update_fields=['choice'],
+            )
+
+
+def reset_sketch(survey_id):
+    #? replaces the survey's sketch with an empty one (starting it if there was none), record_responses adds to it
+    with transaction.atomic():
+        AnswerSample.objects.filter(question__survey_id=survey_id).delete()
+        QuestionSketch.objects.filter(question__survey_id=survey_id).delete()
+        SurveySketch.objects.filter(survey_id=survey_id).delete()
+        SurveySketch.objects.create(survey_id=survey_id)
+
+
+def surveys_to_sketch():
+    #? ids of the surveys past SURVEY_APPROX_SKETCH_FROM answers that have no sketch yet (archived
+    #? surveys never need one, their results are frozen)
+    return list(
+        Answer.objects.filter(question__survey__sketch__isnull=True, question__survey__archived_at__isnull=True)
+        .values('question__survey_id').annotate(n=Count('id')).order_by()
+        .filter(n__gte=settings.SURVEY_APPROX_SKETCH_FROM)
+        .values_list('question__survey_id', flat=True)
+    )
+
+
+def approximate_counts(survey_id, threshold=None):
+    #? ------------------------------------------------------------------------
+    #? The approximate results of a survey, or None if it has fewer than `threshold` answers
+    #? (default SURVEY_APPROX_THRESHOLD) or no sketch:
+    #?   {'respondents': distinct users (estimate), 'submissions': n, 'answers': n,
+    #?    'questions': {question_id: answers},
+    #?    'choices': {choice_id: {'count', 'share', 'low', 'high'}}}   count = share x answers of the question
+    #? Three queries: the sketch row, the question counters and the grouped sample.
+    #? ------------------------------------------------------------------------
+    threshold = settings.SURVEY_APPROX_THRESHOLD if threshold is None else threshold
+    sketch = SurveySketch.objects.filter(survey_id=survey_id).first()
+    if sketch is None:
+        return None
+    questions = dict(QuestionSketch.objects.filter(question__survey_id=survey_id).values_list('question_id', 'seen'))
+    answers = sum(questions.values())
+    if answers < threshold:
+        return None
+
+    sampled = {}
+    rows = list(
+        AnswerSample.objects.filter(question__survey_id=survey_id)
+        .values('question_id', 'choice_id').annotate(n=Count('id')).order_by()
+    )
+    for row in rows:
+        sampled[row['question_id']] = sampled.get(row['question_id'], 0) + row['n']
+    choices = {}
+    for row in rows:
+        n = sampled[row['question_id']]
+        share = row['n'] / n
+        low, high = wilson_interval(row['n'], n)
+        choices[row['choice_id']] = {
+            'count': round(share * questions.get(row['question_id'], 0)),
+            'share': share, 'low': low, 'high': high,
+        }
+    return {
+        'respondents': hll_count(bytearray(sketch.registers)),
+        'submissions': sketch.submissions,
+        'answers': answers,
+        'questions': questions,
+        'choices': choices,
+    }
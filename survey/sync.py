@@ -0,0 +1,168 @@
+from functools import partial
+
+from django.db import transaction
+from django.db.models import Prefetch
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from .live import publish_survey_changed
+from .logic import visible_questions
+from .models import Choice, Answer, Submission
+from .sketches import record_responses
+
+
+#? ------------------------------------------------------------------------
+#? Offline survey taking (field teams), see survey_offline_view / survey_sync_view.
+#? - The device downloads the survey definition ONCE: a compact document with the question and
+#?   choice ids it needs to answer, versioned by Survey.updated:
+#?     {"slug": "...", "version": 1760890000.123, "title": "...", "description": "...",
+#?      "questions": [{"id": 3, "title": "...", "type": "multiple_choice", "choices": [[7, "Red"], [8, "Blue"]]}, ...],
+#?      "logic": {...}}   the compiled skip logic (Survey.logic, see logic.py), evaluated on the device
+#? - Responses are collected on the device, then uploaded in batches, many per request:
+#?     {"submissions": [{"client_id": "<uuid from the device>", "submitted_at": "<ISO 8601>",
+#?                       "answers": {"3": 7, "4": "some text"}}, ...]}
+#? - Every submission is validated like the web form (AnswerForm): every question the skip logic shows
+#?   answered, choices belonging to their question, non-empty texts; answers to hidden questions are
+#?   dropped. Bad ones are rejected one by one, the rest is saved.
+#? - Idempotent: client_id is unique per (field worker, survey). A batch re-sent after a lost response
+#?   is recognised and reported as duplicates, nothing is saved twice.
+#? ------------------------------------------------------------------------
+
+SYNC_MAX_SUBMISSIONS = 500
+CLIENT_ID_MAX_LENGTH = Submission._meta.get_field('client_id').max_length
+
+
+def survey_version(survey):
+    return survey.updated.timestamp()
+
+
+def _questions(survey):
+    return survey.questions.order_by('id').prefetch_related(
+        Prefetch('choices', queryset=Choice.objects.order_by('id'))
+    )
+
+
+def survey_definition(survey):
+    #* 2 queries: questions, then all their choices
+    return {
+        'slug': survey.slug,
+        'version': survey_version(survey),
+        'title': survey.title,
+        'description': survey.description or '',
+        'questions': [
+            {
+                'id': question.id,
+                'title': question.title,
+                'type': question.question_type,
+                'choices': [[choice.id, choice.title] for choice in question.choices.all()],
+            }
+            for question in _questions(survey)
+        ],
+        'logic': survey.logic,
+    }
+
+
+def _validate_submission(item, questions, logic):
+    #? returns (client_id, submitted_at, [(question, choice_id, text)]) or raises ValueError(message)
+    if not isinstance(item, dict):
+        raise ValueError('must be an object')
+    client_id = item.get('client_id')
+    if not isinstance(client_id, str) or not client_id or len(client_id) > CLIENT_ID_MAX_LENGTH:
+        raise ValueError(f'needs a client_id (max {CLIENT_ID_MAX_LENGTH} characters)')
+
+    submitted_at = parse_datetime(item['submitted_at']) if isinstance(item.get('submitted_at'), str) else None
+    now = timezone.now()
+    if submitted_at is None:
+        submitted_at = now
+    elif timezone.is_naive(submitted_at):
+        submitted_at = timezone.make_aware(submitted_at)
+    submitted_at = min(submitted_at, now)  #* device clocks drift, never in the future
+
+    answers = item.get('answers')
+    if not isinstance(answers, dict):
+        raise ValueError('"answers" must be an object')
+    picked = []
+    for question_id, (_question, choice_ids) in questions.items():
+        value = answers.get(str(question_id))
+        if type(value) is int and value in choice_ids:
+            picked.append(value)
+    visible = visible_questions(logic, list(questions), picked)
+    rows = []
+    for question_id, (question, choice_ids) in questions.items():
+        if question_id not in visible:
+            continue
+        value = answers.get(str(question_id))
+        if value is None:
+            raise ValueError(f'question {question_id} is not answered')
+        if question.question_type == 'multiple_choice':
+            if type(value) is not int or value not in choice_ids:
+                raise ValueError(f'question {question_id}: not a valid choice')
+            rows.append((question, value, None))
+        else:
+            if not isinstance(value, str) or not value.strip():
+                raise ValueError(f'question {question_id}: the answer must be a non-empty text')
+            rows.append((question, None, value.strip()))
+    unknown = set(answers) - {str(question_id) for question_id in questions}
+    if unknown:
+        raise ValueError(f'unknown questions: {", ".join(sorted(unknown))}')
+    return client_id, submitted_at, rows
+
+
+def sync_submissions(survey, user, items):
+    #? ------------------------------------------------------------------------
+    #? Validates and saves a batch of offline responses uploaded by `user`.
+    #? Fixed number of queries whatever the batch size:
+    #?   questions + choices -> client_ids already known -> insert submissions
+    #?   -> read back their ids -> insert all answers -> update the sketch (sketches.py)
+    #? Returns {'accepted': [client_id, ...], 'duplicates': [...], 'rejected': [{'client_id', 'error'}]}
+    #? ------------------------------------------------------------------------
+    questions = {
+        question.id: (question, {choice.id for choice in question.choices.all()})
+        for question in _questions(survey)
+    }
+    result = {'accepted': [], 'duplicates': [], 'rejected': []}
+    valid = {}
+    for item in items:
+        try:
+            client_id, submitted_at, rows = _validate_submission(item, questions, survey.logic)
+        except ValueError as exc:
+            client_id = item.get('client_id') if isinstance(item, dict) else None
+            result['rejected'].append({'client_id': client_id, 'error': str(exc)})
+            continue
+        if client_id in valid:
+            result['duplicates'].append(client_id)
+            continue
+        valid[client_id] = (submitted_at, rows)
+    if not valid:
+        return result
+
+    with transaction.atomic():
+        known = set(
+            Submission.objects.filter(user=user, survey=survey, client_id__in=list(valid))
+            .values_list('client_id', flat=True)
+        )
+        new = {client_id: entry for client_id, entry in valid.items() if client_id not in known}
+        result['duplicates'].extend(client_id for client_id in valid if client_id in known)
+        if new:
+            #* ignore_conflicts: the same batch racing in twice can't fail, the answers below are ignored the same way
+            Submission.objects.bulk_create([
+                Submission(user=user, survey=survey, client_id=client_id, submitted_at=submitted_at)
+                for client_id, (submitted_at, _rows) in new.items()
+            ], ignore_conflicts=True)
+            submission_ids = dict(
+                Submission.objects.filter(user=user, survey=survey, client_id__in=list(new))
+                .values_list('client_id', 'id')
+            )
+            Answer.objects.bulk_create([
+                Answer(submission_id=submission_ids[client_id], user=user, question=question,
+                       choice_id=choice_id, text_answer=text)
+                for client_id, (_submitted_at, rows) in new.items()
+                for question, choice_id, text in rows
+            ], ignore_conflicts=True)
+            record_responses(survey.id, [
+                (user.pk, [(question.id, choice_id) for question, choice_id, _text in rows])
+                for _submitted_at, rows in new.values()
+            ])
+            transaction.on_commit(partial(publish_survey_changed, survey.id))
+        result['accepted'].extend(new)
+    return result
@@ -1,3 +1,749 @@
-from django.test import TestCase
+import csv
+import json
+import os
+import random
+import shutil
+import tempfile
+from io import StringIO
+from uuid import uuid4
 
-# Create your tests here.
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.exceptions import ValidationError
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.db import IntegrityError
+from django.test import AsyncClient, TestCase, override_settings
+from django.urls import reverse
+
+from .logic import visible_questions
+from .results import answer_counts, survey_counts
+from .archive import archive_survey, close_survey, reopen_survey
+from .deletion import SURVEY_DELETE_ORDER, delete_survey
+from .models import (
+    Survey, Question, Choice, DisplayCondition, Submission, Answer, ArchivedAnswer, SurveyFinalResults, SurveyReport,
+    SurveySketch, QuestionSketch, AnswerSample,
+)
+from .sketches import (
+    HLL_REGISTERS, approximate_counts, hll_add, hll_count, record_responses, reset_sketch, surveys_to_sketch, wilson_interval,
+)
+from .sync import SYNC_MAX_SUBMISSIONS, sync_submissions
+from .transfer import clone_survey
+from .views import SURVEY_LIST_PAGE_SIZE
+
+
+class SurveyTestCase(TestCase):
+    #? a survey with one multiple choice question (yes / no) and one text question, and a respondent
+
+    @classmethod
+    def setUpTestData(cls):
+        User = get_user_model()
+        cls.owner = User.objects.create_user('owner', password='password')
+        cls.respondent = User.objects.create_user('respondent', password='password')
+        cls.survey = Survey.objects.create(user=cls.owner, title='Survey')
+        cls.question = Question.objects.create(survey=cls.survey, title='Well?', question_type='multiple_choice')
+        cls.yes = Choice.objects.create(question=cls.question, title='Yes')
+        cls.no = Choice.objects.create(question=cls.question, title='No')
+        cls.text_question = Question.objects.create(survey=cls.survey, title='Why?', question_type='text')
+
+    def setUp(self):
+        #* rate limit buckets and idempotency keys live in the cache
+        cache.clear()
+        self.client.force_login(self.respondent)
+
+    def response_data(self, choice, text='Because', idempotency_key=None):
+        return {
+            f'answer-{self.question.id}-choice': choice.id,
+            f'answer-{self.text_question.id}-text_answer': text,
+            'idempotency_key': idempotency_key or uuid4().hex,
+        }
+
+    def respond(self, *args, **kwargs):
+        return self.client.post(reverse('survey:response', kwargs={'slug': self.survey.slug}), self.response_data(*args, **kwargs))
+
+
+class ResponseTests(SurveyTestCase):
+
+    def test_response_is_saved(self):
+        response = self.respond(self.yes)
+        self.assertRedirects(response, self.survey.get_absolute_url(), fetch_redirect_response=False)
+        submission = Submission.objects.get(user=self.respondent, survey=self.survey)
+        self.assertEqual(
+            set(submission.answers.values_list('question_id', 'choice_id', 'text_answer')),
+            {(self.question.id, self.yes.id, None), (self.text_question.id, None, 'Because')},
+        )
+
+    def test_double_submit_saves_once(self):
+        key = uuid4().hex
+        self.respond(self.yes, idempotency_key=key)
+        #* the retry carries the same key: nothing is written, even with other answers
+        self.respond(self.no, text='Changed', idempotency_key=key)
+        self.assertEqual(Submission.objects.filter(user=self.respondent, survey=self.survey).count(), 1)
+        self.assertEqual(Answer.objects.filter(user=self.respondent).count(), 2)
+        self.assertEqual(Answer.objects.get(question=self.question).choice, self.yes)
+
+    def test_resubmit_updates_answers(self):
+        self.respond(self.yes)
+        before = dict(Answer.objects.values_list('question_id', 'id'))
+        self.respond(self.no, text='Changed my mind')
+        self.assertEqual(Submission.objects.filter(user=self.respondent, survey=self.survey).count(), 1)
+        self.assertEqual(dict(Answer.objects.values_list('question_id', 'id')), before)
+        self.assertEqual(Answer.objects.get(question=self.question).choice, self.no)
+        self.assertEqual(Answer.objects.get(question=self.text_question).text_answer, 'Changed my mind')
+
+    def test_invalid_response_releases_idempotency_key(self):
+        key = uuid4().hex
+        response = self.respond(self.yes, text='', idempotency_key=key)
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(Submission.objects.exists())
+        self.respond(self.yes, idempotency_key=key)
+        self.assertEqual(Answer.objects.count(), 2)
+
+    @override_settings(SURVEY_RATE_LIMITS={'answer-submit': '2/m', 'answer-sync': '30/m'})
+    def test_rate_limit(self):
+        for _ in range(2):
+            self.assertEqual(self.respond(self.yes).status_code, 302)
+        response = self.respond(self.yes)
+        self.assertEqual(response.status_code, 429)
+        self.assertIn('Retry-After', response.headers)
+        #* viewing the survey spends no tokens
+        response = self.client.get(reverse('survey:response', kwargs={'slug': self.survey.slug}))
+        self.assertEqual(response.status_code, 200)
+
+
+class SubmissionTests(SurveyTestCase):
+
+    def withdraw(self):
+        return self.client.post(reverse('survey:withdraw', kwargs={'slug': self.survey.slug}))
+
+    def test_withdraw_deletes_submission_and_answers(self):
+        self.respond(self.yes)
+        self.withdraw()
+        self.assertFalse(Submission.objects.filter(user=self.respondent, survey=self.survey).exists())
+        self.assertFalse(Answer.objects.exists())
+
+    def test_answer_again_after_withdrawing(self):
+        self.respond(self.yes)
+        self.withdraw()
+        self.respond(self.no)
+        submission = Submission.objects.get(user=self.respondent, survey=self.survey)
+        self.assertEqual(submission.answers.count(), 2)
+        self.assertEqual(submission.answers.get(question=self.question).choice, self.no)
+
+    def test_withdraw_from_closed_survey_is_refused(self):
+        self.respond(self.yes)
+        Survey.objects.filter(pk=self.survey.pk).update(status='closed')
+        self.withdraw()
+        self.assertTrue(Submission.objects.filter(user=self.respondent, survey=self.survey).exists())
+        self.assertEqual(Answer.objects.count(), 2)
+
+    def test_one_answer_per_question_and_submission(self):
+        submission = Submission.objects.create(user=self.respondent, survey=self.survey)
+        Answer.objects.create(submission=submission, user=self.respondent, question=self.question, choice=self.yes)
+        with self.assertRaises(IntegrityError):
+            Answer.objects.create(submission=submission, user=self.respondent, question=self.question, choice=self.no)
+
+
+class ArchiveTests(SurveyTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.respond(self.yes)
+        self.client.force_login(get_user_model().objects.create_user('other'))
+        self.respond(self.no, text='Nope')
+        self.client.force_login(self.respondent)
+
+    def set_status(self, action):
+        self.client.force_login(self.owner)
+        response = self.client.post(reverse('survey:status', kwargs={'slug': self.survey.slug}), {'action': action})
+        self.client.force_login(self.respondent)
+        self.survey.refresh_from_db()
+        return response
+
+    def test_closed_survey_takes_no_answers(self):
+        self.set_status('close')
+        self.assertEqual(self.survey.status, 'closed')
+        self.assertIsNotNone(self.survey.closed_at)
+        Answer.objects.all().delete()
+        self.respond(self.yes)
+        self.assertFalse(Answer.objects.exists())
+        self.set_status('reopen')
+        self.assertTrue(self.survey.is_open)
+        self.assertIsNone(self.survey.closed_at)
+
+    def test_open_survey_is_not_archived(self):
+        with self.assertRaises(ValidationError):
+            archive_survey(self.survey)
+
+    def test_archive_in_batches(self):
+        answers = dict(Answer.objects.values_list('id', 'choice_id'))
+        counts = answer_counts(self.survey.id)
+        close_survey(self.survey)
+        batches = []
+        self.assertEqual(archive_survey(self.survey, batch_size=2, progress=batches.append), 4)
+        self.assertEqual(batches, [2, 4])
+
+        self.assertFalse(Answer.objects.filter(question__survey=self.survey).exists())
+        #* same ids, same survey
+        self.assertEqual(dict(ArchivedAnswer.objects.filter(survey_id=self.survey.id).values_list('id', 'choice_id')), answers)
+        self.survey.refresh_from_db()
+        self.assertIsNotNone(self.survey.archived_at)
+        #* the frozen counts, read from one row
+        self.assertEqual(SurveyFinalResults.objects.get(survey=self.survey).counts['answers'], 4)
+        with self.assertNumQueries(1):
+            self.assertEqual(survey_counts(self.survey), counts)
+        #* nothing left to do
+        self.assertEqual(archive_survey(self.survey), 0)
+
+    def test_interrupted_archive_keeps_the_first_counts(self):
+        counts = answer_counts(self.survey.id)
+        close_survey(self.survey)
+
+        def fail(moved):
+            raise RuntimeError('worker killed')
+
+        with self.assertRaises(RuntimeError):
+            archive_survey(self.survey, batch_size=2, progress=fail)
+        self.assertEqual(Answer.objects.count(), 2)
+        archive_survey(self.survey, batch_size=2)
+        self.assertEqual(ArchivedAnswer.objects.count(), 4)
+        self.assertEqual(survey_counts(self.survey), counts)
+
+    def test_archived_survey_cannot_be_reopened(self):
+        close_survey(self.survey)
+        archive_survey(self.survey)
+        with self.assertRaises(ValidationError):
+            reopen_survey(self.survey)
+        self.set_status('reopen')
+        self.assertEqual(self.survey.status, 'closed')
+
+
+class SyncTests(SurveyTestCase):
+
+    def item(self, client_id, choice=None, text='Because'):
+        return {
+            'client_id': client_id,
+            'submitted_at': '2026-10-19T08:00:00Z',
+            'answers': {str(self.question.id): (choice or self.yes).id, str(self.text_question.id): text},
+        }
+
+    def sync(self, items):
+        return self.client.post(
+            reverse('survey:offline-sync', kwargs={'slug': self.survey.slug}),
+            {'submissions': items},
+            content_type='application/json',
+        )
+
+    def test_accepted(self):
+        result = sync_submissions(self.survey, self.respondent, [self.item('a'), self.item('b', choice=self.no)])
+        self.assertEqual(result, {'accepted': ['a', 'b'], 'duplicates': [], 'rejected': []})
+        self.assertEqual(Submission.objects.filter(user=self.respondent, survey=self.survey).count(), 2)
+        self.assertEqual(Answer.objects.filter(question=self.question, choice=self.no).count(), 1)
+
+    def test_client_id_deduplication(self):
+        sync_submissions(self.survey, self.respondent, [self.item('a')])
+        #* 'a' was already uploaded, 'b' is sent twice in the same batch
+        result = sync_submissions(self.survey, self.respondent, [self.item('a'), self.item('b'), self.item('b')])
+        self.assertEqual(result['accepted'], ['b'])
+        self.assertCountEqual(result['duplicates'], ['a', 'b'])
+        self.assertEqual(Submission.objects.filter(user=self.respondent, survey=self.survey).count(), 2)
+        self.assertEqual(Answer.objects.count(), 4)
+
+    def test_rejected(self):
+        other_survey = Survey.objects.create(user=self.owner, title='Other')
+        other = Choice.objects.create(
+            question=Question.objects.create(survey=other_survey, title='Other', question_type='multiple_choice'),
+            title='Other',
+        )
+        unknown_question = self.item('unknown-question')
+        unknown_question['answers']['999999'] = self.yes.id
+        result = sync_submissions(self.survey, self.respondent, [
+            unknown_question,
+            self.item('unknown-choice', choice=other),
+            self.item('empty-text', text=' '),
+            {'answers': {}},
+        ])
+        self.assertEqual(result['accepted'], [])
+        self.assertEqual(result['rejected'], [
+            {'client_id': 'unknown-question', 'error': 'unknown questions: 999999'},
+            {'client_id': 'unknown-choice', 'error': f'question {self.question.id}: not a valid choice'},
+            {'client_id': 'empty-text', 'error': f'question {self.text_question.id}: the answer must be a non-empty text'},
+            {'client_id': None, 'error': 'needs a client_id (max 64 characters)'},
+        ])
+        self.assertFalse(Submission.objects.exists())
+
+    def test_view(self):
+        response = self.sync([self.item('a'), {'client_id': 'b'}])
+        self.assertEqual(response.status_code, 200)
+        result = response.json()
+        self.assertEqual(result['accepted'], ['a'])
+        self.assertEqual(result['rejected'][0]['client_id'], 'b')
+        self.assertIn('version', result)
+
+    def test_batch_size_cap(self):
+        response = self.sync([self.item(str(number)) for number in range(SYNC_MAX_SUBMISSIONS + 1)])
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(Submission.objects.exists())
+
+    def test_closed_survey(self):
+        Survey.objects.filter(pk=self.survey.pk).update(status='closed')
+        response = self.sync([self.item('a')])
+        self.assertEqual(response.status_code, 409)
+        self.assertFalse(Submission.objects.exists())
+
+
+class SkipLogicTests(SurveyTestCase):
+    #? "Why?" is only asked after a yes
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        DisplayCondition.objects.create(question=cls.text_question, choice=cls.yes)
+
+    def test_hidden_question_is_not_saved(self):
+        #* the text is posted anyway (stale input in the page), it is neither validated nor saved
+        self.respond(self.no, text='')
+        answers = Answer.objects.filter(user=self.respondent)
+        self.assertEqual(list(answers.values_list('question_id', 'choice_id')), [(self.question.id, self.no.id)])
+
+    def test_answer_to_question_hidden_later_is_removed(self):
+        self.respond(self.yes)
+        self.respond(self.no)
+        self.assertEqual(list(Answer.objects.values_list('question_id', flat=True)), [self.question.id])
+
+    def test_chained_conditions(self):
+        #* yes -> "Which?" -> red -> "Why red?"
+        which = Question.objects.create(survey=self.survey, title='Which?', question_type='multiple_choice')
+        red = Choice.objects.create(question=which, title='Red')
+        blue = Choice.objects.create(question=which, title='Blue')
+        why_red = Question.objects.create(survey=self.survey, title='Why red?', question_type='text')
+        DisplayCondition.objects.create(question=which, choice=self.yes)
+        DisplayCondition.objects.create(question=why_red, choice=red)
+        self.survey.refresh_from_db()
+        question_ids = [self.question.id, self.text_question.id, which.id, why_red.id]
+
+        def visible(*choices):
+            return visible_questions(self.survey.logic, question_ids, [choice.id for choice in choices])
+
+        self.assertEqual(visible(self.yes, red), set(question_ids))
+        self.assertEqual(visible(self.yes, blue), {self.question.id, self.text_question.id, which.id})
+        #* red was picked in a question that is hidden now: it doesn't count
+        self.assertEqual(visible(self.no, red), {self.question.id})
+
+    def test_condition_on_later_question_is_invalid(self):
+        later = Question.objects.create(survey=self.survey, title='Later', question_type='multiple_choice')
+        later_choice = Choice.objects.create(question=later, title='Yes')
+        with self.assertRaises(ValidationError):
+            DisplayCondition(question=self.text_question, choice=later_choice).clean()
+        with self.assertRaises(ValidationError):
+            DisplayCondition(question=self.question, choice=self.yes).clean()
+
+    def test_condition_on_other_survey_is_invalid(self):
+        other_survey = Survey.objects.create(user=self.owner, title='Other')
+        other = Choice.objects.create(
+            question=Question.objects.create(survey=other_survey, title='Other', question_type='multiple_choice'),
+            title='Other',
+        )
+        later = Question.objects.create(survey=self.survey, title='Later', question_type='text')
+        with self.assertRaises(ValidationError):
+            DisplayCondition(question=later, choice=other).clean()
+
+
+class SketchTests(SurveyTestCase):
+
+    def test_hll_count(self):
+        registers = bytearray(HLL_REGISTERS)
+        self.assertEqual(hll_count(registers), 0)
+        for count in (100, 1000, 50_000):
+            for user_id in range(count):
+                hll_add(registers, user_id)
+            #* about 1.6% standard error, adding the same ids again changes nothing
+            self.assertAlmostEqual(hll_count(registers), count, delta=count * 0.05)
+            self.assertFalse(hll_add(registers, 0))
+            registers = bytearray(HLL_REGISTERS)
+
+    def test_wilson_interval(self):
+        self.assertEqual(wilson_interval(0, 0), (0.0, 0.0))
+        low, high = wilson_interval(50, 100)
+        self.assertAlmostEqual(low, 0.4038, places=4)
+        self.assertAlmostEqual(high, 0.5962, places=4)
+        #* never outside [0, 1], and narrower with more answers
+        self.assertEqual(wilson_interval(0, 10)[0], 0.0)
+        self.assertEqual(wilson_interval(10, 10)[1], 1.0)
+        low_more, high_more = wilson_interval(5000, 10000)
+        self.assertLess(high_more - low_more, high - low)
+
+    def test_surveys_without_sketch_are_not_recorded(self):
+        record_responses(self.survey.id, [(self.respondent.pk, [(self.question.id, self.yes.id)])])
+        self.assertFalse(SurveySketch.objects.exists())
+        self.assertFalse(QuestionSketch.objects.exists())
+        self.assertFalse(AnswerSample.objects.exists())
+
+    @override_settings(SURVEY_APPROX_SKETCH_FROM=2)
+    def test_surveys_to_sketch(self):
+        self.assertEqual(surveys_to_sketch(), [])
+        self.respond(self.yes)
+        self.assertEqual(surveys_to_sketch(), [self.survey.id])
+        reset_sketch(self.survey.id)
+        self.assertEqual(surveys_to_sketch(), [])
+
+    @override_settings(SURVEY_APPROX_SAMPLE_SIZE=100)
+    def test_reservoir(self):
+        reset_sketch(self.survey.id)
+        rng = random.Random(0)
+        #* 30% yes, in batches like the offline sync
+        responses = [
+            (user_id, [(self.question.id, (self.yes if user_id % 10 < 3 else self.no).id), (self.text_question.id, None)])
+            for user_id in range(10_000)
+        ]
+        for start in range(0, len(responses), 500):
+            record_responses(self.survey.id, responses[start:start + 500], rng=rng)
+
+        sketch = SurveySketch.objects.get(survey=self.survey)
+        self.assertEqual(sketch.submissions, 10_000)
+        self.assertEqual(
+            dict(QuestionSketch.objects.values_list('question_id', 'seen')),
+            {self.question.id: 10_000, self.text_question.id: 10_000},
+        )
+        #* every slot is filled once, text answers are not sampled
+        samples = AnswerSample.objects.filter(question=self.question)
+        self.assertEqual(sorted(samples.values_list('slot', flat=True)), list(range(100)))
+        self.assertFalse(AnswerSample.objects.filter(question=self.text_question).exists())
+
+        counts = approximate_counts(self.survey.id, threshold=1)
+        self.assertAlmostEqual(counts['respondents'], 10_000, delta=500)
+        self.assertEqual(counts['answers'], 20_000)
+        yes = counts['choices'][self.yes.id]
+        self.assertLessEqual(yes['low'], 0.3)
+        self.assertGreaterEqual(yes['high'], 0.3)
+        self.assertEqual(yes['count'] + counts['choices'][self.no.id]['count'], 10_000)
+        self.assertIsNone(approximate_counts(self.survey.id, threshold=20_001))
+
+    @override_settings(SURVEY_APPROX_SAMPLE_SIZE=10)
+    def test_first_answers_fill_the_reservoir_in_order(self):
+        reset_sketch(self.survey.id)
+        record_responses(self.survey.id, [(1, [(self.question.id, self.yes.id)])] * 4)
+        record_responses(self.survey.id, [(2, [(self.question.id, self.no.id)])] * 4)
+        self.assertEqual(
+            list(AnswerSample.objects.order_by('slot').values_list('choice_id', flat=True)),
+            [self.yes.id] * 4 + [self.no.id] * 4,
+        )
+        #* a question added after the sketch was started gets its counter on its first answer
+        later = Question.objects.create(survey=self.survey, title='Later', question_type='text')
+        record_responses(self.survey.id, [(3, [(later.id, None)])])
+        self.assertEqual(QuestionSketch.objects.get(question=later).seen, 1)
+        self.assertEqual(SurveySketch.objects.get(survey=self.survey).submissions, 9)
+
+
+class SurveyListTests(SurveyTestCase):
+
+    def test_next_page_link_is_encoded(self):
+        Survey.objects.bulk_create([Survey(user=self.owner, title=f'Survey {n}', slug=f'survey-{n}') for n in range(SURVEY_LIST_PAGE_SIZE)])
+        response = self.client.get(reverse('survey:list'), {'scope': 'all" onclick="x&y'}, HTTP_HX_REQUEST='true')
+        self.assertContains(response, '?scope=all%22+onclick%3D%22x%26y&amp;cursor=')
+        self.assertNotContains(response, 'onclick="')
+
+
+class ImportTests(SurveyTestCase):
+
+    @override_settings(SURVEY_IMPORT_MAX_SIZE=10)
+    def test_file_too_large(self):
+        upload = SimpleUploadedFile('survey.json', b'{"title": "Too large"}', content_type='application/json')
+        response = self.client.post(reverse('survey:import'), {'file': upload})
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('too large', response.context['form'].errors['file'][0])
+        self.assertEqual(Survey.objects.count(), 1)
+
+
+class LiveResultsTests(SurveyTestCase):
+
+    def live_url(self):
+        return reverse('survey:live-results', kwargs={'slug': self.survey.slug})
+
+    async def test_stream_starts_with_counts(self):
+        await Answer.objects.acreate(
+            submission=await Submission.objects.acreate(user=self.respondent, survey=self.survey),
+            user=self.respondent, question=self.question, choice=self.yes,
+        )
+        client = AsyncClient()
+        await client.aforce_login(self.owner)
+        response = await client.get(self.live_url())
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], 'text/event-stream')
+        events = aiter(response.streaming_content)
+        event = (await anext(events)).decode()
+        self.assertTrue(event.startswith('event: counts\n'))
+        counts = json.loads(event.split('data: ', 1)[1])
+        self.assertEqual(counts['answers'], 1)
+        self.assertEqual(counts['choices'][str(self.yes.id)], 1)
+        await events.aclose()
+
+    async def test_stream_is_for_the_owner_only(self):
+        client = AsyncClient()
+        await client.aforce_login(self.respondent)
+        response = await client.get(self.live_url())
+        self.assertEqual(response.status_code, 404)
+
+    def test_wsgi_sends_counts_and_ends(self):
+        self.client.force_login(self.owner)
+        response = self.client.get(self.live_url())
+        self.assertFalse(response.streaming)
+        body = response.content.decode()
+        self.assertTrue(body.startswith('retry: '))
+        self.assertIn('event: counts\n', body)
+
+
+class QuestionPartialTests(SurveyTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.client.force_login(self.owner)
+        self.url = self.question.get_update_url()
+
+    def test_matching_etag_gets_304(self):
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        etag = response['ETag']
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response.content, b'')
+
+    def test_etag_does_not_carry_the_csrf_secret(self):
+        response = self.client.get(self.url)
+        secret = response.wsgi_request.META['CSRF_COOKIE']
+        self.assertTrue(secret)
+        self.assertNotIn(secret, response['ETag'])
+
+    def test_etag_changes_when_the_question_is_edited(self):
+        etag = self.client.get(self.url)['ETag']
+        self.question.title = 'Really?'
+        self.question.save()
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+
+    def test_post_skips_the_conditional_path(self):
+        #* with the preconditions applied, a stale If-Match would get 412 and the edit would be lost
+        response = self.client.post(self.url, {
+            'title': 'Why not?', 'question_type': 'text', 'prefix': f'choice-{self.question.id}',
+        }, HTTP_IF_MATCH='"stale"')
+        self.assertEqual(response.status_code, 200)
+        self.question.refresh_from_db()
+        self.assertEqual(self.question.title, 'Why not?')
+
+
+class ApiTests(SurveyTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.url = reverse('api:survey', kwargs={'slug': self.survey.slug})
+
+    def test_survey_with_questions_and_choices(self):
+        DisplayCondition.objects.create(question=self.text_question, choice=self.yes)
+        response = self.client.get(self.url, {'include': 'questions.choices'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], 'application/json')
+        document = json.loads(response.content)
+        self.assertEqual(document['slug'], self.survey.slug)
+        self.assertEqual(document['author'], 'owner')
+        self.assertEqual(document['logic']['shown_if'], {str(self.text_question.id): [self.yes.id]})
+        self.assertEqual(document['questions'], [
+            {'id': self.question.id, 'title': 'Well?', 'type': 'multiple_choice', 'choices': [
+                {'id': self.yes.id, 'title': 'Yes'}, {'id': self.no.id, 'title': 'No'},
+            ]},
+            {'id': self.text_question.id, 'title': 'Why?', 'type': 'text', 'choices': []},
+        ])
+
+    def test_sparse_fieldsets(self):
+        response = self.client.get(self.url, {'fields': 'title', 'fields[question]': 'title', 'include': 'questions'})
+        self.assertEqual(json.loads(response.content), {'title': 'Survey', 'questions': [{'title': 'Well?'}, {'title': 'Why?'}]})
+
+    def test_questions_are_opt_in(self):
+        self.assertNotIn('questions', json.loads(self.client.get(self.url).content))
+
+    def test_unknown_field_is_400(self):
+        response = self.client.get(self.url, {'fields': 'title,password'})
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('password', response.json()['error'])
+
+    def test_missing_survey_is_404(self):
+        response = self.client.get(reverse('api:survey', kwargs={'slug': 'missing'}))
+        self.assertEqual(response.status_code, 404)
+        self.assertEqual(response.json(), {'error': 'Survey not found.'})
+
+    def test_other_users_survey_being_deleted_is_404(self):
+        #* public like the detail page, except while its owner deletes it (see deletion.py)
+        self.assertEqual(self.client.get(self.url).status_code, 200)
+        Survey.objects.filter(pk=self.survey.pk).update(status='deleting')
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 404)
+        self.assertFalse(response.has_header('ETag'))
+
+    def test_cache_headers(self):
+        response = self.client.get(self.url)
+        self.assertEqual(set(response['Cache-Control'].split(', ')), {'public', 'no-cache'})
+        self.assertTrue(response['ETag'])
+
+    def test_matching_etag_gets_304_until_the_survey_changes(self):
+        etag = self.client.get(self.url)['ETag']
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response.content, b'')
+        self.survey.title = 'Renamed'
+        self.survey.save()
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+        self.assertEqual(response.json()['title'], 'Renamed')
+
+
+class DeleteSurveyTests(SurveyTestCase):
+
+    def setUp(self):
+        super().setUp()
+        DisplayCondition.objects.create(question=self.text_question, choice=self.yes)
+        reset_sketch(self.survey.id)
+        self.respond(self.yes)
+        other = get_user_model().objects.create_user('other')
+        self.client.force_login(other)
+        self.respond(self.no)
+        ArchivedAnswer.objects.create(id=10_000, survey_id=self.survey.id, question_id=self.question.id, user_id=other.pk)
+        SurveyFinalResults.objects.create(survey=self.survey, counts={})
+        SurveyReport.objects.create(survey=self.survey, watermark='x')
+        #* another survey, which must not be touched
+        self.kept = Survey.objects.create(user=self.owner, title='Kept')
+        Question.objects.create(survey=self.kept, title='Kept?', question_type='text')
+
+    def assert_survey_gone(self):
+        self.assertFalse(Survey.objects.filter(pk=self.survey.pk).exists())
+        for model, lookup in SURVEY_DELETE_ORDER:
+            self.assertFalse(model.objects.filter(**{lookup: self.survey.pk}).exists(), model)
+        self.assertEqual(self.kept.questions.count(), 1)
+
+    def test_delete_survey(self):
+        deleted = delete_survey(self.survey, batch_size=2)
+        self.assertEqual(deleted, {
+            'survey.Answer': 3,
+            'survey.Submission': 2,
+            'survey.ArchivedAnswer': 1,
+            'survey.DisplayCondition': 1,
+            'survey.AnswerSample': 2,
+            'survey.QuestionSketch': 2,
+            'survey.Choice': 2,
+            'survey.Question': 2,
+            'survey.SurveyFinalResults': 1,
+            'survey.SurveyReport': 1,
+            'survey.SurveySketch': 1,
+            'survey.Survey': 1,
+        })
+        self.assert_survey_gone()
+
+    def test_interrupted_delete_is_resumed(self):
+        def fail(model, deleted):
+            if model is Submission:
+                raise RuntimeError('worker killed')
+
+        with self.assertRaises(RuntimeError):
+            delete_survey(self.survey, progress=fail)
+        self.survey.refresh_from_db()
+        self.assertEqual(self.survey.status, 'deleting')
+        #* half deleted: no answers taken, not listed
+        self.assertEqual(self.respond(self.yes).status_code, 302)
+        self.assertFalse(Answer.objects.filter(question__survey=self.survey).exists())
+        response = self.client.get(reverse('survey:list'))
+        self.assertNotContains(response, self.survey.get_absolute_url())
+
+        delete_survey(self.survey)
+        self.assert_survey_gone()
+
+
+class CloneSurveyTests(SurveyTestCase):
+
+    def test_clone_remaps_questions_choices_and_conditions(self):
+        DisplayCondition.objects.create(question=self.text_question, choice=self.yes)
+        self.survey.refresh_from_db()
+        source_questions = set(self.survey.questions.values_list('id', flat=True))
+        source_choices = set(Choice.objects.filter(question__survey=self.survey).values_list('id', flat=True))
+
+        copy = clone_survey(self.survey, user=self.respondent)
+        copy.refresh_from_db()
+        self.assertEqual(copy.user, self.respondent)
+        self.assertNotEqual(copy.slug, self.survey.slug)
+        self.assertEqual(Survey.objects.filter(slug=copy.slug).count(), 1)
+
+        questions = {question.title: question for question in copy.questions.all()}
+        self.assertEqual(set(questions), {'Well?', 'Why?'})
+        self.assertFalse(source_questions & {question.id for question in questions.values()})
+        choices = {choice.title: choice for choice in Choice.objects.filter(question__survey=copy)}
+        self.assertEqual(set(choices), {'Yes', 'No'})
+        self.assertFalse(source_choices & {choice.id for choice in choices.values()})
+        self.assertEqual({choice.question_id for choice in choices.values()}, {questions['Well?'].id})
+
+        condition = DisplayCondition.objects.get(question__survey=copy)
+        self.assertEqual((condition.question_id, condition.choice_id), (questions['Why?'].id, choices['Yes'].id))
+        self.assertEqual(copy.logic['shown_if'], {str(questions['Why?'].id): [choices['Yes'].id]})
+        self.assertEqual(copy.logic['owner'], {str(choices['Yes'].id): questions['Well?'].id})
+        #* the source is untouched
+        self.assertEqual(DisplayCondition.objects.filter(question__survey=self.survey).count(), 1)
+
+    def test_clones_get_unique_slugs(self):
+        slugs = {self.survey.slug, clone_survey(self.survey).slug, clone_survey(self.survey).slug}
+        self.assertEqual(len(slugs), 3)
+
+
+class GenerateReportsTests(SurveyTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory)
+        self.respond(self.yes)
+        self.client.force_login(get_user_model().objects.create_user('other'))
+        self.respond(self.no)
+
+    def generate(self):
+        out = StringIO()
+        call_command('generate_reports', '--output', self.directory, '--workers', '1', stdout=out)
+        return out.getvalue()
+
+    def read_csv(self, name):
+        with open(os.path.join(self.directory, name), newline='', encoding='utf-8') as file:
+            return list(csv.reader(file))
+
+    def test_report_files(self):
+        self.assertIn('1 of 1 surveys changed', self.generate())
+        slug = self.survey.slug
+        self.assertEqual(sorted(os.listdir(self.directory)), [f'{slug}-crosstabs.csv', f'{slug}.csv', f'{slug}.html'])
+        self.assertEqual(self.read_csv(f'{slug}.csv'), [
+            ['question', 'type', 'choice', 'count', 'share'],
+            ['Well?', 'multiple_choice', 'Yes', '1', '0.5000'],
+            ['Well?', 'multiple_choice', 'No', '1', '0.5000'],
+            ['Why?', 'text', '', '2', ''],
+        ])
+        with open(os.path.join(self.directory, f'{slug}.html'), encoding='utf-8') as file:
+            self.assertIn('Well?', file.read())
+        self.assertTrue(SurveyReport.objects.filter(survey=self.survey).exists())
+
+    def test_crosstabs(self):
+        again = Question.objects.create(survey=self.survey, title='Again?', question_type='multiple_choice')
+        again_yes = Choice.objects.create(question=again, title='Yes')
+        Choice.objects.create(question=again, title='No')
+        for submission in Submission.objects.all():
+            Answer.objects.create(submission=submission, user=submission.user, question=again, choice=again_yes)
+        self.generate()
+        rows = self.read_csv(f'{self.survey.slug}-crosstabs.csv')
+        self.assertIn(['Well?', 'Yes', 'Again?', 'Yes', '1'], rows)
+        self.assertIn(['Well?', 'No', 'Again?', 'Yes', '1'], rows)
+        self.assertIn(['Well?', 'No', 'Again?', 'No', '0'], rows)
+
+    def test_unchanged_surveys_are_skipped(self):
+        self.generate()
+        path = os.path.join(self.directory, f'{self.survey.slug}.csv')
+        os.utime(path, (0, 0))
+        self.assertIn('0 of 1 surveys changed', self.generate())
+        self.assertEqual(os.path.getmtime(path), 0)
+        #* a new response changes the watermark
+        self.client.force_login(get_user_model().objects.create_user('third'))
+        self.respond(self.yes)
+        self.assertIn('1 of 1 surveys changed', self.generate())
+        self.assertNotEqual(os.path.getmtime(path), 0)
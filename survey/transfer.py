@@ -0,0 +1,236 @@
+import json
+
+from django.core.exceptions import ValidationError
+from django.db import connection, transaction
+from django.db.models import Prefetch
+
+from .logic import compile_survey_logic
+from .models import Survey, Question, Choice, DisplayCondition
+
+try:
+    import msgpack
+except ImportError:  #* optional dependency, only needed for the msgpack format
+    msgpack = None
+
+
+#? ------------------------------------------------------------------------
+#? Import / export of whole surveys (survey + questions + choices).
+#? - The exported document is plain data, no database ids, so it can be loaded into any environment:
+#?     {"version": 1, "title": "...", "description": "...",
+#?      "questions": [{"title": "...", "question_type": "multiple_choice", "choices": ["Red", "Blue"]}, ...]}
+#?   A question with skip logic also has "show_if": [{"question": 0, "choice": 1}, ...]: positions of an
+#?   earlier question in "questions" and of one of its choices (shown if any of them was picked).
+#? - Two encodings of the same document: JSON (readable) and MessagePack (compact, needs `msgpack`).
+#? - Import runs in one transaction and inserts questions and choices with bulk_create, so a survey with
+#?   hundreds of questions costs a handful of queries instead of one HTMX round trip per question.
+#? - clone_survey copies a survey inside the same database the same way, remapping the foreign keys.
+#? ------------------------------------------------------------------------
+
+FORMAT_VERSION = 1
+FORMATS = ('json', 'msgpack')
+CONTENT_TYPES = {
+    'json': 'application/json',
+    'msgpack': 'application/msgpack',
+}
+QUESTION_TYPES = {value for value, _label in Question._meta.get_field('question_type').choices}
+
+
+def detect_format(filename, default='json'):
+    #* guess the encoding from a file name, e.g. "customer-survey.msgpack"
+    if filename and filename.lower().endswith(('.msgpack', '.mpk')):
+        return 'msgpack'
+    if filename and filename.lower().endswith('.json'):
+        return 'json'
+    return default
+
+
+def export_survey(survey):
+    #* 3 queries: questions, all their choices (prefetch), all the conditions. ordered by id = creation order
+    questions = list(survey.questions.order_by('id').prefetch_related(
+        Prefetch('choices', queryset=Choice.objects.order_by('id'))
+    ))
+    question_index = {question.id: n for n, question in enumerate(questions)}
+    choice_index = {choice.id: n for question in questions for n, choice in enumerate(question.choices.all())}
+    choice_question = {choice.id: question.id for question in questions for choice in question.choices.all()}
+    show_if = {}
+    if survey.logic:
+        for question_id, choice_id in (
+            DisplayCondition.objects.filter(question__survey=survey).order_by('id').values_list('question_id', 'choice_id')
+        ):
+            show_if.setdefault(question_id, []).append(
+                {'question': question_index[choice_question[choice_id]], 'choice': choice_index[choice_id]}
+            )
+
+    exported = []
+    for question in questions:
+        item = {
+            'title': question.title,
+            'question_type': question.question_type,
+            'choices': [choice.title for choice in question.choices.all()],
+        }
+        if question.id in show_if:
+            item['show_if'] = show_if[question.id]
+        exported.append(item)
+    return {
+        'version': FORMAT_VERSION,
+        'title': survey.title,
+        'description': survey.description or '',
+        'questions': exported,
+    }
+
+
+def dumps(data, fmt='json'):
+    if fmt == 'msgpack':
+        if msgpack is None:
+            raise ValidationError('MessagePack support needs the "msgpack" package.')
+        return msgpack.packb(data, use_bin_type=True)
+    return json.dumps(data, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+
+
+def loads(raw, fmt='json'):
+    try:
+        if fmt == 'msgpack':
+            if msgpack is None:
+                raise ValidationError('MessagePack support needs the "msgpack" package.')
+            return msgpack.unpackb(raw, raw=False)
+        return json.loads(raw)
+    except ValidationError:
+        raise
+    except Exception as exc:  #* json / msgpack raise different error types for broken input
+        raise ValidationError(f'Could not read the survey file: {exc}')
+
+
+def validate_survey_data(data):
+    #? Same rules the editor enforces (forms.py / BaseChoiceFormset.clean), checked up front so a bad file
+    #? fails before anything is written.
+    if not isinstance(data, dict):
+        raise ValidationError('The survey file must contain an object.')
+    if data.get('version') != FORMAT_VERSION:
+        raise ValidationError(f'Unsupported survey file version: {data.get("version")!r}')
+
+    title = data.get('title')
+    if not isinstance(title, str) or not title.strip() or len(title) > 255:
+        raise ValidationError('The survey needs a title (max 255 characters).')
+    if not isinstance(data.get('description', ''), (str, type(None))):
+        raise ValidationError('The survey description must be text.')
+
+    questions = data.get('questions', [])
+    if not isinstance(questions, list):
+        raise ValidationError('"questions" must be a list.')
+    for number, question in enumerate(questions, start=1):
+        if not isinstance(question, dict):
+            raise ValidationError(f'Question {number} must be an object.')
+        q_title = question.get('title')
+        if not isinstance(q_title, str) or not q_title.strip() or len(q_title) > 255:
+            raise ValidationError(f'Question {number} needs a title (max 255 characters).')
+        if question.get('question_type') not in QUESTION_TYPES:
+            raise ValidationError(f'Question {number} has an unknown type: {question.get("question_type")!r}')
+        choices = question.get('choices', [])
+        if not isinstance(choices, list) or not all(isinstance(c, str) and c.strip() and len(c) <= 255 for c in choices):
+            raise ValidationError(f'Question {number} has invalid choices.')
+        if question['question_type'] == 'multiple_choice' and len(choices) < 2:
+            raise ValidationError(f'Question {number}: a multiple-choice question must have at least 2 choices')
+        if question['question_type'] == 'text' and choices:
+            raise ValidationError(f'Question {number}: a text question cannot have choices')
+        show_if = question.get('show_if', [])
+        if not isinstance(show_if, list):
+            raise ValidationError(f'Question {number}: "show_if" must be a list.')
+        for condition in show_if:
+            #* only earlier questions, like DisplayCondition.clean
+            target = condition.get('question') if isinstance(condition, dict) else None
+            if not isinstance(target, int) or not 0 <= target < number - 1:
+                raise ValidationError(f'Question {number}: a condition must point to an earlier question.')
+            if not isinstance(condition.get('choice'), int) or not 0 <= condition['choice'] < len(questions[target].get('choices', [])):
+                raise ValidationError(f'Question {number}: a condition points to a choice that does not exist.')
+    return data
+
+
+def import_survey(data, user):
+    #? Creates a brand new survey owned by `user` from an exported document and returns it.
+    validate_survey_data(data)
+    questions_data = data.get('questions', [])
+
+    with transaction.atomic():
+        survey = Survey(user=user, title=data['title'].strip(), description=data.get('description') or None)
+        survey.save()
+
+        questions = [
+            Question(survey=survey, title=q['title'].strip(), question_type=q['question_type'])
+            for q in questions_data
+        ]
+        bulk_create_returning(questions)
+
+        choices = [
+            [Choice(question=question, title=title.strip()) for title in q.get('choices', [])]
+            for question, q in zip(questions, questions_data)
+        ]
+        bulk_create_returning([choice for question_choices in choices for choice in question_choices])
+
+        conditions = [
+            DisplayCondition(question=question, choice=choices[c['question']][c['choice']])
+            for question, q in zip(questions, questions_data)
+            for c in q.get('show_if', [])
+        ]
+        if conditions:
+            DisplayCondition.objects.bulk_create(conditions, ignore_conflicts=True)
+            survey.logic = compile_survey_logic(survey.id)
+    return survey
+
+
+def clone_survey(survey, user=None):
+    #? ------------------------------------------------------------------------
+    #? Copy a survey with all its questions and choices, owned by `user` (default: same owner).
+    #? Fixed number of queries whatever the size of the survey:
+    #?   read questions + read choices (values(), no model instances)
+    #?   -> slug lookup + insert survey -> bulk insert questions -> bulk insert choices
+    #?   (+ skip logic: read conditions -> bulk insert conditions -> compile)
+    #? The old question/choice ids are mapped to the new ones so every choice lands on its copied question.
+    #? ------------------------------------------------------------------------
+    questions = list(survey.questions.order_by('id').values('id', 'title', 'question_type'))
+    choices = list(
+        Choice.objects.filter(question__survey=survey).order_by('id').values('id', 'question_id', 'title')
+    )
+    conditions = []
+    if survey.logic:
+        conditions = list(
+            DisplayCondition.objects.filter(question__survey=survey).values_list('question_id', 'choice_id')
+        )
+
+    with transaction.atomic():
+        new_survey = Survey(
+            user=user or survey.user,
+            title=f'{survey.title} (copy)'[:255],
+            description=survey.description,
+        )
+        new_survey.save()
+
+        new_questions = [
+            Question(survey=new_survey, title=q['title'], question_type=q['question_type'])
+            for q in questions
+        ]
+        bulk_create_returning(new_questions)
+        question_ids = {old['id']: new.pk for old, new in zip(questions, new_questions)}
+
+        new_choices = [Choice(question_id=question_ids[c['question_id']], title=c['title']) for c in choices]
+        bulk_create_returning(new_choices)
+        choice_ids = {old['id']: new.pk for old, new in zip(choices, new_choices)}
+
+        if conditions:
+            DisplayCondition.objects.bulk_create([
+                DisplayCondition(question_id=question_ids[question_id], choice_id=choice_ids[choice_id])
+                for question_id, choice_id in conditions
+            ])
+            new_survey.logic = compile_survey_logic(new_survey.id)
+    return new_survey
+
+
+def bulk_create_returning(objs):
+    #* children are inserted right after their parents, so we need the new pks back
+    if not objs:
+        return objs
+    if connection.features.can_return_rows_from_bulk_insert:
+        return type(objs[0]).objects.bulk_create(objs)
+    #! this backend can't give us the new pks from a bulk insert
+    for obj in objs:
+        obj.save()
+    return objs
@@ -1,9 +1,21 @@
 from django.urls import path
 from .views import (
+    survey_list_view,
     survey_creation_view, 
     survey_edit_view, 
     survey_detail_view, 
     survey_delete_view, 
+    survey_export_view,
+    survey_import_view,
+    survey_duplicate_view,
+    survey_status_view,
+    survey_results_view,
+    survey_live_results_view,
+    survey_response_view,
+    survey_withdraw_view,
+    survey_offline_view,
+    survey_definition_view,
+    survey_sync_view,
     question_create_view,
     question_update_view,
     question_delete_view,
@@ -15,6 +27,9 @@ from .views import (
 app_name = 'survey'
 urlpatterns = [
 
+    #* keyset-paginated listing, HTMX infinite scroll (profile page + home page)
+    path("list/", survey_list_view, name="list"),
+
     #* survey basic CRUD
     #* create-title is just the title form alone, then it goes to edit
     path("<slug:slug>/detail/", survey_detail_view , name="detail"),
@@ -22,6 +37,27 @@ urlpatterns = [
     path("<slug:slug>/edit/", survey_edit_view, name="edit"),
     path("<slug:slug>/delete/", survey_delete_view, name="delete"),
 
+    #* whole-survey import/export (JSON or MessagePack), see transfer.py
+    path("<slug:slug>/export/", survey_export_view, name="export"),
+    path("import/", survey_import_view, name="import"),
+    path("<slug:slug>/duplicate/", survey_duplicate_view, name="duplicate"),
+
+    #* lifecycle: close / reopen (closed surveys can have their answers archived, see archive.py)
+    path("<slug:slug>/status/", survey_status_view, name="status"),
+
+    #* respondents: answer the survey (one POST for all questions)
+    path("<slug:slug>/response/", survey_response_view, name="response"),
+    path("<slug:slug>/response/delete/", survey_withdraw_view, name="withdraw"),
+
+    #* field mode: definition downloaded once, responses collected offline and synced in batches (see sync.py)
+    path("<slug:slug>/offline/", survey_offline_view, name="offline"),
+    path("<slug:slug>/offline/definition/", survey_definition_view, name="offline-definition"),
+    path("<slug:slug>/offline/sync/", survey_sync_view, name="offline-sync"),
+
+    #* results for the owner + live updates (Server-Sent Events)
+    path("<slug:slug>/results/", survey_results_view, name="results"),
+    path("<slug:slug>/results/live/", survey_live_results_view, name="live-results"),
+
     #* Question CRUD (HTMX-friendly endpoints)
     #* note: update view used for editing a specific question (HTMX swaps par-question.html / par-question-form.html)
     path("<slug:parent_slug>/question/<int:id>/update/", question_update_view ,name="question-update"),
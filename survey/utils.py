@@ -1,23 +1,39 @@
 from django.utils.text import slugify
+from django.db.models import Q
+from django.views.decorators.http import condition
+from functools import wraps
+from base64 import urlsafe_b64encode, urlsafe_b64decode
+from datetime import date
 from uuid import uuid4
+import binascii
 import re
 
 # Regex to detect our temporary prefixes of the form 'choice-new-<hex>'
 TEMP_PREFIX_RE = re.compile(r'^choice-new-[0-9a-f]{8}$')
 
 def slugify_instance_name(instance, save=False):
-    slug = slugify(instance.title)
-    uslug = slugify(instance.title)
-    n = 1
-    Klass = instance.__class__
-    while Klass.objects.filter(slug__startswith=uslug).exclude(id=instance.id).exists():
-        uslug = f'{slug}-{n}'
-        n += 1
-    instance.slug = uslug
+    instance.slug = generate_unique_slug(instance.__class__, instance.title, exclude_id=instance.id)
     if save:
         instance.save()
 
 
+def generate_unique_slug(Klass, title, exclude_id=None):
+    #? One query no matter how many "title-<n>" slugs already exist: load every slug sharing the base
+    #? and pick the first free suffix in python, instead of one .exists() query per taken suffix.
+    #* leave room for the "-<n>" suffix, SlugField is max 50 chars
+    slug_length = Klass._meta.get_field('slug').max_length
+    base = slugify(title)[:slug_length - 8].strip('-') or 'survey'
+    taken = set(
+        Klass.objects.filter(slug__startswith=base).exclude(id=exclude_id).values_list('slug', flat=True)
+    )
+    uslug = base
+    n = 1
+    while uslug in taken:
+        uslug = f'{base}-{n}'
+        n += 1
+    return uslug
+
+
 def generate_temp_prefix():
     return f'choice-new-{uuid4().hex[:8]}'
     # Generate a short, quasi-unique prefix for a new-unpersisted question formset.
@@ -34,3 +50,64 @@ def is_temp_prefix(prefix):
     # Return True when the prefix looks like one generated by generate_temp_prefix.
 
 
+#? ------------------------------------------------------------------------
+#? Keyset (cursor) pagination for survey listings.
+#? - OFFSET pagination makes the DB walk and throw away every skipped row, so deep pages get slower.
+#? - Instead we remember the (created, id) of the last row we sent, and the next page is simply
+#?   "everything strictly after that position" in the same ordering. With an index on (created, id)
+#?   every page costs the same, no matter how deep the user scrolls.
+#? - The cursor is opaque to the client (urlsafe base64 of "created|id").
+#? ------------------------------------------------------------------------
+def encode_cursor(created, pk):
+    raw = f'{created.isoformat()}|{pk}'
+    return urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor):
+    #* returns (created, pk) or None when the cursor is missing or was tampered with
+    if not cursor:
+        return None
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        created, pk = urlsafe_b64decode(padded.encode()).decode().split('|')
+        return date.fromisoformat(created), int(pk)
+    except (ValueError, TypeError, UnicodeDecodeError, binascii.Error):
+        return None
+
+
+def keyset_page(queryset, cursor=None, page_size=20):
+    #? newest first. id breaks ties between surveys created on the same day, so the order is total
+    #? and no row can be skipped or repeated between pages.
+    qs = queryset.order_by('-created', '-id')
+    position = decode_cursor(cursor)
+    if position:
+        created, pk = position
+        qs = qs.filter(Q(created__lt=created) | Q(created=created, id__lt=pk))
+
+    #* fetch one extra row just to know if there is a next page, no COUNT(*) needed
+    rows = list(qs[:page_size + 1])
+    next_cursor = None
+    if len(rows) > page_size:
+        rows = rows[:page_size]
+        last = rows[-1]
+        next_cursor = encode_cursor(last.created, last.id)
+    return rows, next_cursor
+
+
+def conditional_get(etag_func=None, last_modified_func=None):
+    #? ------------------------------------------------------------------------
+    #? Like django's @condition, but only for GET/HEAD: POSTs to the same HTMX endpoints
+    #? (saving a question, adding a choice) skip the version lookup entirely.
+    #? A matching If-None-Match / If-Modified-Since returns "304 Not Modified" without running the view,
+    #? so re-fetching the same question fragment costs one tiny query and no body.
+    #? ------------------------------------------------------------------------
+    def decorator(view):
+        conditional_view = condition(etag_func=etag_func, last_modified_func=last_modified_func)(view)
+
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            if request.method in ('GET', 'HEAD'):
+                return conditional_view(request, *args, **kwargs)
+            return view(request, *args, **kwargs)
+        return wrapper
+    return decorator
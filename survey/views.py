@@ -1,12 +1,36 @@
+import asyncio
+from functools import partial
+import hashlib
+import json
+from urllib.parse import urlencode
+from uuid import uuid4
 from django.shortcuts import render, redirect, get_object_or_404, HttpResponse 
 from django.urls import reverse
-from django.http import Http404
+from django.core.handlers.asgi import ASGIRequest
+from django.middleware.csrf import get_token
+from django.http import Http404, StreamingHttpResponse, JsonResponse
 from django.db import transaction
-from .forms import SurveyCreationForm, QuestionForm, SurveyTitleForm, ChoiceForm, ChoiceFormSetCreate, ChoiceFormSetUpdate
+from django.db.models import Prefetch
+from django.core.cache import cache
+from django.core.exceptions import ValidationError
+from .forms import SurveyCreationForm, QuestionForm, SurveyTitleForm, ChoiceForm, ChoiceFormSetCreate, ChoiceFormSetUpdate, SurveyImportForm, AnswerForm
 from django.contrib import messages
 from django.contrib.auth.decorators import login_required
-from .models import Survey, Question, Answer, Choice
-from .utils import generate_stable_prefix, generate_temp_prefix
+from django.views.decorators.cache import cache_control
+from django.views.decorators.gzip import gzip_page
+from django.views.decorators.http import require_POST
+from .models import Survey, Question, Answer, Choice, Submission
+from DjSurvey.routers import replica_reads
+from .utils import generate_stable_prefix, generate_temp_prefix, keyset_page, conditional_get
+from .live import get_broker, survey_channel, publish_survey_changed
+from .results import survey_counts, asurvey_counts
+from .sketches import approximate_counts
+from .archive import close_survey, reopen_survey
+from .deletion import delete_survey, delete_submission
+from .ratelimit import ratelimit
+from .responses import save_response
+from .logic import visible_questions
+from .sync import SYNC_MAX_SUBMISSIONS, survey_definition, survey_version, sync_submissions
 
 #? ------------------------------------------------------------------------
 #? Views for the survey app.
@@ -17,16 +41,69 @@ from .utils import generate_stable_prefix, generate_temp_prefix
 #? - question_create_view  -> HTMX endpoint: show/save a new question (uses temp prefix for formset)
 #? - question_update_view  -> HTMX endpoint: edit/save an existing question (stable prefix based on id)
 #? - choice_area_view      -> HTMX endpoint: returns choice formset HTML for a question
+#? - survey_list_view      -> HTMX endpoint: keyset-paginated survey listing (infinite scroll)
+#? - survey_export_view    -> owner download of the whole survey as JSON/MessagePack (see transfer.py)
+#? - survey_import_view    -> upload such a file to create a new survey in one transaction
+#? - survey_duplicate_view -> copy a survey with all its questions/choices (bulk inserts, see transfer.clone_survey)
+#? - survey_status_view    -> owner closes / reopens the survey (closed surveys take no answers, see archive.py)
+#? - survey_results_view   -> owner results page (per-choice counts), kept current by:
+#? - survey_live_results_view -> async SSE stream pushing new counts as answers arrive (see live.py)
+#? - survey_response_view  -> respondents answer the whole survey in one POST (rate limited + idempotent)
+#? - survey_withdraw_view  -> respondents delete their own response (Submission + its answers)
+#? - survey_offline_view   -> field mode: answers collected on the device, uploaded in batches to:
+#? - survey_definition_view / survey_sync_view -> JSON definition download + bulk upload (see sync.py)
+#? - survey_api_view       -> read-only JSON API of a survey's structure, sparse fieldsets (see api.py)
+#?
+#? @replica_reads: read-only views whose queries may go to a read replica (see DjSurvey/routers.py).
 #?
 #? The trickiest pieces: prefixes for the ChoiceFormSet and using HTMX to swap only small parts.
 #? Prefix ensures the formset fields' names match between client and server so Django binds them correctly.
 #? ------------------------------------------------------------------------
 
 
+SURVEY_LIST_PAGE_SIZE = 20
+
+
+@replica_reads
+def survey_list_view(request):
+    #? ------------------------------------------------------------------------
+    #? Survey listing, one page at a time.
+    #? - scope=mine -> the logged in user's surveys (profile page), anything else -> all surveys (home page)
+    #? - cursor     -> opaque position of the last survey the client already has (see utils.keyset_page)
+    #? - HTMX requests get only the rows + a "load more" sentinel, which requests the next page
+    #?   when it is revealed (infinite scroll). Non-HTMX requests get the full page.
+    #? ------------------------------------------------------------------------
+    scope = request.GET.get('scope')
+    surveys = Survey.objects.exclude(status='deleting').only('id', 'title', 'slug', 'created')
+    if scope == 'mine':
+        if not request.user.is_authenticated:
+            if request.htmx:
+                return HttpResponse('')
+            return redirect(reverse('accounts:login') + '?next=' + reverse('accounts:profile'))
+        surveys = surveys.filter(user=request.user)
+
+    cursor = request.GET.get('cursor')
+    page, next_cursor = keyset_page(surveys, cursor=cursor, page_size=SURVEY_LIST_PAGE_SIZE)
+    context = {
+        'surveys': page,
+        'next_cursor': next_cursor,
+        'cursor': cursor,
+        'scope': scope or 'all',
+        #* query string of the next page, scope comes from the client and is encoded like the cursor
+        'next_query': urlencode({'scope': scope or 'all', 'cursor': next_cursor}) if next_cursor else '',
+    }
+    if request.htmx:
+        return render(request, 'survey/par-survey-list.html', context)
+    return render(request, 'survey/list.html', context)
+
+
+@replica_reads
 def survey_detail_view(request, slug=None):
     survey = get_object_or_404(Survey, slug=slug)
     context = {
-        'survey_obj': survey
+        'survey_obj': survey,
+        #* one lookup on the (user, survey) unique index
+        'has_answered': request.user.is_authenticated and Submission.objects.filter(user=request.user, survey=survey, client_id='').exists(),
     }
     return render(request, 'survey/detail.html', context)
     
@@ -65,6 +142,11 @@ def survey_edit_view(request, slug=None):
     context = {
         'survey_form': form,
         'survey_obj': survey_obj,
+        #? all choices in one extra query; question.survey is already set by the related manager,
+        #? so the urls in par-question.html don't query the survey again per question
+        'questions': survey_obj.questions.order_by('id').prefetch_related(
+            Prefetch('choices', queryset=Choice.objects.order_by('id'))
+        ),
         #? boolean used by template to show "create" vs "edit"
         'create': survey_obj.pk == created_pk,
     }
@@ -92,7 +174,8 @@ def survey_delete_view(request, slug=None):
     }
 
     if request.method == 'POST':
-        object.delete()
+        #* batched set-based deletes, not object.delete(): see deletion.py
+        delete_survey(object)
         succes_url = reverse('accounts:profile')
         if request.htmx:
             return HttpResponse('success', headers= {'HX-Redirect': succes_url})
@@ -103,6 +186,368 @@ def survey_delete_view(request, slug=None):
     return render(request, 'survey/create/survey-delete.html', context)
 
 
+@replica_reads
+@login_required
+def survey_export_view(request, slug=None):
+    from . import transfer  #* export/import code (and its optional codecs) is only loaded by the workers that use it
+    survey_obj = get_object_or_404(Survey, slug=slug, user=request.user)
+    fmt = request.GET.get('format', 'json')
+    if fmt not in transfer.FORMATS:
+        raise Http404
+    try:
+        payload = transfer.dumps(transfer.export_survey(survey_obj), fmt)
+    except ValidationError as exc:
+        #! e.g. msgpack requested but not installed
+        messages.error(request, exc.messages[0])
+        return redirect(survey_obj.get_absolute_url())
+    return HttpResponse(payload, content_type=transfer.CONTENT_TYPES[fmt], headers={
+        'Content-Disposition': f'attachment; filename="{survey_obj.slug}.{fmt}"',
+    })
+
+
+@login_required
+def survey_import_view(request):
+    form = SurveyImportForm(request.POST or None, request.FILES or None)
+    if form.is_valid():
+        from . import transfer
+        upload = form.cleaned_data['file']
+        try:
+            data = transfer.loads(upload.read(), transfer.detect_format(upload.name))
+            survey_obj = transfer.import_survey(data, request.user)
+        except ValidationError as exc:
+            form.add_error('file', exc)
+        else:
+            messages.success(request, f'"{survey_obj.title}" was imported.')
+            return redirect(survey_obj.get_update_url())
+    return render(request, 'survey/transfer/import.html', {'form': form})
+
+
+@login_required
+def survey_duplicate_view(request, slug=None):
+    survey_obj = get_object_or_404(Survey, slug=slug, user=request.user)
+    if request.method != 'POST':
+        return redirect(survey_obj.get_absolute_url())
+    from . import transfer
+    new_survey = transfer.clone_survey(survey_obj, user=request.user)
+    messages.success(request, f'"{survey_obj.title}" was duplicated.')
+    url = new_survey.get_update_url()
+    if request.htmx:
+        return HttpResponse('duplicated', headers={'HX-Redirect': url})
+    return redirect(url)
+
+
+@login_required
+def survey_status_view(request, slug=None):
+    #* POST action=close|reopen, owner only
+    survey_obj = get_object_or_404(Survey, slug=slug, user=request.user)
+    if request.method == 'POST':
+        if request.POST.get('action') == 'close':
+            close_survey(survey_obj)
+            messages.success(request, 'The survey is closed, it no longer accepts answers.')
+        elif request.POST.get('action') == 'reopen':
+            try:
+                reopen_survey(survey_obj)
+                messages.success(request, 'The survey is open again.')
+            except ValidationError as exc:
+                messages.error(request, exc.messages[0])
+    return redirect(survey_obj.get_absolute_url())
+
+
+#? how long a submission's idempotency key is remembered (a retry later than that is a new submission)
+IDEMPOTENCY_TIMEOUT = 60 * 60
+
+
+@login_required
+@ratelimit('answer-submit')
+def survey_response_view(request, slug=None):
+    #? ------------------------------------------------------------------------
+    #? The respondent page: one AnswerForm per question, all saved by a single POST.
+    #? - @ratelimit: each client gets a token bucket of submissions (settings.SURVEY_RATE_LIMITS),
+    #?   floods get 429 before touching the database.
+    #? - idempotency_key: a random key rendered into the form. The first POST carrying it claims it in the
+    #?   cache (cache.add is atomic); retries and double-clicks carrying the same key are answered with the
+    #?   same redirect without writing anything. If validation fails the claim is released so the user
+    #?   can fix the form and send it again.
+    #? - skip logic: questions hidden by the picks made so far (Survey.logic, see logic.py) are neither
+    #?   validated nor saved. The page re-evaluates the same rules in the browser as the user answers.
+    #? ------------------------------------------------------------------------
+    survey_obj = get_object_or_404(Survey, slug=slug)
+    if not survey_obj.is_open:
+        messages.info(request, 'This survey is closed, it no longer accepts answers.')
+        return redirect(survey_obj.get_absolute_url())
+    questions = survey_obj.questions.order_by('id').prefetch_related(
+        Prefetch('choices', queryset=Choice.objects.order_by('id'))
+    )
+    #* answering again edits the previous response: its answers are the initial values of the forms
+    submission = Submission.objects.filter(user=request.user, survey=survey_obj, client_id='').first()
+    initial = {}
+    if submission is not None and request.method != 'POST':
+        for row in submission.answers.values('question_id', 'choice_id', 'text_answer'):
+            initial[row['question_id']] = {'choice': row['choice_id'], 'text_answer': row['text_answer']}
+    answer_forms = [
+        AnswerForm(request.POST or None, question=question, initial=initial.get(question.id))
+        for question in questions
+    ]
+    visible = visible_questions(
+        survey_obj.logic,
+        [form.question.id for form in answer_forms],
+        [form.picked_choice() for form in answer_forms],
+    )
+    for form in answer_forms:
+        form.visible = form.question.id in visible
+    idempotency_key = request.POST.get('idempotency_key') or uuid4().hex
+
+    if request.method == 'POST':
+        claim = f'survey-submit:{request.user.pk}:{idempotency_key}'
+        if not cache.add(claim, 'pending', IDEMPOTENCY_TIMEOUT):
+            messages.info(request, 'Your answers were already received.')
+            return redirect(survey_obj.get_absolute_url())
+
+        shown = [form for form in answer_forms if form.visible]
+        skipped = [form.question.id for form in answer_forms if not form.visible]
+        #* a list, not a generator: every form must be validated so all errors are shown at once
+        if all([form.is_valid() for form in shown]):
+            try:
+                save_response(survey_obj, request.user, [(form.question, form.answer_values()) for form in shown], skipped)
+            except Exception:
+                cache.delete(claim)
+                raise
+            messages.success(request, 'Thank you! Your answers were saved.')
+            return redirect(survey_obj.get_absolute_url())
+        cache.delete(claim)
+
+    context = {
+        'survey_obj': survey_obj,
+        'answer_forms': answer_forms,
+        'idempotency_key': idempotency_key,
+        'submission': submission,
+    }
+    return render(request, 'survey/response/response.html', context)
+
+
+@login_required
+def survey_withdraw_view(request, slug=None):
+    survey_obj = get_object_or_404(Survey, slug=slug)
+    #* a closed survey's answers may already be archived and its final counts frozen (archive.py)
+    if not survey_obj.is_open:
+        messages.info(request, 'This survey is closed, its answers can no longer be deleted.')
+        return redirect(survey_obj.get_absolute_url())
+    if request.method == 'POST':
+        submission = Submission.objects.filter(user=request.user, survey=survey_obj, client_id='').first()
+        if submission is not None:
+            delete_submission(submission)
+            messages.success(request, 'Your answers were deleted.')
+    return redirect(survey_obj.get_absolute_url())
+
+
+@replica_reads
+@login_required
+def survey_results_view(request, slug=None):
+    #? very large surveys get estimates from their sketch (sketches.py) instead of aggregating every
+    #? answer, unless ?exact=1. Archived surveys read their frozen counts, that is already one row.
+    survey_obj = get_object_or_404(Survey, slug=slug, user=request.user)
+    approximate = None
+    if not survey_obj.archived_at and request.GET.get('exact') != '1':
+        approximate = approximate_counts(survey_obj.id)
+    counts = approximate or survey_counts(survey_obj)
+    questions = survey_obj.questions.order_by('id').prefetch_related(
+        Prefetch('choices', queryset=Choice.objects.order_by('id'))
+    )
+    #* attach the counts to the objects so the template doesn't need dict lookups
+    for question in questions:
+        question.answer_count = counts['questions'].get(question.id, 0)
+        for choice in question.choices.all():
+            if approximate:
+                choice.estimate = approximate['choices'].get(choice.id)
+                choice.answer_count = choice.estimate['count'] if choice.estimate else 0
+            else:
+                choice.answer_count = counts['choices'].get(choice.id, 0)
+    context = {
+        'survey_obj': survey_obj,
+        'questions': questions,
+        'total': counts['answers'],
+        'approximate': approximate,
+    }
+    return render(request, 'survey/results.html', context)
+
+
+def survey_etag(request, slug=None):
+    #* Survey.updated versions everything built from the survey's structure
+    updated = Survey.objects.filter(slug=slug).exclude(status='deleting').values_list('updated', flat=True).first()
+    return f'{slug}-{updated.timestamp()}' if updated else None
+
+
+@login_required
+def survey_offline_view(request, slug=None):
+    survey_obj = get_object_or_404(Survey, slug=slug)
+    if not survey_obj.is_open:
+        messages.info(request, 'This survey is closed, it no longer accepts answers.')
+        return redirect(survey_obj.get_absolute_url())
+    context = {
+        'survey_obj': survey_obj,
+        'sync_batch_size': min(100, SYNC_MAX_SUBMISSIONS),
+    }
+    return render(request, 'survey/offline/offline.html', context)
+
+
+@replica_reads
+@login_required
+@gzip_page
+@cache_control(private=True, no_cache=True)
+@conditional_get(etag_func=survey_etag)
+def survey_definition_view(request, slug=None):
+    #* downloaded once by field devices, then only revalidated (304) until the survey changes
+    survey_obj = get_object_or_404(Survey, slug=slug)
+    return JsonResponse(survey_definition(survey_obj), json_dumps_params={'separators': (',', ':')})
+
+
+@login_required
+@require_POST
+@ratelimit('answer-sync')
+def survey_sync_view(request, slug=None):
+    #? Bulk upload of offline responses: {"submissions": [...]}, see sync.py for the format.
+    #? The reply tells the device which client_ids it can forget (accepted + duplicates) and which were rejected.
+    survey_obj = get_object_or_404(Survey, slug=slug)
+    if not survey_obj.is_open:
+        return JsonResponse({'error': 'This survey is closed, it no longer accepts answers.'}, status=409)
+    try:
+        payload = json.loads(request.body)
+    except ValueError:
+        return JsonResponse({'error': 'The body must be JSON.'}, status=400)
+    items = payload.get('submissions') if isinstance(payload, dict) else None
+    if not isinstance(items, list):
+        return JsonResponse({'error': '"submissions" must be a list.'}, status=400)
+    if len(items) > SYNC_MAX_SUBMISSIONS:
+        return JsonResponse({'error': f'At most {SYNC_MAX_SUBMISSIONS} submissions per request.'}, status=400)
+
+    result = sync_submissions(survey_obj, request.user, items)
+    result['version'] = survey_version(survey_obj)
+    return JsonResponse(result)
+
+
+@replica_reads
+@gzip_page
+@cache_control(public=True, no_cache=True)
+@conditional_get(etag_func=survey_etag)
+def survey_api_view(request, slug=None):
+    #* public like the detail page; revalidated with the survey's ETag (304 = one tiny query)
+    from . import api  #* loaded on first use, like transfer (orjson)
+    try:
+        document = api.survey_document(slug, request.GET)
+    except ValidationError as exc:
+        return JsonResponse({'error': exc.messages[0]}, status=400)
+    if document is None:
+        return JsonResponse({'error': 'Survey not found.'}, status=404)
+    return HttpResponse(api.dumps(document), content_type='application/json')
+
+
+#? seconds between two pushes to one stream at most (bursts of answers are coalesced), and between keep-alives
+LIVE_MIN_INTERVAL = 1
+LIVE_KEEPALIVE = 15
+#? seconds before EventSource asks again when the app is served over WSGI (see survey_live_results_view)
+LIVE_WSGI_RETRY = 5
+
+
+def _sse_event(event, data):
+    return f'event: {event}\ndata: {json.dumps(data, separators=(",", ":"))}\n\n'
+
+
+@login_required
+async def survey_live_results_view(request, slug=None):
+    #? ------------------------------------------------------------------------
+    #? Server-Sent Events stream of the survey's answer counts, for its owner.
+    #? - sends the current counts once, then again each time the broker says answers changed
+    #? - owners don't poll anymore: one open connection per dashboard, and counts are only
+    #?   re-read when something actually changed (at most once per LIVE_MIN_INTERVAL)
+    #? - async, so under ASGI (DjSurvey/asgi.py) an idle stream costs no worker thread
+    #? - under WSGI (runserver, sync workers) Django buffers an async iterator whole before sending it,
+    #?   an endless stream would never send a byte. There the current counts are sent and the response
+    #?   ends; the "retry" field makes EventSource ask again LIVE_WSGI_RETRY seconds later.
+    #? ------------------------------------------------------------------------
+    user = await request.auser()
+    survey_obj = await Survey.objects.filter(slug=slug, user=user).only('id', 'archived_at').afirst()
+    if survey_obj is None:
+        raise Http404
+
+    if not isinstance(request, ASGIRequest):
+        body = f'retry: {LIVE_WSGI_RETRY * 1000}\n\n' + _sse_event('counts', await asurvey_counts(survey_obj))
+        return HttpResponse(body, content_type='text/event-stream', headers={'Cache-Control': 'no-cache'})
+
+    async def stream():
+        broker = get_broker()
+        channel = survey_channel(survey_obj.id)
+        subscription = broker.subscribe(channel)
+        try:
+            yield _sse_event('counts', await asurvey_counts(survey_obj))
+            while True:
+                try:
+                    await asyncio.wait_for(subscription.wait(), timeout=LIVE_KEEPALIVE)
+                except asyncio.TimeoutError:
+                    #* comment line, keeps proxies from closing an idle connection
+                    yield ': keep-alive\n\n'
+                    continue
+                yield _sse_event('counts', await asurvey_counts(survey_obj))
+                await asyncio.sleep(LIVE_MIN_INTERVAL)
+        finally:
+            broker.unsubscribe(channel, subscription)
+
+    return StreamingHttpResponse(stream(), content_type='text/event-stream', headers={
+        'Cache-Control': 'no-cache',
+        'X-Accel-Buffering': 'no',  #* nginx: don't buffer the stream
+    })
+
+
+#? ------------------------------------------------------------------------
+#? Conditional GET for the HTMX question partials.
+#? - The version of a question fragment is Question.updated (bumped on any question/choice change, see signals.py)
+#? - The etag and last_modified functions share one lookup per request (cached on the request).
+#? - Partials that contain a form also depend on the CSRF secret, so a digest of it is part of their ETag:
+#?   a 304 must never hand back a form with somebody else's / an expired token.
+#? - "private, no-cache": the browser keeps the copy but always asks first (If-None-Match -> 304).
+#? ------------------------------------------------------------------------
+def _question_updated(request, parent_slug=None, id=None):
+    if id is None:
+        id = request.GET.get('id')
+    key = (parent_slug, str(id))
+    if getattr(request, '_question_updated', (None, None))[0] != key:
+        updated = None
+        if id and str(id).isdigit():
+            updated = Question.objects.filter(survey__slug=parent_slug, id=id).values_list('updated', flat=True).first()
+        request._question_updated = (key, updated)
+    return request._question_updated[1]
+
+
+def _question_etag(request, parent_slug=None, id=None, *parts):
+    updated = _question_updated(request, parent_slug, id)
+    if updated is None:
+        return None
+    return '-'.join(str(part) for part in (parent_slug, id or request.GET.get('id'), updated.timestamp(), *parts))
+
+
+def question_view_etag(request, parent_slug=None, id=None):
+    return _question_etag(request, parent_slug, id)
+
+
+def question_form_etag(request, parent_slug=None, id=None):
+    #* get_token first: on a first visit it creates the secret the rendered form will carry.
+    #* Only a digest goes in the ETag, ETags end up in proxy logs and come back in If-None-Match
+    get_token(request)
+    token = hashlib.sha256(request.META['CSRF_COOKIE'].encode()).hexdigest()[:16]
+    return _question_etag(request, parent_slug, id, token)
+
+
+def choice_area_etag(request, parent_slug=None):
+    return _question_etag(request, parent_slug, None, request.GET.get('prefix', ''))
+
+
+def question_last_modified(request, parent_slug=None, id=None):
+    return _question_updated(request, parent_slug, id)
+
+
+@replica_reads
+@gzip_page
+@cache_control(private=True, no_cache=True)
+@conditional_get(etag_func=question_view_etag, last_modified_func=question_last_modified)
 def question_view(request, parent_slug=None, id=None):
     #? Simple read-only partial. Used to render existing question summary (par-question.html).
     try:
@@ -181,6 +626,9 @@ def question_create_view(request, parent_slug=None):
     return render(request, 'survey/create/par-question-form.html', context=context)
 
 
+@gzip_page
+@cache_control(private=True, no_cache=True)
+@conditional_get(etag_func=question_form_etag, last_modified_func=question_last_modified)
 def question_update_view(request, parent_slug=None, id=None):
     #? --------------------------------------------------------------------
     #? Edit an existing question.
@@ -227,7 +675,8 @@ def question_update_view(request, parent_slug=None, id=None):
 
         #* This ensures a question switched from multiple_choice to text will not keep stale choice objects.
         if question.question_type == 'text' and question.choices.exists():
-            question.choices.all().delete()
+            question.choices.all().delete()  #* their answers go by cascade
+            transaction.on_commit(partial(publish_survey_changed, question.survey_id))
         return render(request, 'survey/create/par-question.html', {'question_obj':question})
 
     #* GET or invalid question_form -> re-render the form partial (choice formset present if multiple_choice)
@@ -253,13 +702,17 @@ def question_delete_view(request, parent_slug=None, id=None):
         return HttpResponse("Question not found")
     
     if request.method=='POST':
-        instance.delete()
+        instance.delete()  #* its answers go by cascade
+        transaction.on_commit(partial(publish_survey_changed, parent_survey.id))
         return HttpResponse("") # with hx-target="#q-<id>" and outerHTML, this empties it
     
     return render(request, 'survey/create/par-question-delete.html', {'question_obj': instance})
 
 
 #### used this first, then decided not to use it. we'll see
+@gzip_page
+@cache_control(private=True, no_cache=True)
+@conditional_get(etag_func=choice_area_etag, last_modified_func=question_last_modified)
 def choice_area_view(request, parent_slug=None):
     #? ------------------------------------------------------------------------
     #? HTMX endpoint responsible for rendering the "choice area" partial: